@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+
+# Os módulos do projeto se importam a partir desta pasta, e logs/, cache/ e download/ ficam nela
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+def preparar_ambiente():
+    if PASTA_PROJETO not in sys.path:
+        sys.path.insert(0, PASTA_PROJETO)
+    os.chdir(PASTA_PROJETO)
+
+def executar(args):
+    """Uma execução completa (download e gravação) da fonte padrão ou de uma fonte do fontes.toml."""
+    import main as automacao
+    fonte = automacao.FONTE_PADRAO
+    if args.fonte:
+        from fontes import carregar_fontes
+        _, fontes = carregar_fontes(args.fontes)
+        fonte = next((f for f in fontes if f.nome == args.fonte), None)
+        if fonte is None:
+            print(f"Fonte {args.fonte} não cadastrada em {args.fontes}.", file=sys.stderr)
+            return 2
+    try:
+        automacao.main(fonte, args.retomar)
+    except KeyboardInterrupt:
+        automacao.cancel_event.set()
+        return 130
+    except Exception:
+        # O erro já foi registrado no log
+        return 1
+    return 0
+
+def servir(argv):
+    """Agendador das fontes (ver agendador.py), sem interface gráfica."""
+    import agendador
+    return agendador.main(argv)
+
+def reconstruir(argv):
+    """Regrava no banco as planilhas guardadas no acervo (ver backfill.py), sem navegador nem rede."""
+    import backfill
+    return backfill.main(argv)
+
+def interface():
+    import app_interface
+    app_interface.iniciar_interface()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m WebScraping",
+        description="Automação da coleta de planilhas. Caminhos relativos são a partir da pasta WebScraping.",
+    )
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    run = comandos.add_parser("run", help="baixa e grava uma fonte uma vez")
+    run.add_argument("--fonte", help="nome de uma fonte do fontes.toml (padrão: planilha do EPA na pasta download)")
+    run.add_argument("--fontes", default="fontes.toml", help="arquivo TOML com as fontes")
+    run.add_argument("--retomar", "--resume", action="store_true", default=None,
+                     help="confirma a ingestão por lotes e continua do último checkpoint de uma execução interrompida")
+    comandos.add_parser("serve", help="agendador das fontes (demais opções: python -m WebScraping serve -h)",
+                        add_help=False)
+    comandos.add_parser("backfill", help="regrava as versões guardadas no acervo (demais opções: python -m WebScraping backfill -h)",
+                        add_help=False)
+    comandos.add_parser("gui", help="abre a interface gráfica")
+    args, resto = parser.parse_known_args(argv)
+
+    preparar_ambiente()
+    if args.comando == "serve":
+        return servir(resto)
+    if args.comando == "backfill":
+        return reconstruir(resto)
+    if resto:
+        parser.error(f"argumentos não reconhecidos: {' '.join(resto)}")
+    if args.comando == "gui":
+        return interface()
+    return executar(args)
+
+
+if __name__ == "__main__":
+    # Uso (a partir da pasta acima de WebScraping): python -m WebScraping run|serve|backfill|gui
+    sys.exit(main())
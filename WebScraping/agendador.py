@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging_config import logger
+from fontes import ARQUIVO_FONTES, carregar_fontes
+import downloader
+import main as automacao
+import metricas
+
+# Fontes processadas ao mesmo tempo, quando o [agendador] do fontes.toml não informa
+CONCORRENCIA = int(os.getenv("AGENDADOR_CONCORRENCIA", "4"))
+
+# Horário da última execução de cada fonte, para respeitar o intervalo entre reinícios do agendador
+ARQUIVO_ESTADO = os.path.join("cache", "agendador.json")
+
+def carregar_estado(arquivo_estado=ARQUIVO_ESTADO):
+    try:
+        with open(arquivo_estado, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def salvar_estado(estado, arquivo_estado=ARQUIVO_ESTADO):
+    os.makedirs(os.path.dirname(arquivo_estado) or ".", exist_ok=True)
+    with open(arquivo_estado, "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=2)
+
+def executar_fonte(fonte, retomar=None):
+    """Baixa e grava uma fonte; erros são registrados sem interromper as demais."""
+    inicio = time.perf_counter()
+    try:
+        with metricas.etapa("fonte", fonte=fonte.nome):
+            automacao.executar_automacao(fonte, retomar)
+        logger.info(f"✅ Fonte {fonte.nome} concluída em {time.perf_counter() - inicio:.1f}s.")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Fonte {fonte.nome} falhou após {time.perf_counter() - inicio:.1f}s: {e}")
+        return False
+
+def executar_fontes(fontes, concorrencia=CONCORRENCIA, retomar=None):
+    """Processa as fontes em paralelo (no máximo concorrencia por vez) e retorna {nome: sucesso}.
+
+    O tempo total fica perto do da fonte mais lenta, não da soma de todas.
+    """
+    resultados = {}
+    if not fontes:
+        return resultados
+    logger.info(f"🗓️ Processando {len(fontes)} fontes com até {concorrencia} ao mesmo tempo...")
+    with metricas.execucao("agendador"):
+        with ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix="fonte") as executor:
+            futuros = {executor.submit(metricas.na_execucao(executar_fonte), fonte, retomar): fonte for fonte in fontes}
+            for futuro in as_completed(futuros):
+                resultados[futuros[futuro].nome] = futuro.result()
+    return resultados
+
+def fontes_pendentes(fontes, estado, agora):
+    """Fontes cujo intervalo desde a última execução já passou."""
+    return [f for f in fontes if agora - estado.get(f.nome, 0) >= f.intervalo_minutos * 60]
+
+def agendar(fontes, concorrencia=CONCORRENCIA, uma_vez=False, arquivo_estado=ARQUIVO_ESTADO, retomar=None):
+    """Executa as fontes pendentes em rodadas até o cancelamento (ou uma única rodada com uma_vez=True)."""
+    estado = carregar_estado(arquivo_estado)
+    while not automacao.cancel_event.is_set():
+        agora = time.time()
+        pendentes = fontes if uma_vez else fontes_pendentes(fontes, estado, agora)
+        if pendentes:
+            for fonte in pendentes:
+                estado[fonte.nome] = agora
+            resultados = executar_fontes(pendentes, concorrencia, retomar)
+            salvar_estado(estado, arquivo_estado)
+            if uma_vez:
+                return resultados
+        # Dorme até a próxima fonte vencer (acordando a cada minuto para perceber o cancelamento)
+        proxima = min(estado.get(f.nome, 0) + f.intervalo_minutos * 60 for f in fontes)
+        espera = min(max(proxima - time.time(), 1), 60)
+        logger.debug("Próxima fonte em %.0fs.", proxima - time.time())
+        automacao.cancel_event.wait(espera)
+    logger.warning("⚠️ Agendador encerrado por cancelamento.")
+    return {}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Baixa e grava as planilhas das fontes cadastradas.")
+    parser.add_argument("--fontes", default=ARQUIVO_FONTES, help="arquivo TOML com as fontes")
+    parser.add_argument("--somente", help="nomes das fontes a processar, separados por vírgula")
+    parser.add_argument("--uma-vez", action="store_true", help="processa todas as fontes uma vez e sai")
+    parser.add_argument("--retomar", "--resume", action="store_true", default=None,
+                        help="confirma a ingestão por lotes e continua do último checkpoint de uma execução interrompida")
+    args = parser.parse_args(argv)
+
+    configuracao, fontes = carregar_fontes(args.fontes)
+    if args.somente:
+        nomes = set(args.somente.split(","))
+        fontes = [f for f in fontes if f.nome in nomes]
+    if not fontes:
+        logger.warning("⚠️ Nenhuma fonte para processar.")
+        return 1
+    downloader.limitador_hosts.intervalo = float(configuracao.get("intervalo_por_host", downloader.INTERVALO_POR_HOST))
+    concorrencia = int(configuracao.get("concorrencia", CONCORRENCIA))
+    try:
+        resultados = agendar(fontes, concorrencia, uma_vez=args.uma_vez, retomar=args.retomar)
+    except KeyboardInterrupt:
+        automacao.cancel_event.set()
+        return 130
+    return 0 if all(resultados.values()) else 1
+
+
+if __name__ == "__main__":
+    # Uso (a partir da pasta WebScraping): python agendador.py [--uma-vez] [--somente uev_library]
+    sys.exit(main())
@@ -25,6 +25,7 @@ def run_automation():
     progress_bar['value'] = 0
     log_text.config(state=tk.NORMAL)
     log_text.delete(1.0, tk.END)
+    log_text.config(state=tk.DISABLED)
     logger.debug("Debug: Iniciando run_automation...")
     log_to_interface("🚀 Iniciando automação...", "info", log_text)
     
@@ -36,15 +37,14 @@ def run_automation():
         global cancel_event
         try:
             logger.info("=== Início da Automação ===")
-            progress_bar['value'] = 10
-            top.update()  # Forçar atualização da interface
+            # A interface só é alterada na thread do Tk, via after
+            top.after(0, progress_bar.config, {'value': 10})
             
             logger.info("Iniciando execução do main()...")
             main()
             
             if not cancel_event.is_set():
-                progress_bar['value'] = 100
-                top.update()  # Forçar atualização da interface
+                top.after(0, progress_bar.config, {'value': 100})
                 log_to_interface("✅ Automação concluída com sucesso!", "success", log_text)
                 logger.info("=== Fim da Automação ===")
             else:
@@ -55,9 +55,8 @@ def run_automation():
             logger.error(f"Erro durante a automação: {e}")
         finally:
             # Reativa o botão "Iniciar Automação" e desativa o botão "Cancelar"
-            start_btn.config(state=tk.NORMAL)
-            cancel_btn.config(state=tk.DISABLED)
-            log_text.config(state=tk.DISABLED)
+            top.after(0, start_btn.config, {'state': tk.NORMAL})
+            top.after(0, cancel_btn.config, {'state': tk.DISABLED})
             # Limpa as pastas __pycache__ após a automação
             clean_pycache_directories()
 
@@ -85,63 +84,72 @@ def generate_logs():
         logger.warning("Nenhum arquivo de log foi encontrado!")
         messagebox.showwarning("Aviso", "Nenhum log foi gerado ainda!")
 
-# Criação da interface
-top = tk.Tk()
-top.title("Automação de Web Scraping")
-top.geometry("800x600")
-top.configure(bg="#f0f4f8")  # Cor de fundo mais suave
+def iniciar_interface():
+    """Cria a janela e executa a interface até ela ser fechada."""
+    global top, log_text, progress_bar, start_btn, cancel_btn
+    # Criação da interface
+    top = tk.Tk()
+    top.title("Automação de Web Scraping")
+    top.geometry("800x600")
+    top.configure(bg="#f0f4f8")  # Cor de fundo mais suave
 
-# Título
-title_label = tk.Label(top, text="Automação de Coleta de Dados", font=("Helvetica", 18, "bold"), bg="#f0f4f8", fg="#2c3e50")
-title_label.pack(pady=15)
+    # Título
+    title_label = tk.Label(top, text="Automação de Coleta de Dados", font=("Helvetica", 18, "bold"), bg="#f0f4f8", fg="#2c3e50")
+    title_label.pack(pady=15)
 
-# Frame principal
-main_frame = tk.Frame(top, bg="#f0f4f8")
-main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
+    # Frame principal
+    main_frame = tk.Frame(top, bg="#f0f4f8")
+    main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
 
-# Área de logs com borda estilizada
-log_frame = tk.Frame(main_frame, bg="#ffffff", bd=2, relief=tk.SOLID, highlightbackground="#d1d5db", highlightthickness=1)
-log_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+    # Área de logs com borda estilizada
+    log_frame = tk.Frame(main_frame, bg="#ffffff", bd=2, relief=tk.SOLID, highlightbackground="#d1d5db", highlightthickness=1)
+    log_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-log_label = tk.Label(log_frame, text="Logs da Automação", font=("Helvetica", 12, "bold"), bg="#ffffff", fg="#2c3e50")
-log_label.pack(pady=5)
+    log_label = tk.Label(log_frame, text="Logs da Automação", font=("Helvetica", 12, "bold"), bg="#ffffff", fg="#2c3e50")
+    log_label.pack(pady=5)
 
-log_text = scrolledtext.ScrolledText(log_frame, height=20, width=70, state=tk.DISABLED, bg="#f9fafb", font=("Consolas", 10), wrap=tk.WORD, borderwidth=0)
-log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    log_text = scrolledtext.ScrolledText(log_frame, height=20, width=70, state=tk.DISABLED, bg="#f9fafb", font=("Consolas", 10), wrap=tk.WORD, borderwidth=0)
+    log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-# Configurar o logger com o handler da interface
-setup_logger(log_text)
+    # Configurar o logger com o handler da interface
+    setup_logger(log_text)
 
-# Definição de cores para logs na interface
-log_text.tag_configure("info", foreground="#1e90ff", font=("Consolas", 10))
-log_text.tag_configure("success", foreground="#28a745", font=("Consolas", 10, "bold"))
-log_text.tag_configure("error", foreground="#dc3545", font=("Consolas", 10, "bold"))
-log_text.tag_configure("warning", foreground="#ffc107", font=("Consolas", 10, "bold"))
+    # Definição de cores para logs na interface
+    log_text.tag_configure("info", foreground="#1e90ff", font=("Consolas", 10))
+    log_text.tag_configure("success", foreground="#28a745", font=("Consolas", 10, "bold"))
+    log_text.tag_configure("error", foreground="#dc3545", font=("Consolas", 10, "bold"))
+    log_text.tag_configure("warning", foreground="#ffc107", font=("Consolas", 10, "bold"))
 
-# Barra de progresso com label
-progress_frame = tk.Frame(main_frame, bg="#f0f4f8")
-progress_frame.pack(fill=tk.X, padx=10, pady=5)
-progress_label = tk.Label(progress_frame, text="Progresso:", font=("Helvetica", 10, "bold"), bg="#f0f4f8", fg="#2c3e50")
-progress_label.pack(anchor="w")
-progress_bar = Progressbar(progress_frame, length=600, mode='determinate', style="blue.Horizontal.TProgressbar")
-progress_bar.pack(fill=tk.X)
+    # Barra de progresso com label
+    progress_frame = tk.Frame(main_frame, bg="#f0f4f8")
+    progress_frame.pack(fill=tk.X, padx=10, pady=5)
+    progress_label = tk.Label(progress_frame, text="Progresso:", font=("Helvetica", 10, "bold"), bg="#f0f4f8", fg="#2c3e50")
+    progress_label.pack(anchor="w")
+    progress_bar = Progressbar(progress_frame, length=600, mode='determinate', style="blue.Horizontal.TProgressbar")
+    progress_bar.pack(fill=tk.X)
 
-# Botões com estilo
-btn_frame = tk.Frame(main_frame, bg="#f0f4f8")
-btn_frame.pack(side=tk.RIGHT, anchor="se", padx=10, pady=10)
+    # Botões com estilo
+    btn_frame = tk.Frame(main_frame, bg="#f0f4f8")
+    btn_frame.pack(side=tk.RIGHT, anchor="se", padx=10, pady=10)
 
-start_btn = tk.Button(btn_frame, text="Iniciar Automação", command=run_automation, font=("Helvetica", 12, "bold"), bg="#4CAF50", fg="white", width=18, height=2, relief=tk.FLAT, activebackground="#45a049")
-start_btn.pack(pady=5)
+    start_btn = tk.Button(btn_frame, text="Iniciar Automação", command=run_automation, font=("Helvetica", 12, "bold"), bg="#4CAF50", fg="white", width=18, height=2, relief=tk.FLAT, activebackground="#45a049")
+    start_btn.pack(pady=5)
 
-cancel_btn = tk.Button(btn_frame, text="Cancelar", command=cancel_automation, font=("Helvetica", 12, "bold"), bg="#F44336", fg="white", width=18, height=2, relief=tk.FLAT, activebackground="#e53935", state=tk.DISABLED)
-cancel_btn.pack(pady=5)
+    cancel_btn = tk.Button(btn_frame, text="Cancelar", command=cancel_automation, font=("Helvetica", 12, "bold"), bg="#F44336", fg="white", width=18, height=2, relief=tk.FLAT, activebackground="#e53935", state=tk.DISABLED)
+    cancel_btn.pack(pady=5)
 
-log_btn = tk.Button(btn_frame, text="Gerar Logs", command=generate_logs, font=("Helvetica", 12, "bold"), bg="#2196F3", fg="white", width=18, height=2, relief=tk.FLAT, activebackground="#1e88e5")
-log_btn.pack(pady=5)
+    log_btn = tk.Button(btn_frame, text="Gerar Logs", command=generate_logs, font=("Helvetica", 12, "bold"), bg="#2196F3", fg="white", width=18, height=2, relief=tk.FLAT, activebackground="#1e88e5")
+    log_btn.pack(pady=5)
 
-# Separador estilizado
-separator = Separator(main_frame, orient="vertical")
-separator.pack(side=tk.RIGHT, fill=tk.Y, padx=5)
+    # Separador estilizado
+    separator = Separator(main_frame, orient="vertical")
+    separator.pack(side=tk.RIGHT, fill=tk.Y, padx=5)
 
-# Inicia a interface
-top.mainloop()
\ No newline at end of file
+    # Inicia a interface
+    top.mainloop()
+
+
+if __name__ == "__main__":
+    # Sem esta proteção, os processos de leitura das abas (INGEST_WORKERS > 1), que no
+    # Windows e no macOS importam de novo o script executado, abririam outras janelas
+    iniciar_interface()
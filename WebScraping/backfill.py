@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging_config import logger
+from cancelamento import cancel_event
+from fontes import ARQUIVO_FONTES, carregar_fontes
+import metricas
+import snapshots
+
+# Versões gravadas ao mesmo tempo (use DB_POOL_SIZE >= BACKFILL_WORKERS)
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+
+def prefixos_das_fontes(arquivo_fontes=ARQUIVO_FONTES):
+    """Prefixo das tabelas de cada fonte cadastrada; fontes fora do cadastro (como a da interface) usam ""."""
+    if not os.path.exists(arquivo_fontes):
+        return {}
+    _, fontes = carregar_fontes(arquivo_fontes)
+    return {fonte.nome: fonte.prefixo_tabela for fonte in fontes}
+
+def prefixo_versao(prefixo_fonte, versao):
+    """Prefixo das tabelas de uma versão: <prefixo da fonte>v<data e hora do download>_."""
+    momento = versao["baixado_em"].replace("-", "").replace(":", "").replace("T", "")
+    return f"{prefixo_fonte}v{momento}_"
+
+def restaurar_versao(fonte, versao, prefixo, pular_inalterados=None):
+    """Grava uma versão do acervo nas tabelas com o prefixo informado, sem navegador nem rede.
+
+    Cada aba é montada numa tabela sombra e trocada de uma vez (recarga atômica), então
+    repetir o backfill refaz as tabelas em vez de duplicar linhas.
+    """
+    # Importado só aqui, como em main.py: a inserção carrega o pandas
+    from database.consultas.insert import inserir_dados
+    inicio = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix="backfill_") as pasta:
+            snapshots.extrair(versao, pasta)
+            with metricas.etapa("backfill_versao", fonte=fonte):
+                inserir_dados(pasta, prefixo_tabela=prefixo, pular_inalterados=pular_inalterados, recarga_atomica=True)
+        logger.info(f"✅ Versão {versao['baixado_em']} da fonte {fonte} gravada nas tabelas {prefixo}* "
+                    f"em {time.perf_counter() - inicio:.1f}s.")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Versão {versao['baixado_em']} da fonte {fonte} falhou: {e}")
+        return False
+
+def selecionar_versoes(fonte=None, desde=None, atual=False):
+    """Versões do acervo a restaurar: todas (ou desde uma data), ou só a mais recente de cada fonte."""
+    versoes = [(nome, v) for nome, v in snapshots.listar(fonte) if not desde or v["baixado_em"] >= desde]
+    if atual:
+        # Dicionário por fonte: a última versão de cada uma (listar já vem em ordem de download)
+        versoes = list({nome: (nome, v) for nome, v in versoes}.values())
+    return versoes
+
+def executar_backfill(versoes, prefixos, atual=False, workers=BACKFILL_WORKERS, pular_inalterados=None):
+    """Grava as versões em paralelo (no máximo workers por vez) e retorna {(fonte, hash): sucesso}."""
+    resultados = {}
+    if not versoes:
+        return resultados
+    logger.info(f"⏪ Restaurando {len(versoes)} versões do acervo com até {workers} ao mesmo tempo...")
+    with metricas.execucao("backfill"):
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as executor:
+            futuros = {}
+            for fonte, versao in versoes:
+                prefixo = prefixos.get(fonte, "")
+                if not atual:
+                    prefixo = prefixo_versao(prefixo, versao)
+                futuros[executor.submit(metricas.na_execucao(restaurar_versao), fonte, versao, prefixo, pular_inalterados)] = (fonte, versao["hash"])
+            for futuro in as_completed(futuros):
+                resultados[futuros[futuro]] = futuro.result()
+    return resultados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconstrói as tabelas a partir do acervo de planilhas baixadas.")
+    parser.add_argument("--fonte", help="só as versões desta fonte")
+    parser.add_argument("--desde", help="só as versões baixadas a partir desta data (AAAA-MM-DD)")
+    parser.add_argument("--atual", action="store_true",
+                        help="grava a versão mais recente de cada fonte nas tabelas atuais, em vez das versionadas")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="versões gravadas ao mesmo tempo")
+    parser.add_argument("--forcar", action="store_true", help="regrava também as versões já gravadas")
+    parser.add_argument("--listar", action="store_true", help="só lista as versões guardadas")
+    parser.add_argument("--fontes", default=ARQUIVO_FONTES, help="arquivo TOML com as fontes (para os prefixos)")
+    args = parser.parse_args(argv)
+
+    versoes = selecionar_versoes(args.fonte, args.desde, args.atual)
+    if args.listar:
+        for fonte, versao in versoes:
+            print(f"{fonte}\t{versao['baixado_em']}\t{versao['hash'][:12]}\t{versao['arquivo']}\t{versao['bytes']} bytes")
+        return 0
+    if not versoes:
+        logger.warning("⚠️ Nenhuma versão no acervo para restaurar.")
+        return 1
+    try:
+        resultados = executar_backfill(versoes, prefixos_das_fontes(args.fontes), args.atual, args.workers,
+                                       pular_inalterados=False if args.forcar else None)
+    except KeyboardInterrupt:
+        cancel_event.set()
+        return 130
+    return 0 if all(resultados.values()) else 1
+
+
+if __name__ == "__main__":
+    # Uso (a partir da pasta WebScraping): python backfill.py [--fonte uev_library] [--desde 2025-01-01] [--atual]
+    sys.exit(main())
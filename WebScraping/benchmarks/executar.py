@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.gerar_planilha import gerar_planilha
+
+PASTA_WEBSCRAPING = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Cenários medidos, cada um em um processo separado (para o pico de memória ser só dele)
+CENARIOS = ["leitura", "leitura_streaming", "limpeza", "inserir_dados", "inserir_dados_streaming", "inserir_dados_cache"]
+
+def _pico_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # Windows: sem resource, o pico de memória não é medido
+        return None
+    # Inclui os processos de leitura do modo paralelo (INGEST_WORKERS > 1)
+    pico = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux informa em KB e macOS em bytes
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _ler_abas(planilha):
+    import pandas as pd
+    from database.consultas.leitor_excel import ler_aba
+    with pd.ExcelFile(planilha) as xls:
+        return {aba: ler_aba(xls, aba) for aba in xls.sheet_names}
+
+def _cenario_leitura(planilha, args):
+    return sum(len(df) for df in _ler_abas(planilha).values())
+
+def _cenario_leitura_streaming(planilha, args):
+    from database.consultas.leitor_excel import abrir_planilha, ler_aba_em_blocos
+    with abrir_planilha(planilha) as wb:
+        return sum(len(bloco) for aba in wb.sheetnames for bloco in ler_aba_em_blocos(wb, aba))
+
+def _cenario_limpeza(planilha, args, abas=None):
+    from database.consultas.limpeza import limpar_dataframe
+    return sum(len(limpar_dataframe(df)) for df in abas.values())
+
+def _pasta_download(planilha):
+    # inserir_dados lê a planilha de uma pasta de download
+    pasta = os.path.abspath("download")
+    os.makedirs(pasta, exist_ok=True)
+    shutil.copy(planilha, pasta)
+    return pasta
+
+def _cenario_inserir_dados(planilha, args, pasta=None, streaming=False, cache_colunar=False):
+    from benchmarks import banco_falso
+    from database.consultas import insert
+    import metricas
+    if not args.mysql:
+        banco_falso.instalar(banco_falso.BancoFalso(latencia=args.latencia_ms / 1000))
+    # Sem o cache colunar, salvo no cenário próprio: as repetições mediriam a leitura do cache
+    insert.inserir_dados(pasta, modo_carga=args.modo, streaming=streaming, workers=args.workers,
+                         pular_inalterados=False, cache_colunar=cache_colunar)
+    relatorio = metricas.ultimo_relatorio
+    linhas = sum(total["linhas"] for total in relatorio["totais_por_etapa"] if total["etapa"] == "insercao")
+    return linhas, relatorio
+
+def executar_cenario(cenario, planilha, args):
+    """Roda um cenário algumas vezes neste processo e devolve as medições (mediana do tempo)."""
+    # Os logs da aplicação continuam sendo gerados (fazem parte do custo), mas não no console
+    import logging
+    from logging_config import console_handler
+    console_handler.setLevel(logging.WARNING)
+    import metricas
+    metricas.METRICAS_DIR = os.path.abspath("metricas")
+    metricas.METRICAS_PROM = os.path.join(metricas.METRICAS_DIR, "webscraping.prom")
+
+    preparo = {}
+    if cenario == "limpeza":
+        # Só a limpeza é medida; a leitura fica fora do tempo
+        preparo["abas"] = _ler_abas(planilha)
+    elif cenario.startswith("inserir_dados"):
+        preparo["pasta"] = _pasta_download(planilha)
+    if cenario == "inserir_dados_cache":
+        # A primeira ingestão converte a planilha; só as seguintes, lidas do cache, são medidas
+        preparo["cache_colunar"] = True
+        _cenario_inserir_dados(planilha, args, **preparo)
+    tempos, linhas, etapas = [], 0, None
+    for _ in range(args.repeticoes):
+        inicio = time.perf_counter()
+        if cenario == "leitura":
+            linhas = _cenario_leitura(planilha, args)
+        elif cenario == "leitura_streaming":
+            linhas = _cenario_leitura_streaming(planilha, args)
+        elif cenario == "limpeza":
+            linhas = _cenario_limpeza(planilha, args, **preparo)
+        else:
+            linhas, relatorio = _cenario_inserir_dados(planilha, args, streaming=cenario.endswith("streaming"), **preparo)
+            etapas = {total["etapa"]: total["segundos"] for total in relatorio["totais_por_etapa"]}
+        tempos.append(time.perf_counter() - inicio)
+    segundos = statistics.median(tempos)
+    tamanho = os.path.getsize(planilha)
+    return {
+        "segundos": round(segundos, 4),
+        "linhas": linhas,
+        "linhas_por_segundo": round(linhas / segundos, 1) if segundos else None,
+        "mb_por_segundo": round(tamanho / segundos / 1e6, 2) if segundos else None,
+        "pico_rss_mb": _pico_rss_mb(),
+        "etapas": etapas,
+    }
+
+def _rodar_em_subprocesso(cenario, planilha, args):
+    comando = [sys.executable, "-m", "benchmarks.executar", "--interno", cenario, "--planilha", planilha,
+               "--repeticoes", str(args.repeticoes), "--modo", args.modo, "--workers", str(args.workers),
+               "--latencia-ms", str(args.latencia_ms)] + (["--mysql"] if args.mysql else [])
+    # Roda numa pasta temporária: a aplicação cria logs/, cache/ e metricas/ na pasta atual
+    ambiente = dict(os.environ, PYTHONPATH=PASTA_WEBSCRAPING + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as pasta:
+        processo = subprocess.run(comando, cwd=pasta, env=ambiente, capture_output=True, text=True, encoding="utf-8")
+    if processo.returncode != 0:
+        raise RuntimeError(f"Cenário {cenario} falhou:\n{processo.stderr[-2000:]}")
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+def comparar(resultados, baseline, tolerancia, folga_segundos=0.0):
+    """Compara tempo e memória de cada cenário com a baseline; retorna a lista de regressões.
+
+    Um tempo só conta como regressão se também piorar mais que folga_segundos: nos cenários
+    de poucos milissegundos, a oscilação da máquina já passa da tolerância.
+    """
+    regressoes = []
+    for cenario, atual in resultados["cenarios"].items():
+        anterior = baseline.get("cenarios", {}).get(cenario)
+        if not anterior:
+            continue
+        for campo in ("segundos", "pico_rss_mb"):
+            if atual.get(campo) is None or not anterior.get(campo):
+                continue
+            variacao = atual[campo] / anterior[campo] - 1
+            atual[f"variacao_{campo}"] = round(variacao, 3)
+            if campo == "segundos" and atual[campo] - anterior[campo] <= folga_segundos:
+                continue
+            if variacao > tolerancia:
+                regressoes.append(f"{cenario}: {campo} {anterior[campo]} -> {atual[campo]} (+{variacao:.0%})")
+    return regressoes
+
+def imprimir(resultados):
+    print(f"\nPlanilha: {resultados['planilha']['linhas']} linhas, {resultados['planilha']['abas']} abas, "
+          f"{resultados['planilha']['bytes'] / 1e6:.2f} MB")
+    print(f"{'cenário':<26}{'tempo (s)':>11}{'linhas/s':>12}{'MB/s':>8}{'pico RSS (MB)':>15}{'vs baseline':>13}")
+    for cenario, r in resultados["cenarios"].items():
+        variacao = r.get("variacao_segundos")
+        print(f"{cenario:<26}{r['segundos']:>11.3f}{r['linhas_por_segundo'] or 0:>12.0f}{r['mb_por_segundo'] or 0:>8.2f}"
+              f"{r['pico_rss_mb'] if r['pico_rss_mb'] is not None else '-':>15}"
+              f"{f'{variacao:+.0%}' if variacao is not None else '-':>13}")
+        for etapa, segundos in sorted((r.get("etapas") or {}).items(), key=lambda item: -item[1]):
+            print(f"    {etapa:<22}{segundos:>11.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da ingestão com planilha sintética e banco falso.")
+    parser.add_argument("--escala", type=float, default=1.0, help="multiplicador de linhas por aba")
+    parser.add_argument("--escala-abas", type=float, default=1.0, help="multiplicador da quantidade de abas")
+    parser.add_argument("--planilha", help="usa esta planilha em vez de gerar uma sintética")
+    parser.add_argument("--cenarios", default=",".join(CENARIOS), help="cenários separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--modo", default="insert", choices=["insert", "load_data"])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="latência simulada por comando no banco falso")
+    parser.add_argument("--mysql", action="store_true",
+                        help="grava no MySQL/MariaDB do .env (use um banco de teste) em vez do banco falso")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava os resultados como nova baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.3, help="piora aceita antes de acusar regressão")
+    parser.add_argument("--folga-segundos", type=float, default=0.05,
+                        help="piora de tempo (em segundos) sempre aceita, qualquer que seja a variação")
+    parser.add_argument("--saida", help="grava os resultados neste arquivo JSON")
+    parser.add_argument("--interno", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        print(json.dumps(executar_cenario(args.interno, args.planilha, args)))
+        return 0
+
+    pasta_planilha = tempfile.TemporaryDirectory(prefix="benchmark_planilha_")
+    if args.planilha:
+        planilha = os.path.abspath(args.planilha)
+        info = {"caminho": planilha, "abas": None, "linhas": None, "bytes": os.path.getsize(planilha)}
+    else:
+        planilha = os.path.join(pasta_planilha.name, "dados_emergy_sintetico.xlsx")
+        info = gerar_planilha(planilha, args.escala, args.escala_abas)
+    resultados = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "configuracao": {"escala": args.escala, "escala_abas": args.escala_abas, "modo": args.modo,
+                         "workers": args.workers, "latencia_ms": args.latencia_ms, "repeticoes": args.repeticoes,
+                         "banco": "mysql" if args.mysql else "falso",
+                         "planilha": os.path.basename(args.planilha) if args.planilha else "sintetica"},
+        "planilha": {chave: valor for chave, valor in info.items() if chave != "caminho"},
+        "cenarios": {},
+    }
+    with pasta_planilha:
+        for cenario in args.cenarios.split(","):
+            print(f"Medindo {cenario}...", flush=True)
+            resultados["cenarios"][cenario] = _rodar_em_subprocesso(cenario, planilha, args)
+    if info["linhas"] is None:
+        resultados["planilha"]["linhas"] = resultados["cenarios"].get("leitura", {}).get("linhas") or 0
+        resultados["planilha"]["abas"] = "?"
+
+    regressoes = []
+    if os.path.exists(args.baseline) and not args.salvar_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("configuracao") != resultados["configuracao"]:
+            print(f"Aviso: configuração diferente da baseline ({baseline.get('configuracao')}).")
+        regressoes = comparar(resultados, baseline, args.tolerancia, args.folga_segundos)
+    imprimir(resultados)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if args.salvar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline gravada em {args.baseline}.")
+    if regressoes:
+        print("\nRegressões em relação à baseline:")
+        for regressao in regressoes:
+            print(f"  - {regressao}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    # Uso (a partir da pasta WebScraping): python -m benchmarks.executar --escala 10
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+from openpyxl import Workbook
+
+# Formato das abas da planilha do EPA (dados_emergy_*.xlsx): nome, linhas, colunas,
+# fração de células vazias e tamanho médio dos textos
+PERFIL_ABAS = [
+    ("Readme and Changinglog", 99, 4, 0.80, 40),
+    ("Table of Contents", 25, 4, 0.54, 20),
+    ("EmCF Library", 218, 27, 0.55, 12),
+    ("Renewable Earth Flows", 99, 7, 0.65, 18),
+    ("Crust Element Composition", 80, 8, 0.38, 8),
+    ("Precipitation_Matrix Inversion", 40, 21, 0.75, 10),
+    ("Water", 35, 14, 0.41, 20),
+    ("Water Notes", 29, 15, 0.61, 6),
+    ("Singular Minerals", 326, 21, 0.37, 12),
+    ("Multiple Minerals", 168, 21, 0.66, 12),
+    ("Aggregate Minerals", 118, 14, 0.45, 16),
+    ("Ocean Ions", 50, 17, 0.37, 10),
+    ("Atmospheric Gases", 25, 15, 0.52, 10),
+    ("Land, Biomass & Soil", 113, 19, 0.56, 14),
+    ("Wood", 115, 10, 0.70, 10),
+    ("Coal", 57, 16, 0.67, 12),
+    ("Oil & NG", 61, 18, 0.80, 8),
+    ("References", 102, 256, 0.96, 120),
+]
+
+# Valores categóricos que se repetem bastante, como na planilha real
+VOCABULARIO = [
+    "Flow", "Type", "compartment", "Resource", "Raw", "in ground", "biotic", "land",
+    "sej/g", "sej/J", "sej/kg", "Mineral", "Element", "Water", "air", "ocean", "CAS",
+]
+
+# Caracteres que a limpeza precisa tratar: acentos, compatibilidade (NFKD) e fora do BMP
+ESPECIAIS = ["é", "ã", "ç", "①", "ﬁ", "µ", "²", "➪", " ", "\U0001F30A", "\U0001F525", "\U00010348"]
+
+PALAVRAS = (
+    "emergy solar transformity unit value flow global renewable baseline mineral ore "
+    "deposit crust ocean atmosphere biomass soil energy matrix inversion reference "
+    "accounting environmental analysis library"
+).split()
+
+def _texto(rng, tamanho_medio):
+    palavras = [rng.choice(PALAVRAS) for _ in range(max(1, int(rng.expovariate(1 / tamanho_medio) / 7)))]
+    if rng.random() < 0.05:
+        palavras.insert(rng.randrange(len(palavras) + 1), rng.choice(ESPECIAIS))
+    texto = " ".join(palavras)
+    # Espaços sobrando nas pontas, que a limpeza remove
+    return f" {texto} " if rng.random() < 0.1 else texto
+
+def _celula(rng, vazia, tamanho_medio):
+    if rng.random() < vazia:
+        return None
+    sorteio = rng.random()
+    if sorteio < 0.35:
+        return rng.choice([rng.randint(0, 5000), round(rng.lognormvariate(20, 6), 4), float(f"{rng.random():.3e}")])
+    if sorteio < 0.65:
+        return rng.choice(VOCABULARIO)
+    return _texto(rng, tamanho_medio)
+
+def _nome_aba(nome, copia):
+    # O Excel limita o nome da aba a 31 caracteres
+    return nome if copia == 0 else f"{nome[:27]} {copia + 1}"
+
+def gerar_planilha(caminho, escala_linhas=1.0, escala_abas=1.0, semente=42):
+    """Gera uma planilha sintética com o formato da planilha do EPA.
+
+    escala_linhas multiplica as linhas de cada aba e escala_abas a quantidade de
+    abas (as extras repetem o perfil das originais). Com a mesma semente, o
+    arquivo gerado tem sempre o mesmo conteúdo.
+    """
+    rng = random.Random(semente)
+    total_abas = max(1, round(len(PERFIL_ABAS) * escala_abas))
+    wb = Workbook(write_only=True)
+    linhas_geradas = 0
+    for indice in range(total_abas):
+        nome, linhas, colunas, vazia, tamanho_medio = PERFIL_ABAS[indice % len(PERFIL_ABAS)]
+        ws = wb.create_sheet(_nome_aba(nome, indice // len(PERFIL_ABAS)))
+        # Cabeçalho quase todo vazio, como na planilha real ("Unnamed: n" no pandas)
+        ws.append([rng.choice(VOCABULARIO) if rng.random() < 0.3 else None for _ in range(colunas)])
+        for _ in range(max(1, round(linhas * escala_linhas))):
+            ws.append([_celula(rng, vazia, tamanho_medio) for _ in range(colunas)])
+            linhas_geradas += 1
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    wb.save(caminho)
+    return {"caminho": caminho, "abas": total_abas, "linhas": linhas_geradas, "bytes": os.path.getsize(caminho)}
+
+
+if __name__ == "__main__":
+    # Uso (a partir da pasta WebScraping): python -m benchmarks.gerar_planilha saida.xlsx --escala 10
+    parser = argparse.ArgumentParser(description="Gera uma planilha sintética no formato da planilha do EPA.")
+    parser.add_argument("caminho")
+    parser.add_argument("--escala", type=float, default=1.0, help="multiplicador de linhas por aba")
+    parser.add_argument("--escala-abas", type=float, default=1.0, help="multiplicador da quantidade de abas")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    print(gerar_planilha(args.caminho, args.escala, args.escala_abas, args.semente))
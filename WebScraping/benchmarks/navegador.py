@@ -0,0 +1,169 @@
+import argparse
+import functools
+import json
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+def _png():
+    """PNG 1x1 transparente; o tamanho não importa, o custo medido é o da requisição."""
+    def bloco(tipo, dados):
+        return struct.pack(">I", len(dados)) + tipo + dados + struct.pack(">I", zlib.crc32(tipo + dados))
+    return (b"\x89PNG\r\n\x1a\n" + bloco(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 6, 0, 0, 0))
+            + bloco(b"IDAT", zlib.compress(b"\x00" * 5)) + bloco(b"IEND", b""))
+
+XPATH_LINK = '//a[contains(@href, ".xlsx")]'
+
+def gerar_pagina(pasta, imagens=40, fontes=4, scripts_analise=3):
+    """Página no estilo da do EPA: o link da planilha no HTML e muitos recursos pesados em volta."""
+    for subpasta in ("img", "fontes", "googletagmanager.com", "dap.digitalgov.gov"):
+        os.makedirs(os.path.join(pasta, subpasta), exist_ok=True)
+    png = _png()
+    for i in range(imagens):
+        with open(os.path.join(pasta, "img", f"{i}.png"), "wb") as f:
+            f.write(png)
+    for i in range(fontes):
+        with open(os.path.join(pasta, "fontes", f"{i}.woff2"), "wb") as f:
+            f.write(os.urandom(20000))
+    for i in range(scripts_analise):
+        pasta_script = "googletagmanager.com" if i % 2 == 0 else "dap.digitalgov.gov"
+        with open(os.path.join(pasta, pasta_script, f"{i}.js"), "w", encoding="utf-8") as f:
+            f.write("window.dataLayer = window.dataLayer || [];\n")
+    with open(os.path.join(pasta, "planilha.xlsx"), "wb") as f:
+        f.write(b"PK")
+    estilos = "\n".join(
+        f"@font-face {{ font-family: f{i}; src: url(fontes/{i}.woff2); }} .f{i} {{ font-family: f{i}; }}"
+        for i in range(fontes)
+    )
+    corpo = "\n".join(f'<p class="f{i % max(fontes, 1)}"><img src="img/{i}.png" width="200" height="100"> Item {i}</p>'
+                      for i in range(imagens))
+    scripts = "\n".join(
+        f'<script src="{"googletagmanager.com" if i % 2 == 0 else "dap.digitalgov.gov"}/{i}.js"></script>'
+        for i in range(scripts_analise)
+    )
+    with open(os.path.join(pasta, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>UEV Library</title><style>{estilos}</style>{scripts}</head>
+<body><div id="main"><article>
+<p><span>Download:</span> <span><a href="planilha.xlsx">UEV Library (xlsx)</a></span></p>
+{corpo}
+</article></div></body></html>
+""")
+    return "index.html"
+
+class _Servidor(SimpleHTTPRequestHandler):
+    """Serve a pasta da página com atraso nos recursos (como uma CDN lenta), mas não no HTML."""
+
+    atraso = 0.0
+
+    def do_GET(self):
+        if self.atraso and not self.path.split("?")[0].endswith((".html", "/")):
+            time.sleep(self.atraso)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+def servir(pasta, atraso_ms):
+    manipulador = type("Manipulador", (_Servidor,), {"atraso": atraso_ms / 1000})
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(manipulador, directory=pasta))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def _rss_chrome_mb(pid_raiz):
+    """Memória (RSS) somada do chromedriver e dos processos do Chrome abertos por ele. Só no Linux."""
+    if not os.path.isdir("/proc"):
+        return None
+    filhos = {}
+    for nome in os.listdir("/proc"):
+        if not nome.isdigit():
+            continue
+        try:
+            with open(f"/proc/{nome}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        filhos.setdefault(ppid, []).append(int(nome))
+    total, pendentes = 0, [pid_raiz]
+    while pendentes:
+        pid = pendentes.pop()
+        pendentes.extend(filhos.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                total += sum(int(linha.split()[1]) for linha in f if linha.startswith("VmRSS:"))
+        except OSError:
+            continue
+    return round(total / 1024, 1)
+
+def medir_perfil(perfil, url, xpath, repeticoes):
+    """Tempo até o link ficar clicável (a mesma espera de main.baixar_via_selenium) num Chrome com o perfil."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    import navegador
+
+    driver = navegador.criar_driver(perfil)
+    try:
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            driver.get(url)
+            WebDriverWait(driver, 60).until(EC.element_to_be_clickable((By.XPATH, xpath)))
+            tempos.append(time.perf_counter() - inicio)
+            driver.get("about:blank")
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metricas = {m["name"]: m["value"] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+        return {
+            "segundos_mediana": round(statistics.median(tempos), 3),
+            "segundos_primeira": round(tempos[0], 3),
+            "heap_js_mb": round(metricas.get("JSHeapUsedSize", 0) / 1024 / 1024, 1),
+            "rss_chrome_mb": _rss_chrome_mb(driver.service.process.pid),
+        }
+    finally:
+        navegador.SessaoNavegador(driver).encerrar()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara os perfis do Chrome numa cópia local da página.")
+    parser.add_argument("--pagina", help="HTML salvo da página (com a pasta de recursos ao lado); sem ele, gera uma sintética")
+    parser.add_argument("--xpath", default=XPATH_LINK, help="XPath do link da planilha")
+    parser.add_argument("--perfis", default="completo,enxuto", help="perfis separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--atraso-ms", type=float, default=200.0, help="atraso simulado de cada recurso da página")
+    parser.add_argument("--imagens", type=int, default=40)
+    parser.add_argument("--saida", help="grava os resultados neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_pagina_") as temporaria:
+        if args.pagina:
+            pasta, arquivo = os.path.split(os.path.abspath(args.pagina))
+        else:
+            pasta, arquivo = temporaria, gerar_pagina(temporaria, args.imagens)
+        servidor = servir(pasta, args.atraso_ms)
+        url = f"http://127.0.0.1:{servidor.server_address[1]}/{arquivo}"
+        resultados = {}
+        try:
+            for perfil in args.perfis.split(","):
+                print(f"Medindo perfil {perfil}...", flush=True)
+                resultados[perfil] = medir_perfil(perfil, url, args.xpath, args.repeticoes)
+        finally:
+            servidor.shutdown()
+
+    print(f"\n{'perfil':<12}{'link clicável (s)':>19}{'1ª carga (s)':>14}{'heap JS (MB)':>14}{'RSS Chrome (MB)':>17}")
+    for perfil, r in resultados.items():
+        print(f"{perfil:<12}{r['segundos_mediana']:>19.3f}{r['segundos_primeira']:>14.3f}{r['heap_js_mb']:>14}"
+              f"{r['rss_chrome_mb'] if r['rss_chrome_mb'] is not None else '-':>17}")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    # Uso (a partir da pasta WebScraping): python -m benchmarks.navegador [--pagina copia/uev-library.html]
+    sys.exit(main())
@@ -0,0 +1,5 @@
+from threading import Event
+
+# Variável de cancelamento global, compartilhada pela interface, pelo download e pela inserção no banco.
+# Fica num módulo próprio para quem só precisa dela não carregar o pandas nem o Selenium
+cancel_event = Event()
@@ -1,39 +1,103 @@
 import os
+import threading
+import time
 import mysql.connector
+from mysql.connector import pooling
 from dotenv import load_dotenv
 
 # Carrega variáveis do .env
 load_dotenv()
 
+# Tamanho máximo do pool e tempo máximo de espera por uma conexão livre (segundos)
+POOL_TAMANHO = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Diretório dos arquivos temporários usados pelo LOAD DATA LOCAL INFILE.
+# O cliente só envia ao servidor arquivos que estejam dentro dele.
+DIRETORIO_CARGA_LOCAL = os.path.abspath(os.getenv("DB_DIRETORIO_CARGA", os.path.join("cache", "carga")))
+
+# Pool compartilhado por todas as instâncias de MySqlConnection do processo
+_pool = None
+_pool_lock = threading.Lock()
+
+def configuracao_conexao():
+    """Retorna os parâmetros de conexão lidos do .env."""
+    return {
+        "host": os.getenv("DB_HOST"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+        "database": os.getenv("DB_NAME"),
+        "port": int(os.getenv("DB_PORT")),
+        "auth_plugin": 'mysql_native_password',
+        "charset": 'utf8mb4',
+        "collation": 'utf8mb4_general_ci',
+        "connection_timeout": 30,
+        "allow_local_infile_in_path": DIRETORIO_CARGA_LOCAL
+    }
+
+def obter_pool():
+    """Cria (apenas uma vez) e retorna o pool de conexões do processo."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = pooling.MySQLConnectionPool(
+                pool_name="webscraping",
+                pool_size=POOL_TAMANHO,
+                pool_reset_session=True,
+                **configuracao_conexao()
+            )
+            print(f"Pool de conexões criado com {POOL_TAMANHO} conexões.")
+        return _pool
+
 class MySqlConnection:
     def __init__(self):
         self.conn = None
 
     def conectar(self):
-        """Estabelece conexão com o banco de dados."""
+        """Obtém uma conexão do pool, aguardando uma conexão livre se o pool estiver esgotado."""
+        if self.conn is not None:
+            return self.conn
         try:
-            self.conn = mysql.connector.connect(
-                host=os.getenv("DB_HOST"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                database=os.getenv("DB_NAME"),
-                port=int(os.getenv("DB_PORT")),
-                auth_plugin='mysql_native_password',
-                charset='utf8mb4',
-                collation='utf8mb4_general_ci',
-                connection_timeout=30
-            )
-            print("Conectado ao banco de dados com sucesso!")
+            self.conn = self._obter_conexao()
             return self.conn
         except mysql.connector.Error as err:
             print(f"Erro ao conectar ao banco de dados: {err}")
             return None
 
+    def _obter_conexao(self):
+        pool = obter_pool()
+        limite = time.monotonic() + POOL_TIMEOUT
+        while True:
+            try:
+                # O pool valida a conexão (ping) e reconecta se ela tiver caído
+                return pool.get_connection()
+            except mysql.connector.PoolError:
+                if time.monotonic() >= limite:
+                    raise
+                time.sleep(0.05)
+
     def fechar_conexao(self):
-        """Fecha a conexão com o banco de dados."""
+        """Devolve a conexão ao pool."""
         if self.conn:
             self.conn.close()
-            print("Conexão com o banco de dados fechada.")
+            self.conn = None
+            print("Conexão com o banco de dados devolvida ao pool.")
+
+    def __enter__(self):
+        conn = self.conectar()
+        if conn is None:
+            raise Exception("Não foi possível conectar ao banco de dados.")
+        return conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is not None and self.conn is not None:
+                self.conn.rollback()
+        except mysql.connector.Error as err:
+            print(f"Erro ao desfazer a transação: {err}")
+        finally:
+            self.fechar_conexao()
+        return False
 
 
 if __name__ == "__main__":
@@ -43,4 +107,3 @@ if __name__ == "__main__":
     else:
         print("Falha na conexão.")
         conexao.fechar_conexao()
-    
\ No newline at end of file
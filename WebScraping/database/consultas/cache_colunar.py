@@ -0,0 +1,181 @@
+import importlib.util
+import json
+import os
+import shutil
+import threading
+import time
+import pandas as pd
+from database.consultas import manifesto
+from database.consultas.leitor_excel import ler_aba, texto_em_object
+from database.consultas.limpeza import limpar_dataframe
+from logging_config import logger
+import metricas
+
+# Guarda as abas já lidas e limpas de cada planilha (pelo hash do arquivo), para que
+# novas ingestões, benchmarks e análises não precisem interpretar o XML do xlsx de novo
+CACHE_COLUNAR = os.getenv("INGEST_CACHE_COLUNAR", "1") == "1"
+DIRETORIO_CACHE_COLUNAR = os.getenv("INGEST_CACHE_COLUNAR_DIR", os.path.join("cache", "colunar"))
+
+# Ao passar deste tamanho, as planilhas usadas há mais tempo saem do cache
+TAMANHO_MAXIMO_CACHE_MB = float(os.getenv("INGEST_CACHE_COLUNAR_MAX_MB", "500"))
+
+# Parquet (pyarrow, em requirements.txt); numa instalação sem ele, o pickle do pandas (também sem reinterpretar o xlsx)
+FORMATO = "parquet" if importlib.util.find_spec("pyarrow") else "pickle"
+
+# Faz parte da chave do cache: aumente ao mudar a limpeza (limpeza.py) ou o que é guardado,
+# para que abas limpas pela versão anterior não sejam mais servidas
+VERSAO = 2
+
+ARQUIVO_INDICE = "abas.json"
+
+# Pastas parciais mais antigas que isso são de execuções interrompidas
+IDADE_MAXIMA_PARCIAL = 3600
+
+_limpeza_lock = threading.Lock()
+_aviso_formato = False
+
+class CacheColunar:
+    """Abas limpas de uma planilha, uma por arquivo, numa pasta com o hash do arquivo.
+
+    As abas são escritas numa pasta parcial, que só toma o nome definitivo (com o
+    índice abas.json) em concluir(): um cache incompleto nunca é usado.
+    """
+
+    def __init__(self, arquivo_hash, diretorio=None):
+        self.arquivo_hash = arquivo_hash
+        self.diretorio = diretorio or DIRETORIO_CACHE_COLUNAR
+        self.chave = f"{arquivo_hash}-v{VERSAO}"
+        self.pasta = os.path.join(self.diretorio, self.chave)
+        self._parcial = None
+        self._arquivos = {}
+        self._falhou = False
+
+    def disponivel(self):
+        return os.path.exists(os.path.join(self.pasta, ARQUIVO_INDICE))
+
+    def _indice(self):
+        with open(os.path.join(self.pasta, ARQUIVO_INDICE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def abas(self):
+        return [item["aba"] for item in self._indice()["abas"]]
+
+    def ler_abas(self):
+        """Gera (aba, DataFrame limpo) na ordem da planilha."""
+        indice = self._indice()
+        # Marca o uso, para a limpeza por tamanho remover primeiro o que não é lido há mais tempo
+        os.utime(os.path.join(self.pasta, ARQUIVO_INDICE))
+        for item in indice["abas"]:
+            with metricas.etapa("leitura_cache", aba=item["aba"]) as medicao:
+                caminho = os.path.join(self.pasta, item["arquivo"])
+                if indice["formato"] == "parquet":
+                    # Em object, como as abas limpas gravadas: sem isso o texto voltaria em colunas Arrow
+                    with texto_em_object():
+                        df = pd.read_parquet(caminho)
+                else:
+                    df = pd.read_pickle(caminho)
+                medicao.adicionar(len(df), os.path.getsize(caminho))
+            yield item["aba"], df
+
+    def gravar(self, aba, df):
+        """Acrescenta uma aba limpa ao cache em construção. Falhas só desativam o cache deste arquivo."""
+        global _aviso_formato
+        if self._falhou or self.disponivel():
+            return
+        try:
+            if self._parcial is None:
+                if FORMATO != "parquet" and not _aviso_formato:
+                    _aviso_formato = True
+                    logger.warning("⚠️ pyarrow não instalado: o cache colunar será gravado em pickle, não em Parquet.")
+                self._parcial = os.path.join(self.diretorio, f"{self.chave}.parcial-{os.getpid()}-{threading.get_ident()}")
+                os.makedirs(self._parcial, exist_ok=True)
+            arquivo = f"{len(self._arquivos)}.{FORMATO}"
+            with metricas.etapa("gravacao_cache", aba=aba) as medicao:
+                caminho = os.path.join(self._parcial, arquivo)
+                # O Parquet só aceita nomes de coluna em texto (cabeçalhos numéricos ou datas da
+                # planilha); todo o resto da ingestão já trata os nomes com str(). No pickle também,
+                # para o cache devolver as mesmas colunas nos dois formatos
+                df = df.rename(columns=str)
+                if FORMATO == "parquet":
+                    df.to_parquet(caminho)
+                else:
+                    df.to_pickle(caminho)
+                medicao.adicionar(len(df), os.path.getsize(caminho))
+            self._arquivos[aba] = arquivo
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível guardar a aba {aba} no cache colunar: {e}")
+            self.descartar()
+            self._falhou = True
+
+    def concluir(self, ordem=None):
+        """Publica o cache (com as abas na ordem informada) e aplica o limite de tamanho."""
+        if self._falhou or self._parcial is None:
+            return
+        abas = [aba for aba in (ordem or self._arquivos) if aba in self._arquivos]
+        indice = {"formato": FORMATO, "abas": [{"aba": aba, "arquivo": self._arquivos[aba]} for aba in abas]}
+        with open(os.path.join(self._parcial, ARQUIVO_INDICE), "w", encoding="utf-8") as f:
+            json.dump(indice, f, ensure_ascii=False)
+        try:
+            os.replace(self._parcial, self.pasta)
+            logger.info(f"🗃️ {len(abas)} abas guardadas no cache colunar ({FORMATO}) em {self.pasta}.")
+        except OSError:
+            # Outra execução publicou o mesmo arquivo antes
+            shutil.rmtree(self._parcial, ignore_errors=True)
+        self._parcial = None
+        limitar_tamanho(self.diretorio)
+
+    def descartar(self):
+        if self._parcial is not None:
+            shutil.rmtree(self._parcial, ignore_errors=True)
+            self._parcial = None
+
+    def gravando(self, abas):
+        """Repassa os (aba, DataFrame limpo) guardando cada um; publica o cache quando todas passarem."""
+        try:
+            for aba, df in abas:
+                self.gravar(aba, df)
+                yield aba, df
+        except BaseException:
+            self.descartar()
+            raise
+        self.concluir()
+
+def _tamanho(pasta):
+    total = 0
+    for raiz, _, arquivos in os.walk(pasta):
+        total += sum(os.path.getsize(os.path.join(raiz, nome)) for nome in arquivos)
+    return total
+
+def limitar_tamanho(diretorio=None, maximo_mb=None):
+    """Remove as planilhas usadas há mais tempo até o cache caber no limite (e as pastas parciais abandonadas)."""
+    diretorio = diretorio or DIRETORIO_CACHE_COLUNAR
+    maximo = (TAMANHO_MAXIMO_CACHE_MB if maximo_mb is None else maximo_mb) * 1024 * 1024
+    with _limpeza_lock:
+        entradas = []
+        for nome in os.listdir(diretorio):
+            pasta = os.path.join(diretorio, nome)
+            if ".parcial-" in nome:
+                if time.time() - os.path.getmtime(pasta) > IDADE_MAXIMA_PARCIAL:
+                    shutil.rmtree(pasta, ignore_errors=True)
+                continue
+            indice = os.path.join(pasta, ARQUIVO_INDICE)
+            if os.path.exists(indice):
+                entradas.append((os.path.getmtime(indice), _tamanho(pasta), pasta))
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, pasta in sorted(entradas):
+            if total <= maximo:
+                break
+            shutil.rmtree(pasta, ignore_errors=True)
+            total -= tamanho
+            logger.info(f"🧹 Planilha {os.path.basename(pasta)} removida do cache colunar (limite de {maximo / 1024 / 1024:.0f} MB).")
+
+def ler_planilha(caminho, arquivo_hash=None):
+    """Retorna {aba: DataFrame limpo} da planilha, do cache colunar quando possível (para análises)."""
+    arquivo_hash = arquivo_hash or manifesto.hash_arquivo(caminho)
+    cache = CacheColunar(arquivo_hash) if CACHE_COLUNAR else None
+    if cache and cache.disponivel():
+        return dict(cache.ler_abas())
+    with pd.ExcelFile(caminho) as xls:
+        abas = ((aba, ler_aba(xls, aba)) for aba in xls.sheet_names)
+        limpas = ((aba, limpar_dataframe(df)) for aba, df in abas if not df.empty)
+        return dict(cache.gravando(limpas) if cache else limpas)
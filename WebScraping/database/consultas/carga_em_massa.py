@@ -0,0 +1,62 @@
+import os
+import tempfile
+from database.conexao.MySqlConnection import DIRETORIO_CARGA_LOCAL
+from database.consultas import esquema
+from logging_config import logger
+
+# Códigos de erro que indicam LOAD DATA LOCAL desabilitado no servidor ou no cliente
+ERROS_INFILE_DESABILITADO = {
+    1148,  # ER_NOT_ALLOWED_COMMAND
+    2068,  # CR_LOAD_DATA_LOCAL_INFILE_REJECTED
+    3948,  # ER_CLIENT_LOCAL_FILES_DISABLED
+}
+
+# Escapes do formato padrão do LOAD DATA (ESCAPED BY '\\')
+TABELA_ESCAPE = str.maketrans({
+    "\\": "\\\\",
+    "\t": "\\t",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\0": "\\0",
+})
+
+def infile_desabilitado(erro):
+    """Indica se o erro do MySQL significa que LOAD DATA LOCAL não é permitido."""
+    return getattr(erro, "errno", None) in ERROS_INFILE_DESABILITADO
+
+def escapar_valor(valor):
+    """Converte um valor para o formato de campo aceito pelo LOAD DATA."""
+    if valor is None:
+        return "\\N"
+    return str(valor).translate(TABELA_ESCAPE)
+
+def escrever_arquivo_temporario(df):
+    """Grava o DataFrame em um TSV temporário (utf8mb4) e retorna o caminho do arquivo."""
+    os.makedirs(DIRETORIO_CARGA_LOCAL, exist_ok=True)
+    fd, caminho = tempfile.mkstemp(prefix="carga_", suffix=".tsv", dir=DIRETORIO_CARGA_LOCAL)
+    # newline="" evita que o Windows converta \n em \r\n dentro do arquivo
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as arquivo:
+        # Mesmo tratamento de nulos do INSERT em lotes: valores ausentes viram texto vazio
+        # (NULL, gravado como \N, só nas colunas tipadas)
+        for linha in esquema.linhas_para_gravar(df):
+            arquivo.write("\t".join(escapar_valor(v) for v in linha))
+            arquivo.write("\n")
+    return caminho
+
+def carregar_via_arquivo(conn, nome_tabela, df):
+    """Carrega o DataFrame na tabela com LOAD DATA LOCAL INFILE a partir de um TSV temporário."""
+    colunas = ", ".join([f"`{col}`" for col in df.columns])
+    caminho = escrever_arquivo_temporario(df)
+    logger.debug("Arquivo temporário de carga gerado: %s (%d bytes)", caminho, os.path.getsize(caminho))
+    query = (
+        f"LOAD DATA LOCAL INFILE %s INTO TABLE `{nome_tabela}` CHARACTER SET utf8mb4 "
+        f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({colunas})"
+    )
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, (caminho,))
+        logger.debug("LOAD DATA concluído em `%s`: %d linhas.", nome_tabela, cursor.rowcount)
+        return cursor.rowcount
+    finally:
+        cursor.close()
+        os.remove(caminho)
@@ -0,0 +1,81 @@
+import os
+import threading
+
+# Progresso de cada aba (por hash do arquivo), gravado junto com cada lote confirmado
+TABELA_CHECKPOINT = "_ingest_checkpoint"
+
+# Linhas confirmadas (commit) de cada vez na ingestão retomável
+TAMANHO_LOTE_CHECKPOINT = int(os.getenv("INGEST_TAMANHO_CHECKPOINT", "5000"))
+
+_tabela_verificada = False
+_tabela_lock = threading.Lock()
+
+def garantir_tabela(conn):
+    """Cria a tabela de checkpoints (uma vez por processo)."""
+    global _tabela_verificada
+    with _tabela_lock:
+        if _tabela_verificada:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS `{TABELA_CHECKPOINT}` (
+                    arquivo_hash CHAR(64) NOT NULL,
+                    aba VARCHAR(255) NOT NULL,
+                    tabela VARCHAR(255),
+                    linhas INT NOT NULL DEFAULT 0,
+                    concluida BOOLEAN NOT NULL DEFAULT FALSE,
+                    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    PRIMARY KEY (arquivo_hash, aba)
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+            """)
+        finally:
+            cursor.close()
+        _tabela_verificada = True
+
+def ler(conn, arquivo_hash, aba):
+    """Retorna (linhas já confirmadas, aba concluída) da aba neste arquivo; (0, False) sem checkpoint."""
+    garantir_tabela(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT linhas, concluida FROM `{TABELA_CHECKPOINT}` WHERE arquivo_hash = %s AND aba = %s",
+            (arquivo_hash, aba)
+        )
+        registro = cursor.fetchone()
+    finally:
+        cursor.close()
+    return (int(registro[0]), bool(registro[1])) if registro else (0, False)
+
+def salvar(conn, arquivo_hash, aba, tabela, linhas, concluida=False):
+    """Grava o progresso da aba. Não faz commit: entra na mesma transação do lote gravado."""
+    garantir_tabela(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"INSERT INTO `{TABELA_CHECKPOINT}` (arquivo_hash, aba, tabela, linhas, concluida) "
+            f"VALUES (%s, %s, %s, %s, %s) "
+            f"ON DUPLICATE KEY UPDATE tabela = VALUES(tabela), linhas = VALUES(linhas), concluida = VALUES(concluida)",
+            (arquivo_hash, aba, tabela, linhas, concluida)
+        )
+    finally:
+        cursor.close()
+
+def limpar(conn, arquivo_hash):
+    """Apaga os checkpoints do arquivo (ao concluí-lo). Não faz commit."""
+    garantir_tabela(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM `{TABELA_CHECKPOINT}` WHERE arquivo_hash = %s", (arquivo_hash,))
+    finally:
+        cursor.close()
+
+def em_lotes(blocos, tamanho=None):
+    """Divide os blocos (DataFrames) em lotes de no máximo tamanho linhas, cada um confirmado à parte."""
+    tamanho = tamanho or TAMANHO_LOTE_CHECKPOINT
+    for bloco in blocos:
+        if len(bloco) <= tamanho:
+            yield bloco
+            continue
+        for inicio in range(0, len(bloco), tamanho):
+            yield bloco.iloc[inicio:inicio + tamanho]
@@ -0,0 +1,247 @@
+import bisect
+import difflib
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from types import MappingProxyType
+from database.conexao.MySqlConnection import MySqlConnection
+from database.consultas import geracao
+from database.consultas.sincronizacao import COLUNA_CHAVE, COLUNA_HASH, COLUNA_REMOVIDO, ler_colunas_chave
+from logging_config import logger
+
+# Tabelas mantidas em memória e as colunas usadas na busca, no formato "tabela:col1,col2;outra:col".
+# A primeira coluna é o "nome" usado nas buscas por prefixo e aproximada
+CONSULTA_TABELAS = ler_colunas_chave(os.getenv("CONSULTA_TABELAS", os.getenv("DB_INDICES", "emcf_library:Flow,Type")))
+
+# Resultados de buscas por prefixo/aproximadas guardados (os mais antigos saem primeiro)
+CONSULTA_CACHE_TAMANHO = int(os.getenv("CONSULTA_CACHE_TAMANHO", "1024"))
+
+# Intervalo (segundos) entre as consultas ao contador de cargas para saber se há dados novos
+CONSULTA_VERIFICAR_SEGUNDOS = float(os.getenv("CONSULTA_VERIFICAR_SEGUNDOS", "5"))
+
+# Semelhança mínima (0 a 1) aceita pela busca aproximada
+CONSULTA_SEMELHANCA = float(os.getenv("CONSULTA_SEMELHANCA", "0.6"))
+
+# Colunas de controle da ingestão, que não fazem parte dos dados
+COLUNAS_INTERNAS = {COLUNA_CHAVE, COLUNA_HASH, COLUNA_REMOVIDO}
+
+def normalizar(valor):
+    """Forma usada na comparação: sem acentos, sem diferença de maiúsculas e espaços extras."""
+    if valor is None:
+        return ""
+    texto = unicodedata.normalize("NFKD", str(valor))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.casefold().split())
+
+class CacheLRU:
+    """Dicionário limitado a `tamanho` itens que descarta o usado há mais tempo."""
+
+    def __init__(self, tamanho=None):
+        self.tamanho = CONSULTA_CACHE_TAMANHO if tamanho is None else tamanho
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave, calcular):
+        with self._lock:
+            try:
+                valor = self._itens[chave]
+            except KeyError:
+                self.faltas += 1
+            else:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return valor
+        # Calculado fora do lock: buscas lentas não seguram as outras threads
+        valor = calcular()
+        if self.tamanho > 0:
+            with self._lock:
+                self._itens[chave] = valor
+                self._itens.move_to_end(chave)
+                while len(self._itens) > self.tamanho:
+                    self._itens.popitem(last=False)
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+class IndiceTabela:
+    """Linhas ativas de uma tabela em memória, indexadas pelas colunas de busca.
+
+    As linhas são somente leitura (MappingProxyType) e as listas de resultado são tuplas,
+    então podem ser devolvidas e guardadas no cache sem cópia.
+    """
+
+    def __init__(self, nome, colunas, linhas, geracao_carga=0):
+        self.nome = nome
+        self.colunas = list(colunas)
+        self.geracao = geracao_carga
+        self.total = 0
+        # Um dicionário por prefixo da chave: buscar("Water") usa o 1º, buscar("Water", "Input") o 2º
+        por_chave = [{} for _ in self.colunas]
+        for linha in linhas:
+            linha = MappingProxyType(linha)
+            self.total += 1
+            chave = tuple(normalizar(linha.get(coluna)) for coluna in self.colunas)
+            for tamanho, indice in enumerate(por_chave, start=1):
+                indice.setdefault(chave[:tamanho], []).append(linha)
+        self._por_chave = [{chave: tuple(grupo) for chave, grupo in indice.items()} for indice in por_chave]
+        # Nomes (1ª coluna) em ordem, para a busca por prefixo com bisect
+        self.nomes = sorted(chave for (chave,) in self._por_chave[0]) if self.colunas else []
+
+    def buscar(self, valores):
+        if not 0 < len(valores) <= len(self.colunas):
+            raise ValueError(f"A tabela {self.nome} é buscada por até {len(self.colunas)} valores: "
+                             f"{', '.join(self.colunas)}.")
+        return self._por_chave[len(valores) - 1].get(tuple(normalizar(v) for v in valores), ())
+
+    def buscar_prefixo(self, prefixo, limite):
+        prefixo = normalizar(prefixo)
+        linhas = []
+        posicao = bisect.bisect_left(self.nomes, prefixo)
+        while posicao < len(self.nomes) and self.nomes[posicao].startswith(prefixo) and len(linhas) < limite:
+            linhas.extend(self._por_chave[0][(self.nomes[posicao],)])
+            posicao += 1
+        return tuple(linhas[:limite])
+
+    def buscar_aproximado(self, termo, limite, semelhanca):
+        parecidos = difflib.get_close_matches(normalizar(termo), self.nomes, n=limite, cutoff=semelhanca)
+        linhas = [linha for nome in parecidos for linha in self._por_chave[0][(nome,)]]
+        return tuple(linhas[:limite])
+
+def carregar_tabela(conn, tabela, colunas, geracao_carga=0):
+    """Lê as linhas ativas (não removidas pela sincronização) da tabela e monta o índice."""
+    inicio = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT * FROM `{tabela}`")
+        nomes = [descricao[0] for descricao in cursor.description]
+        faltando = [coluna for coluna in colunas if coluna not in nomes]
+        if faltando:
+            raise ValueError(f"Colunas de busca inexistentes na tabela {tabela}: {', '.join(faltando)}.")
+        removido = nomes.index(COLUNA_REMOVIDO) if COLUNA_REMOVIDO in nomes else None
+        visiveis = [(i, nome) for i, nome in enumerate(nomes) if nome not in COLUNAS_INTERNAS]
+        linhas = (
+            {nome: registro[i] for i, nome in visiveis}
+            for registro in cursor.fetchall()
+            if removido is None or registro[removido] is None
+        )
+        indice = IndiceTabela(tabela, colunas, linhas, geracao_carga)
+    finally:
+        cursor.close()
+    logger.info(f"🔎 Tabela {tabela} carregada para consulta: {indice.total} linhas "
+                f"em {time.perf_counter() - inicio:.2f}s (carga {geracao_carga}).")
+    return indice
+
+class Consulta:
+    """Buscas em memória nas tabelas ingeridas, sem ir ao banco a cada consulta.
+
+    As tabelas são lidas no primeiro uso. Depois disso, no máximo a cada `verificar_segundos`,
+    uma consulta confere o contador de cargas (geracao.py, incrementado por inserir_dados) e
+    relê só as tabelas que receberam carga nova; enquanto isso as outras threads continuam
+    respondendo com os dados atuais. Buscas exatas vão direto ao índice; as por prefixo e
+    aproximadas passam pelo cache LRU, com a carga da tabela na chave.
+    """
+
+    def __init__(self, tabelas=None, tamanho_cache=None, verificar_segundos=None, semelhanca=None,
+                 conexao=MySqlConnection):
+        self.tabelas = dict(CONSULTA_TABELAS if tabelas is None else tabelas)
+        self.verificar_segundos = CONSULTA_VERIFICAR_SEGUNDOS if verificar_segundos is None else verificar_segundos
+        self.semelhanca = CONSULTA_SEMELHANCA if semelhanca is None else semelhanca
+        self.cache = CacheLRU(tamanho_cache)
+        self.conexao = conexao
+        self._indices = {}
+        self._lock = threading.Lock()
+        self._proxima_verificacao = 0.0
+
+    def atualizar(self, forcar=False):
+        """Relê as tabelas cuja carga mudou desde a última leitura (ou todas, com forcar=True)."""
+        if not forcar and time.monotonic() < self._proxima_verificacao:
+            return
+        # Com os dados já em memória, quem chega durante uma verificação não espera por ela
+        if not self._lock.acquire(blocking=forcar or not self._indices):
+            return
+        try:
+            if not forcar and time.monotonic() < self._proxima_verificacao:
+                return
+            recarregadas = False
+            try:
+                with self.conexao() as conn:
+                    # Geração lida antes dos dados: uma carga no meio da leitura faz a próxima verificação reler
+                    geracoes = geracao.ler(conn, self.tabelas)
+                    for tabela, colunas in self.tabelas.items():
+                        atual = self._indices.get(tabela)
+                        if forcar or atual is None or atual.geracao != geracoes[tabela]:
+                            self._indices[tabela] = carregar_tabela(conn, tabela, colunas, geracoes[tabela])
+                            recarregadas = True
+            except Exception as e:
+                if not self._indices:
+                    # Nada em memória para responder: o erro vai para quem consultou
+                    raise
+                # Banco fora do ar: segue respondendo com o que já está em memória e tenta de novo no próximo intervalo
+                logger.warning(f"⚠️ Não foi possível verificar cargas novas, usando os dados em memória: {e}")
+            finally:
+                if recarregadas:
+                    self.cache.limpar()
+            self._proxima_verificacao = time.monotonic() + self.verificar_segundos
+        finally:
+            self._lock.release()
+
+    def invalidar(self):
+        """Faz a próxima busca conferir o contador de cargas, sem esperar o intervalo."""
+        self._proxima_verificacao = 0.0
+
+    def _indice(self, tabela):
+        self.atualizar()
+        try:
+            return self._indices[tabela]
+        except KeyError:
+            if tabela in self.tabelas:
+                raise ValueError(f"Tabela {tabela} ainda não carregada para consulta (ver o log).") from None
+            raise ValueError(f"Tabela {tabela} não configurada para consulta (CONSULTA_TABELAS).") from None
+
+    def buscar(self, tabela, *valores):
+        """Linhas cujas colunas de busca são iguais aos valores (na ordem das colunas; pode omitir as últimas)."""
+        return self._indice(tabela).buscar(valores)
+
+    def buscar_prefixo(self, tabela, prefixo, limite=20):
+        """Linhas cujo nome (1ª coluna de busca) começa com o prefixo, em ordem alfabética."""
+        indice = self._indice(tabela)
+        return self.cache.obter((tabela, indice.geracao, "prefixo", normalizar(prefixo), limite),
+                                lambda: indice.buscar_prefixo(prefixo, limite))
+
+    def buscar_aproximado(self, tabela, termo, limite=10):
+        """Linhas cujo nome é parecido com o termo (erros de digitação), das mais parecidas às menos."""
+        indice = self._indice(tabela)
+        return self.cache.obter((tabela, indice.geracao, "aproximado", normalizar(termo), limite),
+                                lambda: indice.buscar_aproximado(termo, limite, self.semelhanca))
+
+_consulta = None
+_consulta_lock = threading.Lock()
+
+def obter_consulta():
+    """Consulta compartilhada pelo processo, criada no primeiro uso com as tabelas de CONSULTA_TABELAS."""
+    global _consulta
+    with _consulta_lock:
+        if _consulta is None:
+            _consulta = Consulta()
+        return _consulta
+
+def buscar(tabela, *valores):
+    """Atalho para obter_consulta().buscar(tabela, *valores)."""
+    return obter_consulta().buscar(tabela, *valores)
+
+def buscar_prefixo(tabela, prefixo, limite=20):
+    """Atalho para obter_consulta().buscar_prefixo(tabela, prefixo, limite)."""
+    return obter_consulta().buscar_prefixo(tabela, prefixo, limite)
+
+def buscar_aproximado(tabela, termo, limite=10):
+    """Atalho para obter_consulta().buscar_aproximado(tabela, termo, limite)."""
+    return obter_consulta().buscar_aproximado(tabela, termo, limite)
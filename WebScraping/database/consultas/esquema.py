@@ -0,0 +1,147 @@
+import os
+import re
+from database.consultas.sincronizacao import ler_colunas_chave
+from logging_config import logger
+
+# Tipos inferidos a partir dos dados (INT, DECIMAL, DOUBLE, DATE, VARCHAR) em vez de TEXT em todas as colunas
+TIPOS_INFERIDOS = os.getenv("DB_TIPOS_INFERIDOS", "0") == "1"
+
+# Colunas indexadas por tabela, no mesmo formato de INGEST_CHAVES ("tabela:col1,col2;outra:col")
+INDICES = ler_colunas_chave(os.getenv("DB_INDICES", "emcf_library:Flow,Type"))
+
+TIPO_TEXTO = "TEXT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+
+# Acima disso a coluna de texto vira TEXT; abaixo, VARCHAR com folga para cargas futuras
+LIMITE_VARCHAR = 255
+# Orçamento de bytes para as colunas VARCHAR de uma linha (o InnoDB limita a linha a 65535 bytes)
+ORCAMENTO_LINHA = 60000
+# Prefixo usado ao indexar colunas TEXT
+PREFIXO_INDICE = 191
+
+# Atributo do DataFrame com as colunas em que None deve ser gravado como NULL (e não como texto vazio)
+ATRIBUTO_NULAS = "colunas_nulas"
+
+REGEX_INTEIRO = re.compile(r"[+-]?(0|[1-9]\d*)")
+REGEX_DECIMAL = re.compile(r"[+-]?(0|[1-9]\d*)\.(\d+)")
+REGEX_REAL = re.compile(r"[+-]?((0|[1-9]\d*)(\.\d*)?|\.\d+)([eE][+-]?\d+)?")
+REGEX_DATA = re.compile(r"(\d{4}-\d{2}-\d{2})( 00:00:00)?")
+REGEX_DATA_HORA = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+def _todos(regex, valores):
+    return all(regex.fullmatch(v) for v in valores)
+
+def inferir_tipo(valores):
+    """Escolhe o tipo MySQL de uma coluna a partir dos valores já limpos (texto vazio = ausente).
+
+    Retorna (tipo, largura): largura é o maior tamanho de texto, usado para o VARCHAR.
+    """
+    presentes = [v for v in valores if v != ""]
+    largura = max((len(v) for v in presentes), default=0)
+    if not presentes:
+        return TIPO_TEXTO, largura
+    # Zeros à esquerda ("007") são códigos, não números
+    if _todos(REGEX_INTEIRO, presentes):
+        maior = max(abs(int(v)) for v in presentes)
+        if maior < 2 ** 31:
+            return "INT", largura
+        if maior < 2 ** 63:
+            return "BIGINT", largura
+    if all(REGEX_DECIMAL.fullmatch(v) or REGEX_INTEIRO.fullmatch(v) for v in presentes):
+        # Número escrito sem expoente: DECIMAL guarda exatamente o texto da planilha
+        escala = max((len(v.partition(".")[2]) for v in presentes), default=0)
+        inteiros = max(len(v.lstrip("+-").partition(".")[0]) for v in presentes)
+        if escala <= 30 and inteiros + escala <= 65:
+            return f"DECIMAL({inteiros + escala},{escala})", largura
+    if _todos(REGEX_REAL, presentes):
+        return "DOUBLE", largura
+    if _todos(REGEX_DATA, presentes):
+        return "DATE", largura
+    if _todos(REGEX_DATA_HORA, presentes):
+        return "DATETIME", largura
+    return None, largura
+
+def inferir_esquema(df):
+    """Retorna {coluna: definição SQL} para as colunas do DataFrame (já limpo)."""
+    tipos, orcamento = {}, ORCAMENTO_LINHA
+    larguras = {}
+    for col in df.columns:
+        tipo, largura = inferir_tipo(df[col].tolist())
+        tipos[col] = tipo
+        larguras[col] = largura
+    # Texto curto vira VARCHAR enquanto couber no orçamento da linha, das colunas mais estreitas para as mais largas
+    for col in sorted((c for c in df.columns if tipos[c] is None), key=lambda c: larguras[c]):
+        tamanho = min(max(32, larguras[col] * 2), LIMITE_VARCHAR)
+        if larguras[col] <= LIMITE_VARCHAR and orcamento - (tamanho * 4 + 2) > 0:
+            tipos[col] = f"VARCHAR({tamanho}) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+            orcamento -= tamanho * 4 + 2
+        else:
+            tipos[col] = TIPO_TEXTO
+    return tipos
+
+def tipos_da_tabela(conn, nome_tabela):
+    """Tipos (DATA_TYPE) das colunas já existentes na tabela."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (nome_tabela,)
+        )
+        return {coluna: tipo.lower() for coluna, tipo in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def converter_valores(df, tipos_tabela):
+    """Prepara o DataFrame para colunas tipadas: vazio vira NULL e datas perdem a hora zerada.
+
+    Colunas de texto (ou ausentes de tipos_tabela) ficam como estão.
+    """
+    tipadas = [c for c in df.columns if tipos_tabela.get(str(c), "text") not in ("text", "varchar", "char", "longtext", "mediumtext")]
+    if not tipadas:
+        return df
+    df = df.copy()
+    for col in tipadas:
+        valores = df[col].astype(object).where(df[col].notna() & (df[col] != ""), None)
+        if tipos_tabela[str(col)] == "date":
+            # O map devolve NaN no lugar de None: a célula vazia voltaria como nan e não como NULL
+            valores = valores.map(lambda v: v[:10] if isinstance(v, str) else None).astype(object)
+            valores = valores.where(valores.notna(), None)
+        df[col] = valores
+    df.attrs[ATRIBUTO_NULAS] = tipadas
+    return df
+
+def linhas_para_gravar(df):
+    """Tuplas das linhas do DataFrame, com ausentes como texto vazio exceto nas colunas tipadas (NULL)."""
+    nulas = set(df.attrs.get(ATRIBUTO_NULAS, ()))
+    if nulas:
+        df = df.fillna({col: "" for col in df.columns if col not in nulas})
+    else:
+        df = df.fillna("")
+    return df.itertuples(index=False, name=None)
+
+def garantir_indices(conn, nome_tabela, colunas=None):
+    """Cria os índices configurados (DB_INDICES) que ainda não existem na tabela."""
+    colunas = INDICES.get(nome_tabela, []) if colunas is None else colunas
+    if not colunas:
+        return
+    tipos = tipos_da_tabela(conn, nome_tabela)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (nome_tabela,)
+        )
+        existentes = {linha[0] for linha in cursor.fetchall()}
+        for coluna in colunas:
+            if coluna not in tipos:
+                logger.warning(f"⚠️ Coluna `{coluna}` não existe em `{nome_tabela}`, índice ignorado.")
+                continue
+            nome_indice = f"idx_{re.sub(r'[^0-9a-zA-Z_]', '_', coluna)}"[:64]
+            if nome_indice in existentes:
+                continue
+            prefixo = f"({PREFIXO_INDICE})" if tipos[coluna].endswith("text") else ""
+            logger.info(f"Criando índice `{nome_indice}` em `{nome_tabela}`.`{coluna}`...")
+            cursor.execute(f"ALTER TABLE `{nome_tabela}` ADD INDEX `{nome_indice}` (`{coluna}`{prefixo})")
+    finally:
+        cursor.close()
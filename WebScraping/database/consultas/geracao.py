@@ -0,0 +1,71 @@
+import threading
+
+# Contador de cargas de cada tabela: inserir_dados o incrementa a cada aba gravada, e quem
+# mantém os dados em memória (ver consulta.py) compara o valor para saber se está desatualizado
+TABELA_GERACAO = "_ingest_geracao"
+
+# Erro do MySQL para tabela inexistente (ER_NO_SUCH_TABLE)
+ERRO_TABELA_INEXISTENTE = 1146
+
+_tabela_verificada = False
+_tabela_lock = threading.Lock()
+
+def garantir_tabela(conn):
+    """Cria a tabela de gerações (uma vez por processo)."""
+    global _tabela_verificada
+    with _tabela_lock:
+        if _tabela_verificada:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS `{TABELA_GERACAO}` (
+                    tabela VARCHAR(255) NOT NULL PRIMARY KEY,
+                    geracao BIGINT NOT NULL DEFAULT 0,
+                    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+            """)
+        finally:
+            cursor.close()
+        _tabela_verificada = True
+
+def incrementar(conn, tabela):
+    """Marca uma nova carga da tabela. Não faz commit: entra na mesma transação dos dados.
+
+    A tabela de gerações deve existir antes de a transação começar (garantir_tabela): no
+    MySQL, o CREATE TABLE confirmaria os dados antes do contador.
+    """
+    garantir_tabela(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"INSERT INTO `{TABELA_GERACAO}` (tabela, geracao) VALUES (%s, 1) "
+            f"ON DUPLICATE KEY UPDATE geracao = geracao + 1",
+            (tabela,)
+        )
+    finally:
+        cursor.close()
+
+def ler(conn, tabelas):
+    """Retorna {tabela: geração} das tabelas informadas; tabelas nunca carregadas ficam com 0.
+
+    Só lê: sem a tabela de gerações (nenhuma ingestão ainda), tudo fica com 0, e quem só
+    consulta não precisa de permissão de CREATE.
+    """
+    tabelas = list(tabelas)
+    if not tabelas:
+        return {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT tabela, geracao FROM `{TABELA_GERACAO}` WHERE tabela IN ({', '.join(['%s'] * len(tabelas))})",
+            tabelas
+        )
+        registros = dict(cursor.fetchall())
+    except Exception as e:
+        if getattr(e, "errno", None) != ERRO_TABELA_INEXISTENTE:
+            raise
+        registros = {}
+    finally:
+        cursor.close()
+    return {tabela: int(registros.get(tabela, 0)) for tabela in tabelas}
@@ -1,13 +1,52 @@
+import multiprocessing
 import os
 import pandas as pd
-from database.conexao.MySqlConnection import MySqlConnection
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from database.conexao.MySqlConnection import MySqlConnection, POOL_TAMANHO
+from database.consultas.carga_em_massa import carregar_via_arquivo, infile_desabilitado
+from database.consultas.limpeza import limpar_texto, limpar_dataframe
+from database.consultas.sincronizacao import SincronizacaoTabela
+from database.consultas import manifesto
+from database.consultas import checkpoint
+from database.consultas import geracao
+from database.consultas import esquema
+from database.consultas import recarga
+from database.consultas import registro_esquema
+from database.consultas.pipeline import em_paralelo
+from database.consultas.cache_colunar import CACHE_COLUNAR, CacheColunar
+from database.consultas.leitor_excel import (listar_abas, ler_aba, carregar_planilha, ler_aba_em_blocos, inicializar_leitor,
+                                            ler_e_limpar_aba)
 from logging_config import logger
+import metricas
 import threading
-import unicodedata
-from threading import Event
+from contextlib import closing
+from itertools import groupby
+from operator import itemgetter
+from cancelamento import cancel_event
 
-# Variável de cancelamento global
-cancel_event = Event()
+# Quantidade de linhas enviadas por INSERT multi-linha
+TAMANHO_LOTE = int(os.getenv("DB_TAMANHO_LOTE", "500"))
+
+# Motor de gravação padrão: "insert" (INSERT em lotes) ou "load_data" (LOAD DATA LOCAL INFILE)
+MODO_CARGA = os.getenv("DB_MODO_CARGA", "insert")
+
+# Leitura em streaming (openpyxl read_only, em blocos) em vez de carregar cada aba inteira
+LEITURA_STREAMING = os.getenv("INGEST_STREAMING", "0") == "1"
+
+# Quantidade de abas processadas em paralelo (1 = sequencial)
+WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+
+# Sincronização incremental (grava só linhas novas/alteradas e marca as removidas)
+SINCRONIZAR = os.getenv("INGEST_SINCRONIZAR", "0") == "1"
+
+# Recarga atômica: cada aba é gravada numa tabela sombra, que substitui a atual com RENAME TABLE
+RECARGA_ATOMICA = os.getenv("INGEST_RECARGA_ATOMICA", "0") == "1"
+
+# Ingestão retomável: confirma a cada lote com um checkpoint e continua do último numa nova execução
+RETOMAR = os.getenv("INGEST_RETOMAR", "0") == "1"
+
+# Leitura, limpeza e gravação em threads encadeadas por filas limitadas (ver pipeline.em_paralelo)
+PIPELINE = os.getenv("INGEST_PIPELINE", "0") == "1"
 
 def criar_diretorio():
     diretorio_download = "download"
@@ -16,32 +55,41 @@ def criar_diretorio():
         logger.info(f"📁 Diretório '{diretorio_download}' criado.")
     return diretorio_download
 
-def limpar_texto(texto):
-    """Remove ou substitui caracteres problemáticos para o MySQL."""
-    if pd.isna(texto):
-        return ""
-    if not isinstance(texto, str):
-        texto = str(texto)
-    # Normaliza o texto para decompor caracteres Unicode
-    texto = unicodedata.normalize('NFKD', texto)
-    # Substitui caracteres problemáticos (como ➪) por um espaço ou remove
-    texto = ''.join(c for c in texto if ord(c) < 0x10000)  # Remove caracteres fora do BMP
-    return texto.strip()
-
-def criar_tabela(nome_tabela, df):
+def criar_tabela(nome_tabela, df, conn=None, tipos=None, indices=True):
+    """Cria a tabela da aba ou ajusta a existente, reutilizando a conexão recebida quando informada.
+
+    tipos ({coluna: definição SQL}, ver esquema.inferir_esquema) substitui o TEXT padrão das colunas.
+    Com indices=False, os índices configurados ficam para depois da carga. Colunas novas na aba
+    entram com ALTER TABLE ADD COLUMN; se o registro de esquema já conhece todas as colunas (e os
+    índices), nenhum DDL é enviado. Retorna os tipos das colunas da tabela ({coluna: DATA_TYPE}).
+    """
     global cancel_event
     if cancel_event.is_set():
         raise Exception("Cancelamento solicitado.")
-    conexao = MySqlConnection()
-    try:
+    if conn is None:
         logger.info(f"Conectando ao MySQL para criar tabela `{nome_tabela}`...")
-        conn = conexao.conectar()
-        if conn:
-            cursor = conn.cursor()
+        with MySqlConnection() as nova_conn:
+            return criar_tabela(nome_tabela, df, nova_conn, tipos, indices)
+    definicoes = {col: (tipos or {}).get(col, esquema.TIPO_TEXTO) for col in df.columns}
+    indices_configurados = esquema.INDICES.get(nome_tabela, []) if indices else None
+    try:
+        registro = registro_esquema.consultar(conn, nome_tabela)
+        registrada = registro is not None
+        if not registrada:
+            registro = {"colunas": esquema.tipos_da_tabela(conn, nome_tabela), "indices": []}
+        conhecidas = {col.lower() for col in registro["colunas"]}
+        # O MySQL não diferencia maiúsculas nos nomes de coluna
+        novas = [col for col in df.columns if str(col).lower() not in conhecidas]
+        if registrada and not novas and indices_configurados in (None, registro["indices"]):
+            logger.debug("Esquema da tabela `%s` sem alterações, DDL ignorado.", nome_tabela)
+            return registro["colunas"]
+
+        cursor = conn.cursor()
+        if not registro["colunas"]:
             colunas_sql = []
             
             for col in df.columns:
-                colunas_sql.append(f"`{col}` TEXT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+                colunas_sql.append(f"`{col}` {definicoes[col]}")
             
             query = f"""
                 CREATE TABLE IF NOT EXISTS `{nome_tabela}` (
@@ -51,16 +99,466 @@ def criar_tabela(nome_tabela, df):
             """
             logger.info(f"Executando query para criar tabela `{nome_tabela}`...")
             cursor.execute(query)
-            conn.commit()
-            cursor.close()
-            logger.info(f"✅ Tabela `{nome_tabela}` criada/verificada com sucesso!")
+            registro["colunas"] = {"id": "int"}
+        elif novas:
+            logger.info(f"Adicionando {len(novas)} colunas novas à tabela `{nome_tabela}`: {novas}")
+            cursor.execute(f"ALTER TABLE `{nome_tabela}` " + ", ".join(f"ADD COLUMN `{col}` {definicoes[col]}" for col in novas))
+        cursor.close()
+        registro["colunas"].update({str(col): registro_esquema.tipo_da_definicao(definicoes[col]) for col in novas})
+        if indices:
+            esquema.garantir_indices(conn, nome_tabela)
+            registro["indices"] = indices_configurados
+        registro_esquema.gravar(conn, nome_tabela, registro["colunas"], registro["indices"])
+        conn.commit()
+        logger.info(f"✅ Tabela `{nome_tabela}` criada/verificada com sucesso!")
+        return registro["colunas"]
     except Exception as e:
         logger.error(f"❌ Erro ao criar/verificar a tabela `{nome_tabela}`: {e}")
         raise
+
+def localizar_linha_com_erro(cursor, query, lote, inicio):
+    """Reexecuta linha a linha um lote que falhou para identificar a linha problemática."""
+    cursor.execute("SAVEPOINT diagnostico_lote")
+    try:
+        for deslocamento, data in enumerate(lote):
+            try:
+                cursor.execute(query, data)
+            except Exception as e:
+                return inicio + deslocamento, data, e
+        return None, None, None
+    finally:
+        # Desfaz as linhas reexecutadas, o lote inteiro é tratado como falho
+        cursor.execute("ROLLBACK TO SAVEPOINT diagnostico_lote")
+
+def inserir_em_lotes(conn, nome_tabela, df, tamanho_lote=None, interrupcao=None):
+    """Insere as linhas do DataFrame em lotes usando INSERT multi-linha (executemany).
+
+    interrupcao (threading.Event) para a inserção no próximo lote, como o cancel_event.
+    """
+    global cancel_event
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE
+    colunas = ", ".join([f"`{col}`" for col in df.columns])
+    valores = ", ".join(["%s"] * len(df.columns))
+    query = f"INSERT INTO `{nome_tabela}` ({colunas}) VALUES ({valores})"
+    linhas = list(esquema.linhas_para_gravar(df))
+
+    cursor = conn.cursor()
+    try:
+        for inicio in range(0, len(linhas), tamanho_lote):
+            if cancel_event.is_set():
+                logger.warning(f"⚠️ Cancelamento solicitado no lote iniciado na linha {inicio+1}.")
+                raise Exception("Cancelamento solicitado.")
+            if interrupcao is not None and interrupcao.is_set():
+                raise Exception("Gravação interrompida: outra aba falhou.")
+            lote = linhas[inicio:inicio + tamanho_lote]
+            try:
+                # O mysql-connector reescreve o executemany de INSERT em um único INSERT multi-linha
+                cursor.executemany(query, lote)
+                logger.debug("Lote %d-%d inserido em `%s`.", inicio + 1, inicio + len(lote), nome_tabela)
+            except Exception as e:
+                logger.error(f"❌ Erro ao inserir lote {inicio+1}-{inicio+len(lote)} em `{nome_tabela}`: {e}")
+                indice, data, erro = localizar_linha_com_erro(cursor, query, lote, inicio)
+                if indice is not None:
+                    logger.error(f"❌ Erro ao inserir dados {indice+1}: {erro}")
+                    logger.error(f"Valores problemáticos: {data}")
+                raise
+    finally:
+        cursor.close()
+    return len(linhas)
+
+class OpcoesIngestao:
+    """Opções de uma execução de inserir_dados, repassadas ao processamento de cada aba."""
+
+    def __init__(self, modo_carga=None, streaming=None, workers=None, sincronizar=None, pular_inalterados=None,
+                 tipos_inferidos=None, recarga_atomica=None, prefixo_tabela="", retomar=None, pipeline=None,
+                 cache_colunar=None):
+        self.modo_carga = modo_carga or MODO_CARGA
+        self.streaming = LEITURA_STREAMING if streaming is None else streaming
+        self.workers = workers or WORKERS
+        self.sincronizar = SINCRONIZAR if sincronizar is None else sincronizar
+        self.pular_inalterados = manifesto.PULAR_INALTERADOS if pular_inalterados is None else pular_inalterados
+        self.tipos_inferidos = esquema.TIPOS_INFERIDOS if tipos_inferidos is None else tipos_inferidos
+        self.recarga_atomica = RECARGA_ATOMICA if recarga_atomica is None else recarga_atomica
+        if self.recarga_atomica and self.sincronizar:
+            # A recarga substitui a tabela inteira: não há o que sincronizar
+            logger.warning("⚠️ Recarga atômica ativa, a sincronização incremental será ignorada.")
+            self.sincronizar = False
+        self.pipeline = PIPELINE if pipeline is None else pipeline
+        self.retomar = RETOMAR if retomar is None else retomar
+        if (self.pipeline and self.streaming and not self.retomar and retomar is None
+                and "INGEST_RETOMAR" not in os.environ and not self.recarga_atomica):
+            # No pipeline em streaming cada bloco é confirmado ao chegar à gravação; o
+            # checkpoint de cada commit permite continuar a aba sem duplicar linhas
+            logger.warning("⚠️ Pipeline em streaming: cada bloco será confirmado com checkpoint (_ingest_checkpoint). "
+                           "Defina INGEST_RETOMAR=0 para gravar cada aba em uma única transação.")
+            self.retomar = True
+        if self.retomar and self.recarga_atomica:
+            # A tabela sombra é recriada a cada execução, não há de onde continuar
+            logger.warning("⚠️ Recarga atômica ativa, os checkpoints de retomada não serão usados.")
+            self.retomar = False
+        # Abas limpas guardadas por hash do arquivo (não vale para o streaming, que não materializa as abas)
+        self.cache_colunar = CACHE_COLUNAR if cache_colunar is None else cache_colunar
+        # Prefixo dos nomes das tabelas (uma fonte por prefixo, ver fontes.toml)
+        self.prefixo_tabela = prefixo_tabela or ""
+        # Preenchidos por inserir_dados com o arquivo em processamento
+        self.arquivo_hash = None
+        self.arquivo_nome = None
+        # Ligado quando uma aba do processamento paralelo falha: as demais param no próximo lote.
+        # Não é o cancel_event, que é do processo inteiro (agendador, backfill, interface)
+        self.interrupcao = threading.Event()
+
+def gravar_dados(conn, nome_tabela, df, opcoes):
+    """Grava o DataFrame com o motor escolhido nas opções."""
+    if opcoes.modo_carga == "load_data":
+        try:
+            logger.info(f"Carregando {len(df)} linhas na tabela `{nome_tabela}` via LOAD DATA LOCAL INFILE...")
+            carregar_via_arquivo(conn, nome_tabela, df)
+            return
+        except Exception as e:
+            if not infile_desabilitado(e):
+                raise
+            logger.warning(f"⚠️ LOAD DATA LOCAL INFILE não permitido ({e}), usando INSERT em lotes.")
+            conn.rollback()
+            # Após uma recusa do servidor, as próximas abas já usam INSERT em lotes
+            opcoes.modo_carga = "insert"
+    logger.info(f"Inserindo {len(df)} linhas na tabela `{nome_tabela}` em lotes de {TAMANHO_LOTE}...")
+    inserir_em_lotes(conn, nome_tabela, df, interrupcao=opcoes.interrupcao)
+
+def nome_da_tabela(aba, prefixo=""):
+    return f"{prefixo}{aba.replace(' ', '_').lower()}"
+
+def verificar_cancelamento(momento, opcoes=None):
+    global cancel_event
+    if cancel_event.is_set():
+        logger.warning(f"⚠️ Cancelamento solicitado {momento}.")
+        raise Exception("Cancelamento solicitado.")
+    if opcoes is not None and opcoes.interrupcao.is_set():
+        raise Exception(f"Gravação interrompida {momento}: outra aba falhou.")
+
+def gravar_aba(conn, aba, blocos, opcoes, hash_aba=None):
+    """Cria a tabela e grava os blocos (já limpos) de uma aba em uma única transação.
+
+    Na recarga atômica, os blocos vão para uma tabela sombra, sem os índices e com a sessão
+    ajustada para carga em massa; no final, os índices são criados e a sombra toma o lugar
+    da tabela atual. Quem consulta nunca vê a tabela pela metade.
+    """
+    if opcoes.recarga_atomica:
+        with recarga.carga_na_sombra(conn, nome_da_tabela(aba, opcoes.prefixo_tabela)) as sombra:
+            return gravar_blocos(conn, aba, blocos, opcoes, hash_aba, sombra)
+    return gravar_blocos(conn, aba, blocos, opcoes, hash_aba)
+
+def gravar_blocos(conn, aba, blocos, opcoes, hash_aba=None, sombra=None):
+    """Grava os blocos da aba na tabela dela ou, se informada, na tabela sombra (ver gravar_aba)."""
+    nome_tabela = nome_da_tabela(aba, opcoes.prefixo_tabela)
+    destino = sombra or nome_tabela
+    total = 0
+    tipos_tabela = {}
+    colunas = None
+    sincronizacao = SincronizacaoTabela(conn, nome_tabela) if opcoes.sincronizar else None
+    calcular_hash = hash_aba is None and opcoes.arquivo_hash is not None
+    if calcular_hash:
+        hash_aba = manifesto.HashAba()
+    # A sincronização já é idempotente (upsert por chave), então não usa checkpoints
+    retomada = opcoes.retomar and opcoes.arquivo_hash is not None and sombra is None and sincronizacao is None
+    gravadas_antes, posicao = 0, 0
+    if retomada:
+        gravadas_antes, concluida = checkpoint.ler(conn, opcoes.arquivo_hash, aba)
+        if concluida:
+            logger.info(f"⏭️ Aba {aba} já concluída numa execução anterior deste arquivo, ignorando...")
+            return 0
+        if gravadas_antes:
+            logger.info(f"⏩ Retomando a tabela `{nome_tabela}` após as {gravadas_antes} linhas já gravadas.")
+        blocos = checkpoint.em_lotes(blocos)
+    for bloco in blocos:
+        verificar_cancelamento(f"durante a gravação da tabela `{destino}`", opcoes)
+        bytes_antes = hash_aba.bytes if calcular_hash else 0
+        if calcular_hash:
+            hash_aba.atualizar(bloco)
+        # Linhas confirmadas antes da interrupção entram no hash, mas não são gravadas de novo
+        inicio, posicao = posicao, posicao + len(bloco)
+        if posicao <= gravadas_antes:
+            continue
+        if inicio < gravadas_antes:
+            bloco = bloco.iloc[gravadas_antes - inicio:]
+        if total == 0:
+            with metricas.etapa("ddl", tabela=nome_tabela):
+                # Os tipos só são inferidos com a aba inteira em mãos (no streaming, o
+                # primeiro bloco não garante o tipo dos seguintes)
+                tipos = esquema.inferir_esquema(bloco) if opcoes.tipos_inferidos and not opcoes.streaming else None
+                # A conversão segue os tipos reais da tabela, que pode ter sido criada antes como TEXT
+                # (ou tipada numa execução anterior)
+                tipos_tabela = criar_tabela(destino, bloco, conn, tipos, indices=sombra is None)
+        elif list(bloco.columns) != colunas:
+            # No streaming, uma linha mais larga que o cabeçalho traz colunas "Unnamed: i" no meio da aba
+            with metricas.etapa("ddl", tabela=nome_tabela):
+                tipos_tabela = criar_tabela(destino, bloco, conn, indices=sombra is None)
+        colunas = list(bloco.columns)
+        if tipos_tabela:
+            bloco = esquema.converter_valores(bloco, tipos_tabela)
+        with metricas.etapa("insercao", tabela=nome_tabela) as medicao:
+            if sincronizacao:
+                sincronizacao.aplicar(bloco)
+            else:
+                gravar_dados(conn, destino, bloco, opcoes)
+            medicao.adicionar(len(bloco), hash_aba.bytes - bytes_antes if hash_aba is not None else 0)
+        total += len(bloco)
+        if retomada:
+            # O checkpoint vai na mesma transação do lote: após uma falha, só o lote em andamento se perde
+            checkpoint.salvar(conn, opcoes.arquivo_hash, aba, nome_tabela, posicao)
+            with metricas.etapa("commit", tabela=nome_tabela):
+                conn.commit()
+        logger.debug("%d linhas da tabela `%s` processadas até agora.", total, nome_tabela)
+    if total == 0 and not gravadas_antes:
+        logger.warning(f"⚠️ Tabela `{nome_tabela}` sem linhas, ignorando...")
+        return 0
+    if sincronizacao:
+        with metricas.etapa("insercao", tabela=nome_tabela):
+            sincronizacao.finalizar()
+    if sombra:
+        with metricas.etapa("commit", tabela=nome_tabela):
+            conn.commit()
+        # Índices criados de uma vez com a tabela cheia, mais rápido que mantê-los a cada lote
+        with metricas.etapa("indices", tabela=nome_tabela):
+            esquema.garantir_indices(conn, sombra, esquema.INDICES.get(nome_tabela, []))
+            registro_esquema.gravar(conn, sombra, indices=esquema.INDICES.get(nome_tabela, []))
+        with metricas.etapa("troca_tabela", tabela=nome_tabela):
+            recarga.trocar_tabelas(conn, nome_tabela, sombra)
+    if hash_aba is not None:
+        # Registrado na mesma transação dos dados: só consta no manifesto o que foi gravado
+        manifesto.registrar(conn, opcoes.arquivo_hash, opcoes.arquivo_nome, aba, nome_tabela,
+                            hash_aba.hexdigest(), hash_aba.linhas, hash_aba.bytes)
+    if retomada:
+        checkpoint.salvar(conn, opcoes.arquivo_hash, aba, nome_tabela, posicao, concluida=True)
+    # Avisa as consultas em memória (consulta.py) que a tabela mudou, junto com o commit dos dados
+    geracao.incrementar(conn, nome_tabela)
+    with metricas.etapa("commit", tabela=nome_tabela) as medicao:
+        conn.commit()
+        medicao.adicionar(total)
+    logger.info(f"✅ {total} linhas gravadas na tabela `{nome_tabela}` com sucesso!")
+    return total
+
+def gravar_aba_limpa(conn, aba, df, opcoes):
+    """Grava uma aba já limpa, pulando-a se o conteúdo for igual ao da última ingestão."""
+    hash_aba = None
+    if opcoes.arquivo_hash is not None:
+        hash_aba = manifesto.HashAba().atualizar(df)
+        if opcoes.pular_inalterados and manifesto.aba_inalterada(conn, nome_da_tabela(aba, opcoes.prefixo_tabela), hash_aba.hexdigest()):
+            logger.info(f"⏭️ Aba {aba} sem alterações desde a última ingestão, ignorando...")
+            return 0
+    return gravar_aba(conn, aba, [df], opcoes, hash_aba)
+
+def limpar_aba(aba, df, prefixo_tabela=""):
+    """Limpa os dados (aba inteira ou um bloco), medindo o tempo da limpeza."""
+    with metricas.etapa("limpeza", tabela=nome_da_tabela(aba, prefixo_tabela)) as medicao:
+        medicao.adicionar(len(df))
+        return limpar_dataframe(df)
+
+def processar_aba_em_blocos(conn, planilha, aba, opcoes):
+    """Lê, limpa e grava a aba bloco a bloco, sem materializar a aba inteira na memória.
+
+    planilha é a pasta de trabalho aberta uma única vez para todas as abas (ver carregar_planilha).
+
+    O hash da aba só é conhecido ao final da leitura, então aqui a aba é sempre
+    gravada (e registrada no manifesto); o salto por conteúdo vale para o arquivo inteiro.
+    """
+    nome_tabela = nome_da_tabela(aba, opcoes.prefixo_tabela)
+    leitura = metricas.medir_iteracao(ler_aba_em_blocos(planilha, aba), "leitura_aba", tabela=nome_tabela)
+    blocos = (limpar_aba(aba, bloco, opcoes.prefixo_tabela) for bloco in leitura)
+    return gravar_aba(conn, aba, blocos, opcoes)
+
+def ler_blocos_das_abas(xlsx_path, opcoes):
+    """Lê as abas em sequência, gerando (aba, bloco) de todas elas.
+
+    A planilha é aberta uma vez só, na própria thread de leitura do pipeline, e fechada ao final.
+    """
+    with metricas.etapa("abertura_excel"):
+        planilha = carregar_planilha(xlsx_path)
+    with closing(planilha):
+        logger.info(f"Abas encontradas no arquivo Excel: {planilha.sheetnames}")
+        for aba in planilha.sheetnames:
+            verificar_cancelamento("durante a leitura da aba")
+            nome_tabela = nome_da_tabela(aba, opcoes.prefixo_tabela)
+            for bloco in metricas.medir_iteracao(ler_aba_em_blocos(planilha, aba), "leitura_aba", tabela=nome_tabela):
+                yield aba, bloco
+
+def processar_abas_em_blocos_em_pipeline(conn, xlsx_path, opcoes):
+    """Versão em pipeline do streaming: os blocos seguintes (inclusive das próximas abas)
+    são lidos e limpos enquanto o atual é gravado."""
+    lidos = em_paralelo(ler_blocos_das_abas(xlsx_path, opcoes), "leitura")
+    limpos = em_paralelo(lidos, "limpeza", lambda item: (item[0], limpar_aba(item[0], item[1], opcoes.prefixo_tabela)))
+    with closing(limpos):
+        for aba, itens in groupby(limpos, key=itemgetter(0)):
+            logger.info(f"📋 Processando aba: {aba}")
+            gravar_aba(conn, aba, (bloco for _, bloco in itens), opcoes)
+
+def ler_abas(xls, opcoes):
+    """Lê as abas do arquivo aberto (pd.ExcelFile), gerando (aba, DataFrame) das que têm linhas."""
+    for aba in xls.sheet_names:
+        verificar_cancelamento("durante a leitura da aba")
+        logger.info(f"📋 Processando aba: {aba}")
+        with metricas.etapa("leitura_aba", tabela=nome_da_tabela(aba, opcoes.prefixo_tabela)) as medicao:
+            df = ler_aba(xls, aba)
+            medicao.adicionar(len(df))
+        logger.info(f"Linhas lidas na aba {aba}: {len(df)}")
+
+        if df.empty:
+            logger.warning(f"⚠️ Aba {aba} está vazia, ignorando...")
+            continue
+        yield aba, df
+
+def limpar_abas(abas, opcoes):
+    """Limpa as abas lidas, gerando (aba, DataFrame limpo)."""
+    for aba, df in abas:
+        logger.debug("Limpando dados da aba `%s` para evitar caracteres inválidos...", aba)
+        yield aba, limpar_aba(aba, df, opcoes.prefixo_tabela)
+
+def processar_abas(conn, xls, opcoes, cache=None):
+    """Lê, limpa e grava as abas do arquivo aberto, guardando as abas limpas no cache colunar (se informado).
+
+    No pipeline, leitura e limpeza rodam em threads próprias: enquanto uma aba é gravada,
+    as seguintes já estão sendo lidas e limpas (no máximo TAMANHO_FILA à frente).
+    """
+    lidas = ler_abas(xls, opcoes)
+    if opcoes.pipeline:
+        lidas = em_paralelo(lidas, "leitura")
+    limpas = limpar_abas(lidas, opcoes)
+    if cache:
+        limpas = cache.gravando(limpas)
+    if opcoes.pipeline:
+        limpas = em_paralelo(limpas, "limpeza")
+    gravar_abas_limpas(conn, limpas, opcoes)
+
+def gravar_abas_limpas(conn, limpas, opcoes):
+    with closing(limpas):
+        for aba, df in limpas:
+            gravar_aba_limpa(conn, aba, df, opcoes)
+
+def gravar_aba_em_nova_conexao(aba, df, opcoes):
+    with MySqlConnection() as conn:
+        return gravar_aba_limpa(conn, aba, df, opcoes)
+
+def processar_aba_em_blocos_em_nova_conexao(xlsx_path, aba, opcoes):
+    with MySqlConnection() as conn:
+        return processar_aba_em_blocos(conn, xlsx_path, aba, opcoes)
+
+_contexto_processos = None
+
+def contexto_processos():
+    """Contexto dos processos de leitura das abas, sem fork direto do processo principal.
+
+    Um fork com as threads de log e do pool de conexões ativas pode travar o processo filho.
+    No Linux, um processo servidor (forkserver) importa o pandas uma vez e os processos de
+    leitura nascem dele; no Windows e no macOS, cada processo começa do zero (spawn).
+    """
+    global _contexto_processos
+    if _contexto_processos is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            contexto = multiprocessing.get_context("forkserver")
+            contexto.set_forkserver_preload(["database.consultas.leitor_excel"])
+        else:
+            contexto = multiprocessing.get_context("spawn")
+        _contexto_processos = contexto
+    return _contexto_processos
+
+def inserir_abas_em_paralelo(xlsx_path, abas, opcoes, cache=None):
+    """Processa várias abas ao mesmo tempo.
+
+    A leitura e a limpeza (CPU) rodam em processos; a gravação roda em threads,
+    cada uma com sua conexão do pool. No modo streaming cada thread lê, limpa e
+    grava a própria aba em blocos. Com o cache colunar já pronto, as abas limpas
+    saem dele e não há processos de leitura.
+    """
+    em_cache = cache is not None and cache.disponivel()
+    processos = None if opcoes.streaming or em_cache else ProcessPoolExecutor(
+        max_workers=opcoes.workers, mp_context=contexto_processos(),
+        initializer=inicializar_leitor, initargs=(xlsx_path,)
+    )
+    # Cada gravação segura uma conexão do pool; acima disso, as threads só esperariam por uma
+    gravadores = min(opcoes.workers, POOL_TAMANHO)
+    if gravadores < opcoes.workers:
+        logger.warning(f"⚠️ {opcoes.workers} workers, mas o pool tem {POOL_TAMANHO} conexões (DB_POOL_SIZE): "
+                       f"gravando {gravadores} abas por vez.")
+    threads = ThreadPoolExecutor(max_workers=gravadores, thread_name_prefix="gravacao")
+    leituras, gravacoes = {}, {}
+    if em_cache:
+        for aba, df in cache.ler_abas():
+            gravacoes[threads.submit(metricas.na_execucao(gravar_aba_em_nova_conexao), aba, df, opcoes)] = aba
+    for aba in ([] if em_cache else abas):
+        if opcoes.streaming:
+            gravacoes[threads.submit(metricas.na_execucao(processar_aba_em_blocos_em_nova_conexao),
+                                     xlsx_path, aba, opcoes)] = aba
+        else:
+            leituras[processos.submit(ler_e_limpar_aba, aba)] = aba
+
+    concluido = False
+    try:
+        while leituras or gravacoes:
+            verificar_cancelamento("durante o processamento paralelo das abas")
+            # Timeout curto para que o cancelamento seja percebido rapidamente
+            prontos, _ = wait(list(leituras) + list(gravacoes), timeout=0.2, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                if futuro in leituras:
+                    aba = leituras.pop(futuro)
+                    df = futuro.result()
+                    logger.info(f"Linhas lidas na aba {aba}: {len(df)}")
+                    if df.empty:
+                        logger.warning(f"⚠️ Aba {aba} está vazia, ignorando...")
+                        continue
+                    if cache:
+                        cache.gravar(aba, df)
+                    gravacoes[threads.submit(metricas.na_execucao(gravar_aba_em_nova_conexao), aba, df, opcoes)] = aba
+                else:
+                    aba = gravacoes.pop(futuro)
+                    futuro.result()
+                    logger.debug(f"Aba {aba} concluída.")
+        concluido = True
+        if cache and not em_cache:
+            cache.concluir(ordem=abas)
+    except BaseException:
+        # Na primeira falha, as gravações em andamento das outras abas param no próximo lote
+        opcoes.interrupcao.set()
+        raise
     finally:
-        conexao.fechar_conexao()
+        if cache:
+            cache.descartar()
+        # Em erro ou cancelamento, descarta o que ainda não começou; as gravações
+        # em andamento param no próximo lote ao verificar o cancel_event ou a interrupção
+        if processos:
+            processos.shutdown(wait=concluido, cancel_futures=True)
+        threads.shutdown(wait=True, cancel_futures=True)
+
+def garantir_tabelas_de_controle(conn, opcoes):
+    """Cria as tabelas do manifesto, das gerações, do registro de esquema e dos checkpoints antes
+    da primeira transação de dados.
+
+    No MySQL um CREATE TABLE confirma a transação em andamento; criadas no meio da
+    gravação de uma aba, essas tabelas confirmariam os dados antes da hora.
+    """
+    manifesto.garantir_tabela(conn)
+    geracao.garantir_tabela(conn)
+    registro_esquema.garantir_tabela(conn)
+    if opcoes.retomar:
+        checkpoint.garantir_tabela(conn)
+
+def registrar_arquivo_no_manifesto(opcoes):
+    with MySqlConnection() as conn:
+        manifesto.registrar(conn, opcoes.arquivo_hash, opcoes.arquivo_nome, tabela=opcoes.prefixo_tabela or None)
+        if opcoes.retomar:
+            checkpoint.limpar(conn, opcoes.arquivo_hash)
+        conn.commit()
+    logger.info(f"📝 Arquivo {opcoes.arquivo_nome} registrado no manifesto de ingestão.")
 
-def inserir_dados(diretorio_download):
+def inserir_dados(diretorio_download, modo_carga=None, streaming=None, workers=None, sincronizar=None,
+                  pular_inalterados=None, tipos_inferidos=None, recarga_atomica=None, prefixo_tabela="",
+                  retomar=None, pipeline=None, cache_colunar=None):
+    opcoes = OpcoesIngestao(modo_carga, streaming, workers, sincronizar, pular_inalterados, tipos_inferidos,
+                            recarga_atomica, prefixo_tabela, retomar, pipeline, cache_colunar)
+    # Chamado por main(), as medições entram no relatório da automação; sozinho, gera o próprio relatório
+    with metricas.execucao("ingestao"):
+        return ingerir_arquivo(diretorio_download, opcoes)
+
+def ingerir_arquivo(diretorio_download, opcoes):
+    """Grava no MySQL a planilha encontrada em diretorio_download (ver inserir_dados)."""
     global cancel_event
     try:
         if not os.path.exists(diretorio_download):
@@ -76,69 +574,76 @@ def inserir_dados(diretorio_download):
         xlsx_path = os.path.join(diretorio_download, arquivos[0])
         logger.info(f"📂 Arquivo encontrado: {xlsx_path}")
         
+        opcoes.arquivo_nome = xlsx_path
+        with metricas.etapa("hash_arquivo") as medicao:
+            opcoes.arquivo_hash = manifesto.hash_arquivo(xlsx_path)
+            medicao.adicionar(bytes_=os.path.getsize(xlsx_path))
+        with MySqlConnection() as conn:
+            garantir_tabelas_de_controle(conn, opcoes)
+            if opcoes.pular_inalterados and manifesto.arquivo_ingerido(conn, opcoes.arquivo_hash, opcoes.prefixo_tabela):
+                logger.info("⏭️ Arquivo sem alterações desde a última ingestão, nada a gravar.")
+                return
+        
+        cache = CacheColunar(opcoes.arquivo_hash) if opcoes.cache_colunar and not opcoes.streaming else None
+        if cache and cache.disponivel():
+            logger.info(f"🗃️ Planilha já convertida, lendo as abas limpas do cache colunar: {cache.pasta}")
+
+        if opcoes.workers > 1:
+            if cache and cache.disponivel():
+                abas = cache.abas()
+            else:
+                with metricas.etapa("abertura_excel"):
+                    abas = listar_abas(xlsx_path)
+            logger.info(f"Abas encontradas no arquivo Excel: {abas}")
+            logger.info(f"Processando {len(abas)} abas em paralelo com {opcoes.workers} workers...")
+            inserir_abas_em_paralelo(xlsx_path, abas, opcoes, cache)
+            registrar_arquivo_no_manifesto(opcoes)
+            return
+
         conexao = MySqlConnection()
-        conn = None
         try:
             logger.info("Conectando ao MySQL para inserção de dados...")
             conn = conexao.conectar()
-            
-            if conn:
+            if conn is None:
+                # Sem conexão nenhuma aba é gravada: o arquivo não pode chegar ao manifesto
+                raise Exception("Não foi possível conectar ao banco de dados.")
+
+            if opcoes.streaming and opcoes.pipeline:
+                logger.info(f"Lendo arquivo Excel em blocos: {xlsx_path}")
+                processar_abas_em_blocos_em_pipeline(conn, xlsx_path, opcoes)
+            elif opcoes.streaming:
+                logger.info(f"Lendo arquivo Excel em blocos: {xlsx_path}")
+                # Aberta uma vez só: cada abertura lê de novo os textos compartilhados da planilha
+                with metricas.etapa("abertura_excel"):
+                    planilha = carregar_planilha(xlsx_path)
+                with closing(planilha):
+                    logger.info(f"Abas encontradas no arquivo Excel: {planilha.sheetnames}")
+                    for aba in planilha.sheetnames:
+                        verificar_cancelamento("durante a leitura da aba")
+                        logger.info(f"📋 Processando aba: {aba}")
+                        processar_aba_em_blocos(conn, planilha, aba, opcoes)
+            elif cache and cache.disponivel():
+                limpas = cache.ler_abas()
+                if opcoes.pipeline:
+                    limpas = em_paralelo(limpas, "leitura")
+                gravar_abas_limpas(conn, limpas, opcoes)
+            else:
                 logger.info(f"Lendo arquivo Excel: {xlsx_path}")
                 # Usa pd.ExcelFile com um contexto para garantir que o arquivo seja fechado
-                with pd.ExcelFile(xlsx_path) as xls:
+                with metricas.etapa("abertura_excel"):
+                    xls = pd.ExcelFile(xlsx_path)
+                with xls:
                     logger.info(f"Abas encontradas no arquivo Excel: {xls.sheet_names}")
-                    for aba in xls.sheet_names:
-                        if cancel_event.is_set():
-                            logger.warning("⚠️ Cancelamento solicitado durante a leitura da aba.")
-                            raise Exception("Cancelamento solicitado.")
-                        logger.info(f"📋 Processando aba: {aba}")
-                        df = pd.read_excel(xls, sheet_name=aba, dtype=str)
-                        logger.info(f"Linhas lidas na aba {aba}: {len(df)}")
-                        
-                        if df.empty:
-                            logger.warning(f"⚠️ Aba {aba} está vazia, ignorando...")
-                            continue
-                        
-                        # Limpar os dados antes de inserir
-                        logger.debug(f"Limpando dados da aba `{aba}` para evitar caracteres inválidos...")
-                        for col in df.columns:
-                            df[col] = df[col].apply(limpar_texto)
-                        
-                        nome_tabela = aba.replace(" ", "_").lower()
-                        criar_tabela(nome_tabela, df)
-                        
-                        cursor = conn.cursor()
-                        colunas = ", ".join([f"`{col}`" for col in df.columns])
-                        valores = ", ".join(["%s"] * len(df.columns))
-                        query = f"INSERT INTO `{nome_tabela}` ({colunas}) VALUES ({valores})"
-                        
-                        logger.info(f"Inserindo {len(df)} linhas na tabela `{nome_tabela}`...")
-                        for i, row in df.iterrows():
-                            if cancel_event.is_set():
-                                logger.warning(f"⚠️ Cancelamento solicitado na linha {i+1}.")
-                                raise Exception("Cancelamento solicitado.")
-                            data = tuple(row.fillna("").values)
-                            logger.debug(f"Dados {i+1} sendo inseridos: {data}")
-                            try:
-                                cursor.execute(query, data)
-                                logger.debug(f"Dados {i+1} inseridos com sucesso.")
-                            except Exception as e:
-                                logger.error(f"❌ Erro ao inserir dados {i+1}: {e}")
-                                logger.error(f"Valores problemáticos: {data}")
-                                raise
-                        conn.commit()
-                        cursor.close()
-                        logger.info(f"✅ {len(df)} linhas inseridas na tabela `{nome_tabela}` com sucesso!")
-                        # Libera o DataFrame da memória
-                        del df
+                    processar_abas(conn, xls, opcoes, cache)
                 
         except Exception as e:
             logger.error(f"❌ Erro ao processar o arquivo: {e}")
+            if conexao.conn:
+                conexao.conn.rollback()
             raise
         finally:
-            if conn:
-                conn.close()
             conexao.fechar_conexao()
+        registrar_arquivo_no_manifesto(opcoes)
     except Exception as e:
         logger.error(f"❌ Erro em inserir_dados(): {str(e)}")
         raise
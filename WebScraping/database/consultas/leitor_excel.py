@@ -0,0 +1,147 @@
+import os
+from contextlib import contextmanager, nullcontext
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from database.consultas.limpeza import limpar_dataframe
+
+# Quantidade de linhas por bloco na leitura em streaming
+TAMANHO_BLOCO = int(os.getenv("INGEST_TAMANHO_BLOCO", "5000"))
+
+# Textos que o pd.read_excel lê como ausentes (os na_values padrão do pandas)
+VALORES_AUSENTES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+# Planilha aberta uma única vez em cada processo de leitura paralela
+_planilha_processo = None
+
+def texto_em_object():
+    """Contexto em que o pandas guarda texto em colunas object (como até o pandas 2).
+
+    Com o pyarrow instalado, o pandas 3 passa a usar colunas Arrow para texto; a limpeza e a
+    gravação trabalham célula a célula com objetos Python, e a conversão de volta custava
+    mais que a própria limpeza.
+    """
+    try:
+        pd.get_option("future.infer_string")
+    except KeyError:
+        # pandas sem a opção (anterior ao 2.1): o texto já fica em object
+        return nullcontext()
+    return pd.option_context("future.infer_string", False)
+
+def ler_aba(xls, aba):
+    """Lê uma aba inteira como texto (pd.read_excel com dtype=str), em colunas object."""
+    with texto_em_object():
+        return pd.read_excel(xls, sheet_name=aba, dtype=str)
+
+def carregar_planilha(caminho):
+    """Abre a planilha em modo read_only (sem carregar as abas inteiras na memória); feche com close().
+
+    Abra uma vez por arquivo: cada abertura lê de novo os textos compartilhados da planilha.
+    """
+    return load_workbook(caminho, read_only=True, data_only=True, keep_links=False)
+
+@contextmanager
+def abrir_planilha(caminho):
+    """Como carregar_planilha, fechando a planilha ao final do bloco."""
+    wb = carregar_planilha(caminho)
+    try:
+        yield wb
+    finally:
+        wb.close()
+
+def listar_abas(caminho):
+    """Retorna os nomes das abas da planilha sem ler o conteúdo delas."""
+    with abrir_planilha(caminho) as wb:
+        return list(wb.sheetnames)
+
+def _converter_celula(cell):
+    # Mesma conversão feita pelo leitor openpyxl do pandas
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return None
+    if cell.data_type == TYPE_NUMERIC:
+        valor = int(cell.value)
+        if valor == cell.value:
+            return valor
+        return float(cell.value)
+    return cell.value
+
+def _converter_linha(row):
+    linha = [_converter_celula(cell) for cell in row]
+    # Remove as células vazias do final da linha
+    while linha and linha[-1] == "":
+        linha.pop()
+    return linha
+
+def _valor_ausente(valor):
+    return valor is None or (isinstance(valor, str) and valor in VALORES_AUSENTES)
+
+def _nomes_colunas(cabecalho):
+    # Mesmos nomes gerados por pd.read_excel: "Unnamed: i" para vazios e sufixos ".n" para repetidos
+    nomes = [f"Unnamed: {i}" if v is None or v == "" else v for i, v in enumerate(cabecalho)]
+    contagem = {}
+    for i, nome in enumerate(nomes):
+        original, atual = nome, contagem.get(nome, 0)
+        while atual > 0:
+            contagem[original] = atual + 1
+            nome = f"{original}.{atual}"
+            atual = atual + 1 if nome in nomes else contagem.get(nome, 0)
+        nomes[i] = nome
+        contagem[nome] = atual + 1
+    return nomes
+
+def _montar_bloco(linhas, colunas, inicio):
+    largura = len(colunas)
+    dados = [[None if _valor_ausente(v) else str(v) for v in linha] + [None] * (largura - len(linha)) for linha in linhas]
+    with texto_em_object():
+        return pd.DataFrame(dados, columns=colunas, index=range(inicio, inicio + len(dados)), dtype=object)
+
+def ler_aba_em_blocos(planilha, aba, tamanho_bloco=None):
+    """Lê a aba em blocos de linhas (como pd.read_excel(dtype=str)), com memória limitada ao bloco.
+
+    planilha é a pasta de trabalho já aberta (ver abrir_planilha), reaproveitada entre as abas.
+    As linhas vazias do final são descartadas, como no pandas. Se uma linha de dados passar da
+    largura do cabeçalho, os blocos seguintes ganham as colunas "Unnamed: i" que faltavam.
+    """
+    tamanho_bloco = tamanho_bloco or TAMANHO_BLOCO
+    ws = planilha[aba]
+    # A dimensão gravada no arquivo pode estar errada: as linhas são lidas até a última célula
+    ws.reset_dimensions()
+    cabecalho, colunas, bloco, inicio, vazias = None, None, [], 0, 0
+    for row in ws.rows:
+        linha = _converter_linha(row)
+        if cabecalho is None:
+            cabecalho = linha
+            colunas = _nomes_colunas(cabecalho)
+            continue
+        if not linha:
+            # Só entram no bloco se houver dados depois delas
+            vazias += 1
+            continue
+        if len(linha) > len(colunas):
+            colunas = _nomes_colunas(cabecalho + [""] * (len(linha) - len(cabecalho)))
+        for pendente in [[]] * vazias + [linha]:
+            bloco.append(pendente)
+            if len(bloco) >= tamanho_bloco:
+                yield _montar_bloco(bloco, colunas, inicio)
+                inicio += len(bloco)
+                bloco = []
+        vazias = 0
+    if bloco:
+        yield _montar_bloco(bloco, colunas, inicio)
+
+def inicializar_leitor(caminho):
+    """Inicializador dos processos de leitura: abre a planilha uma vez por processo."""
+    global _planilha_processo
+    _planilha_processo = pd.ExcelFile(caminho)
+
+def ler_e_limpar_aba(aba):
+    """Lê e limpa uma aba inteira dentro de um processo de leitura (ver inicializar_leitor)."""
+    df = ler_aba(_planilha_processo, aba)
+    if df.empty:
+        return df
+    return limpar_dataframe(df)
@@ -0,0 +1,85 @@
+import glob
+import os
+import re
+import sys
+import unicodedata
+import numpy as np
+import pandas as pd
+
+# Caracteres fora do BMP (acima de U+FFFF), que a limpeza remove
+REGEX_FORA_BMP = re.compile("[\U00010000-\U0010FFFF]")
+
+def limpar_texto(texto):
+    """Remove ou substitui caracteres problemáticos para o MySQL."""
+    if pd.isna(texto):
+        return ""
+    if not isinstance(texto, str):
+        texto = str(texto)
+    # Normaliza o texto para decompor caracteres Unicode
+    texto = unicodedata.normalize('NFKD', texto)
+    # Substitui caracteres problemáticos (como ➪) por um espaço ou remove
+    texto = ''.join(c for c in texto if ord(c) < 0x10000)  # Remove caracteres fora do BMP
+    return texto.strip()
+
+def _limpar_valor_unico(texto):
+    if texto.isascii():
+        # NFKD não altera ASCII e não há caracteres fora do BMP, só resta o strip
+        return texto.strip()
+    texto = unicodedata.normalize('NFKD', texto)
+    return REGEX_FORA_BMP.sub("", texto).strip()
+
+def limpar_valores(valores):
+    """Limpa um array de valores de uma vez, com saída idêntica a aplicar limpar_texto em cada um."""
+    valores = np.array(valores, dtype=object).ravel()
+    # Valores ausentes viram texto vazio e os demais são convertidos com str(), como em limpar_texto
+    valores[pd.isna(valores)] = ""
+    for i in np.flatnonzero([not isinstance(v, str) for v in valores]):
+        valores[i] = str(valores[i])
+    # Planilhas repetem muito os mesmos valores (principalmente células vazias),
+    # então só os valores distintos passam pela normalização
+    codigos, unicos = pd.factorize(valores)
+    limpos = np.array([_limpar_valor_unico(v) for v in unicos], dtype=object)
+    return limpos[codigos]
+
+def limpar_coluna(serie):
+    """Versão em lote de limpar_texto para uma coluna inteira."""
+    return pd.Series(limpar_valores(serie.to_numpy(dtype=object)), index=serie.index, name=serie.name, dtype=object)
+
+def limpar_dataframe(df):
+    """Limpa todas as células do DataFrame em um único lote."""
+    limpos = limpar_valores(df.to_numpy(dtype=object))
+    return pd.DataFrame(limpos.reshape(df.shape), index=df.index, columns=df.columns, dtype=object)
+
+def verificar_equivalencia(padrao=os.path.join("download", "dados_emergy_*.xlsx")):
+    """Confere, aba por aba, se limpar_dataframe produz os mesmos bytes que limpar_texto."""
+    divergencias = 0
+    arquivos = sorted(glob.glob(padrao))
+    for caminho in arquivos:
+        with pd.ExcelFile(caminho) as xls:
+            for aba in xls.sheet_names:
+                df = pd.read_excel(xls, sheet_name=aba, dtype=str)
+                esperado = df.apply(lambda col: col.apply(limpar_texto))
+                obtido = limpar_dataframe(df)
+                for col in df.columns:
+                    for i, (a, b) in enumerate(zip(esperado[col], obtido[col])):
+                        if a.encode("utf-8", "surrogatepass") != b.encode("utf-8", "surrogatepass"):
+                            divergencias += 1
+                            print(f"Divergência em {caminho} / {aba} / {col} / linha {i+1}: {a!r} != {b!r}")
+                print(f"{os.path.basename(caminho)} / {aba}: {df.size} células verificadas.")
+
+    # Casos que a planilha atual pode não cobrir
+    extras = pd.Series([None, float("nan"), 1.5, 3, "  aé  ", "①", "x\U0001F600y", "\ud800", " \U0001F600 "])
+    if list(limpar_coluna(extras)) != [limpar_texto(v) for v in extras]:
+        divergencias += 1
+        print("Divergência nos casos extras.")
+
+    if not arquivos:
+        print(f"Nenhum arquivo encontrado em {padrao}.")
+    return divergencias
+
+
+if __name__ == "__main__":
+    # Uso (a partir da pasta WebScraping): python -m database.consultas.limpeza
+    total = verificar_equivalencia()
+    print("Limpeza vetorizada equivalente." if total == 0 else f"{total} divergências encontradas.")
+    sys.exit(1 if total else 0)
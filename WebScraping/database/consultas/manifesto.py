@@ -0,0 +1,120 @@
+import hashlib
+import os
+import threading
+from logging_config import logger
+
+# Tabela que registra o que já foi ingerido (arquivo inteiro e cada aba)
+TABELA_MANIFESTO = "_ingest_manifest"
+
+# Pula arquivos e abas cujo conteúdo já foi ingerido (conforme o manifesto)
+PULAR_INALTERADOS = os.getenv("INGEST_PULAR_INALTERADOS", "1") == "1"
+
+_tabela_verificada = False
+_tabela_lock = threading.Lock()
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+class HashAba:
+    """Hash incremental do conteúdo (já limpo) de uma aba, alimentado bloco a bloco."""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self._colunas = None
+        self.linhas = 0
+        self.bytes = 0
+
+    def atualizar(self, df):
+        if self._colunas is None:
+            self._colunas = [str(c) for c in df.columns]
+            self._hash.update("\x1f".join(self._colunas).encode("utf-8", "surrogatepass") + b"\x1e")
+        for linha in df.fillna("").itertuples(index=False, name=None):
+            dados = "\x1f".join(str(v) for v in linha).encode("utf-8", "surrogatepass") + b"\x1e"
+            self._hash.update(dados)
+            self.bytes += len(dados)
+        self.linhas += len(df)
+        return self
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+def garantir_tabela(conn):
+    """Cria a tabela do manifesto (uma vez por processo)."""
+    global _tabela_verificada
+    with _tabela_lock:
+        if _tabela_verificada:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS `{TABELA_MANIFESTO}` (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    arquivo_hash CHAR(64) NOT NULL,
+                    arquivo_nome VARCHAR(255),
+                    aba VARCHAR(255) NULL,
+                    tabela VARCHAR(255) NULL,
+                    aba_hash CHAR(64) NULL,
+                    linhas INT,
+                    bytes BIGINT,
+                    ingerido_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    KEY idx_arquivo (arquivo_hash),
+                    KEY idx_tabela (tabela, id)
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+            """)
+        finally:
+            cursor.close()
+        _tabela_verificada = True
+
+def arquivo_ingerido(conn, arquivo_hash, prefixo_tabela=""):
+    """Indica se um arquivo com este conteúdo já foi ingerido por completo nas tabelas com este prefixo."""
+    garantir_tabela(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT ingerido_em FROM `{TABELA_MANIFESTO}` "
+            f"WHERE arquivo_hash = %s AND aba IS NULL AND COALESCE(tabela, '') = %s LIMIT 1",
+            (arquivo_hash, prefixo_tabela or "")
+        )
+        registro = cursor.fetchone()
+    finally:
+        cursor.close()
+    if registro:
+        logger.info(f"Arquivo com hash {arquivo_hash[:12]} já ingerido em {registro[0]}.")
+    return registro is not None
+
+def aba_inalterada(conn, tabela, aba_hash):
+    """Indica se a última ingestão registrada para a tabela tinha exatamente este conteúdo."""
+    garantir_tabela(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT aba_hash FROM `{TABELA_MANIFESTO}` WHERE tabela = %s ORDER BY id DESC LIMIT 1",
+            (tabela,)
+        )
+        registro = cursor.fetchone()
+    finally:
+        cursor.close()
+    return registro is not None and registro[0] == aba_hash
+
+def registrar(conn, arquivo_hash, arquivo_nome, aba=None, tabela=None, aba_hash=None, linhas=None, bytes_=None):
+    """Registra a ingestão de uma aba (ou do arquivo inteiro, quando aba é None).
+
+    No registro do arquivo inteiro, tabela guarda o prefixo das tabelas gravadas (None sem
+    prefixo): a mesma planilha pode estar nas tabelas atuais e nas versionadas do backfill.
+    Não faz commit: o registro da aba entra na mesma transação dos dados dela.
+    """
+    garantir_tabela(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"INSERT INTO `{TABELA_MANIFESTO}` (arquivo_hash, arquivo_nome, aba, tabela, aba_hash, linhas, bytes) "
+            f"VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            (arquivo_hash, os.path.basename(arquivo_nome), aba, tabela, aba_hash, linhas, bytes_)
+        )
+    finally:
+        cursor.close()
@@ -0,0 +1,72 @@
+import os
+import queue
+import threading
+from cancelamento import cancel_event
+import metricas
+
+# Itens (abas ou blocos) que cada etapa do pipeline pode deixar prontos à frente da seguinte
+TAMANHO_FILA = int(os.getenv("INGEST_TAMANHO_FILA", "2"))
+
+# Intervalo para as threads perceberem o cancelamento enquanto esperam a fila
+ESPERA_FILA = 0.2
+
+_FIM = object()
+
+class _Falha:
+    def __init__(self, erro):
+        self.erro = erro
+
+def em_paralelo(iteravel, nome="etapa", funcao=None, tamanho_fila=None):
+    """Consome o iterável numa thread própria (aplicando funcao a cada item, se informada),
+    entregando os resultados por uma fila limitada.
+
+    Encadeando etapas (leitura -> limpeza -> gravação), cada uma trabalha enquanto
+    as outras esperam o banco ou o disco; a fila limitada segura a etapa mais rápida
+    (e a memória) quando a seguinte atrasa. Erros da thread são repassados a quem
+    consome, e o cancel_event (ou o fim do consumo) encerra a thread.
+    """
+    fila = queue.Queue(maxsize=tamanho_fila or TAMANHO_FILA)
+    parar = threading.Event()
+
+    def entregar(item):
+        while not (parar.is_set() or cancel_event.is_set()):
+            try:
+                fila.put(item, timeout=ESPERA_FILA)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produzir():
+        try:
+            for item in iteravel:
+                if funcao is not None:
+                    item = funcao(item)
+                if not entregar(item):
+                    return
+            entregar(_FIM)
+        except BaseException as e:
+            entregar(_Falha(e))
+        finally:
+            # Encerra também a etapa anterior (ex.: fecha a planilha aberta pela leitura)
+            if hasattr(iteravel, "close"):
+                iteravel.close()
+
+    thread = threading.Thread(target=metricas.na_execucao(produzir), name=f"pipeline-{nome}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                item = fila.get(timeout=ESPERA_FILA)
+            except queue.Empty:
+                if cancel_event.is_set():
+                    raise Exception("Cancelamento solicitado.")
+                continue
+            if item is _FIM:
+                return
+            if isinstance(item, _Falha):
+                raise item.erro
+            yield item
+    finally:
+        parar.set()
+        thread.join()
@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from database.consultas import registro_esquema
+from logging_config import logger
+
+SUFIXO_SOMBRA = "__novo"
+SUFIXO_ANTIGA = "__antigo"
+
+def nome_sombra(nome_tabela):
+    # O MySQL limita o nome da tabela a 64 caracteres
+    return f"{nome_tabela[:64 - len(SUFIXO_SOMBRA)]}{SUFIXO_SOMBRA}"
+
+def nome_antiga(nome_tabela):
+    return f"{nome_tabela[:64 - len(SUFIXO_ANTIGA)]}{SUFIXO_ANTIGA}"
+
+def descartar(conn, nome_tabela):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS `{nome_tabela}`")
+    finally:
+        cursor.close()
+    registro_esquema.esquecer(conn, nome_tabela)
+
+def preparar_sessao(conn):
+    """Ajusta a sessão para carga em massa: sem checagem de unicidade e de chaves estrangeiras a cada linha."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+    finally:
+        cursor.close()
+
+def restaurar_sessao(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET SESSION unique_checks = 1, foreign_key_checks = 1")
+    finally:
+        cursor.close()
+
+def tabela_existe(conn, nome_tabela):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (nome_tabela,)
+        )
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+def trocar_tabelas(conn, nome_tabela, sombra):
+    """Coloca a tabela sombra no lugar da atual num único RENAME TABLE (atômico para quem consulta)."""
+    antiga = nome_antiga(nome_tabela)
+    descartar(conn, antiga)
+    cursor = conn.cursor()
+    try:
+        if tabela_existe(conn, nome_tabela):
+            cursor.execute(f"RENAME TABLE `{nome_tabela}` TO `{antiga}`, `{sombra}` TO `{nome_tabela}`")
+            cursor.execute(f"DROP TABLE `{antiga}`")
+        else:
+            cursor.execute(f"RENAME TABLE `{sombra}` TO `{nome_tabela}`")
+    finally:
+        cursor.close()
+    registro_esquema.renomear(conn, sombra, nome_tabela)
+    logger.info(f"🔁 Tabela `{nome_tabela}` substituída pela versão recarregada.")
+
+@contextmanager
+def carga_na_sombra(conn, nome_tabela):
+    """Prepara a carga de nome_tabela numa tabela sombra, entregando o nome da sombra.
+
+    Se a carga falhar, a sombra é descartada e a tabela atual fica intacta.
+    """
+    sombra = nome_sombra(nome_tabela)
+    # Restos de uma recarga interrompida
+    descartar(conn, sombra)
+    preparar_sessao(conn)
+    try:
+        yield sombra
+    except Exception:
+        conn.rollback()
+        try:
+            descartar(conn, sombra)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível descartar a tabela `{sombra}`: {e}")
+        raise
+    finally:
+        restaurar_sessao(conn)
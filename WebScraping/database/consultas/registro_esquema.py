@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+from logging_config import logger
+
+# Registro das colunas de cada tabela, para criar_tabela não repetir o DDL quando nada mudou
+REGISTRO_ESQUEMA = os.getenv("DB_REGISTRO_ESQUEMA", "1") == "1"
+
+TABELA_REGISTRO = "_schema_registry"
+
+# Erro do MySQL para tabela inexistente (ER_NO_SUCH_TABLE)
+ERRO_TABELA_INEXISTENTE = 1146
+
+# {tabela: {"colunas": {coluna: DATA_TYPE}, "indices": [colunas indexadas]}}, carregado uma vez por processo
+_registros = None
+# Sem a tabela do registro no banco, o registro vale só para este processo
+_tabela_existe = False
+_lock = threading.Lock()
+
+def tipo_da_definicao(definicao):
+    """DATA_TYPE (como no information_schema) de uma definição de coluna: "VARCHAR(64) ..." -> "varchar"."""
+    return definicao.split("(")[0].split()[0].lower()
+
+def garantir_tabela(conn):
+    """Cria a tabela do registro (uma vez por processo).
+
+    Deve rodar antes da primeira transação de dados (ver garantir_tabelas_de_controle): no
+    MySQL, o CREATE TABLE confirmaria a transação em andamento.
+    """
+    global _tabela_existe
+    if not REGISTRO_ESQUEMA:
+        return
+    with _lock:
+        if _tabela_existe:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS `{TABELA_REGISTRO}` (
+                    tabela VARCHAR(64) PRIMARY KEY,
+                    colunas MEDIUMTEXT NOT NULL,
+                    indices TEXT NOT NULL,
+                    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+            """)
+        finally:
+            cursor.close()
+        _tabela_existe = True
+
+def _carregar(conn):
+    """Lê o registro do banco (uma vez por processo). Só lê: sem a tabela, começa vazio."""
+    global _registros, _tabela_existe
+    if _registros is not None:
+        return
+    cursor = conn.cursor()
+    try:
+        # Tabelas apagadas por fora desde a última execução saem do registro
+        cursor.execute(
+            f"SELECT r.tabela, r.colunas, r.indices FROM `{TABELA_REGISTRO}` r "
+            "JOIN information_schema.TABLES t ON t.TABLE_SCHEMA = DATABASE() AND t.TABLE_NAME = r.tabela"
+        )
+        linhas = cursor.fetchall()
+        _tabela_existe = True
+    except Exception as e:
+        if getattr(e, "errno", None) != ERRO_TABELA_INEXISTENTE:
+            raise
+        linhas = []
+    finally:
+        cursor.close()
+    _registros = {
+        tabela: {"colunas": json.loads(colunas), "indices": json.loads(indices)}
+        for tabela, colunas, indices in linhas
+    }
+    logger.debug("Registro de esquema carregado com %d tabelas.", len(_registros))
+
+def consultar(conn, nome_tabela):
+    """Colunas e índices registrados para a tabela (cópia), ou None se ela não está no registro."""
+    if not REGISTRO_ESQUEMA:
+        return None
+    with _lock:
+        _carregar(conn)
+        registro = _registros.get(nome_tabela)
+        if registro is None:
+            return None
+        return {"colunas": dict(registro["colunas"]), "indices": list(registro["indices"])}
+
+def gravar(conn, nome_tabela, colunas=None, indices=None):
+    """Atualiza o registro da tabela (só os campos informados). Não faz commit."""
+    if not REGISTRO_ESQUEMA:
+        return
+    with _lock:
+        _carregar(conn)
+        registro = _registros.get(nome_tabela, {"colunas": {}, "indices": []})
+        registro = {
+            "colunas": dict(registro["colunas"] if colunas is None else colunas),
+            "indices": list(registro["indices"] if indices is None else indices),
+        }
+        if _tabela_existe:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"REPLACE INTO `{TABELA_REGISTRO}` (tabela, colunas, indices) VALUES (%s, %s, %s)",
+                    (nome_tabela, json.dumps(registro["colunas"], ensure_ascii=False), json.dumps(registro["indices"], ensure_ascii=False))
+                )
+            finally:
+                cursor.close()
+        _registros[nome_tabela] = registro
+
+def esquecer(conn, nome_tabela):
+    """Remove a tabela do registro (ao apagá-la). Não faz commit."""
+    if not REGISTRO_ESQUEMA:
+        return
+    with _lock:
+        _carregar(conn)
+        if _tabela_existe:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"DELETE FROM `{TABELA_REGISTRO}` WHERE tabela = %s", (nome_tabela,))
+            finally:
+                cursor.close()
+        _registros.pop(nome_tabela, None)
+
+def renomear(conn, origem, destino):
+    """Passa o registro de origem para destino (após um RENAME TABLE). Não faz commit."""
+    registro = consultar(conn, origem)
+    esquecer(conn, origem)
+    if registro is None:
+        esquecer(conn, destino)
+    else:
+        gravar(conn, destino, registro["colunas"], registro["indices"])
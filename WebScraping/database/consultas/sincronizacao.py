@@ -0,0 +1,167 @@
+import hashlib
+import os
+from logging_config import logger
+
+# Colunas de controle adicionadas às tabelas sincronizadas
+COLUNA_CHAVE = "_chave"
+COLUNA_HASH = "_hash"
+COLUNA_REMOVIDO = "_removido_em"
+
+# Linhas por comando na sincronização (upserts e marcações de remoção)
+TAMANHO_LOTE_SINCRONIZACAO = int(os.getenv("DB_TAMANHO_LOTE", "500"))
+
+def ler_colunas_chave(valor=None):
+    """Lê as colunas-chave por tabela no formato "tabela:col1,col2;outra_tabela:col"."""
+    valor = os.getenv("INGEST_CHAVES", "") if valor is None else valor
+    chaves = {}
+    for item in filter(None, (parte.strip() for parte in valor.split(";"))):
+        tabela, _, colunas = item.partition(":")
+        chaves[tabela.strip()] = [c.strip() for c in colunas.split(",") if c.strip()]
+    return chaves
+
+# Colunas que identificam uma linha em cada tabela; sem chave, a identidade é o conteúdo da linha
+COLUNAS_CHAVE = ler_colunas_chave()
+
+# Representa NULL (células vazias de colunas tipadas) no hash, para não se confundir com texto vazio
+VALOR_NULO = "\x00"
+
+def _sha256(valores):
+    return hashlib.sha256("\x1f".join(valores).encode("utf-8", "surrogatepass")).hexdigest()
+
+def hash_aba(hashes_linhas):
+    """Hash estável de uma aba inteira a partir dos hashes das suas linhas, na ordem."""
+    return _sha256(hashes_linhas)
+
+class SincronizacaoTabela:
+    """Sincroniza as linhas de uma aba com a tabela, gravando apenas o que mudou.
+
+    Cada linha recebe um hash do conteúdo (_hash) e uma chave estável (_chave):
+    o hash das colunas-chave configuradas ou, sem chave, o próprio hash do
+    conteúdo com o número da ocorrência (para linhas repetidas). Linhas novas ou
+    alteradas entram com INSERT ... ON DUPLICATE KEY UPDATE em lotes, e linhas que
+    sumiram da planilha são marcadas em _removido_em em vez de apagadas.
+    """
+
+    def __init__(self, conn, nome_tabela, colunas_chave=None):
+        self.conn = conn
+        self.nome_tabela = nome_tabela
+        self.colunas_chave = colunas_chave if colunas_chave is not None else COLUNAS_CHAVE.get(nome_tabela, [])
+        self.existentes = None
+        self.vistas = set()
+        self.ocorrencias = {}
+        self.hashes_linhas = []
+        self.gravadas = 0
+
+    def preparar_tabela(self):
+        """Adiciona as colunas de controle à tabela, se ainda não existirem."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                (self.nome_tabela,)
+            )
+            colunas = {linha[0] for linha in cursor.fetchall()}
+            alteracoes = []
+            if COLUNA_CHAVE not in colunas:
+                alteracoes += [f"ADD COLUMN `{COLUNA_CHAVE}` CHAR(64) NULL", f"ADD UNIQUE KEY `uk{COLUNA_CHAVE}` (`{COLUNA_CHAVE}`)"]
+            if COLUNA_HASH not in colunas:
+                alteracoes.append(f"ADD COLUMN `{COLUNA_HASH}` CHAR(64) NULL")
+            if COLUNA_REMOVIDO not in colunas:
+                alteracoes.append(f"ADD COLUMN `{COLUNA_REMOVIDO}` DATETIME NULL")
+            if alteracoes:
+                logger.info(f"Adicionando colunas de sincronização à tabela `{self.nome_tabela}`...")
+                cursor.execute(f"ALTER TABLE `{self.nome_tabela}` {', '.join(alteracoes)}")
+        finally:
+            cursor.close()
+
+    def carregar_estado(self):
+        """Lê chave, hash e situação (removida ou não) de todas as linhas já gravadas."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT `{COLUNA_CHAVE}`, `{COLUNA_HASH}`, `{COLUNA_REMOVIDO}` IS NOT NULL "
+                f"FROM `{self.nome_tabela}` WHERE `{COLUNA_CHAVE}` IS NOT NULL"
+            )
+            self.existentes = {chave: (hash_linha, bool(removida)) for chave, hash_linha, removida in cursor.fetchall()}
+        finally:
+            cursor.close()
+        logger.debug(f"{len(self.existentes)} linhas já sincronizadas em `{self.nome_tabela}`.")
+
+    def _chave_e_hash(self, indices_chave, linha):
+        hash_linha = _sha256(linha)
+        if indices_chave:
+            base = _sha256([linha[i] for i in indices_chave])
+        else:
+            base = hash_linha
+        ocorrencia = self.ocorrencias.get(base, 0)
+        self.ocorrencias[base] = ocorrencia + 1
+        chave = base if ocorrencia == 0 else _sha256([base, str(ocorrencia)])
+        return chave, hash_linha
+
+    def aplicar(self, df):
+        """Grava as linhas novas ou alteradas do bloco (pode ser chamado várias vezes por aba)."""
+        if self.existentes is None:
+            self.preparar_tabela()
+            self.carregar_estado()
+        colunas = [str(c) for c in df.columns]
+        faltando = [c for c in self.colunas_chave if c not in colunas]
+        if faltando:
+            logger.warning(f"⚠️ Colunas-chave {faltando} não existem em `{self.nome_tabela}`, usando o conteúdo da linha como chave.")
+            self.colunas_chave = []
+        indices_chave = [colunas.index(c) for c in self.colunas_chave]
+        # Importado aqui: o esquema importa ler_colunas_chave deste módulo
+        from database.consultas import esquema
+        pendentes = []
+        # Mesmos valores do INSERT comum: vazio vira NULL nas colunas tipadas (ver esquema.converter_valores)
+        for linha in esquema.linhas_para_gravar(df):
+            texto = tuple(VALOR_NULO if v is None else str(v) for v in linha)
+            chave, hash_linha = self._chave_e_hash(indices_chave, texto)
+            self.vistas.add(chave)
+            self.hashes_linhas.append(hash_linha)
+            if self.existentes.get(chave) != (hash_linha, False):
+                pendentes.append(linha + (chave, hash_linha))
+
+        if not pendentes:
+            return 0
+        nomes = ", ".join(f"`{c}`" for c in list(df.columns) + [COLUNA_CHAVE, COLUNA_HASH])
+        valores = ", ".join(["%s"] * (len(df.columns) + 2))
+        atualizacoes = ", ".join(f"`{c}` = VALUES(`{c}`)" for c in list(df.columns) + [COLUNA_HASH])
+        query = (
+            f"INSERT INTO `{self.nome_tabela}` ({nomes}) VALUES ({valores}) "
+            f"ON DUPLICATE KEY UPDATE {atualizacoes}, `{COLUNA_REMOVIDO}` = NULL"
+        )
+        cursor = self.conn.cursor()
+        try:
+            for inicio in range(0, len(pendentes), TAMANHO_LOTE_SINCRONIZACAO):
+                cursor.executemany(query, pendentes[inicio:inicio + TAMANHO_LOTE_SINCRONIZACAO])
+        finally:
+            cursor.close()
+        self.gravadas += len(pendentes)
+        return len(pendentes)
+
+    def finalizar(self):
+        """Marca como removidas as linhas que não apareceram na planilha e retorna o hash da aba."""
+        removidas = [chave for chave, (_, removida) in self.existentes.items()
+                     if not removida and chave not in self.vistas] if self.existentes else []
+        cursor = self.conn.cursor()
+        try:
+            for inicio in range(0, len(removidas), TAMANHO_LOTE_SINCRONIZACAO):
+                lote = removidas[inicio:inicio + TAMANHO_LOTE_SINCRONIZACAO]
+                cursor.execute(
+                    f"UPDATE `{self.nome_tabela}` SET `{COLUNA_REMOVIDO}` = NOW() "
+                    f"WHERE `{COLUNA_CHAVE}` IN ({', '.join(['%s'] * len(lote))})",
+                    tuple(lote)
+                )
+            # Linhas gravadas antes da sincronização (sem chave) são acúmulos de execuções anteriores
+            cursor.execute(
+                f"UPDATE `{self.nome_tabela}` SET `{COLUNA_REMOVIDO}` = NOW() "
+                f"WHERE `{COLUNA_CHAVE}` IS NULL AND `{COLUNA_REMOVIDO}` IS NULL"
+            )
+        finally:
+            cursor.close()
+        logger.info(
+            f"🔄 Tabela `{self.nome_tabela}` sincronizada: {self.gravadas} linhas novas/alteradas, "
+            f"{len(removidas)} removidas, {len(self.vistas) - self.gravadas} inalteradas."
+        )
+        return hash_aba(self.hashes_linhas)
@@ -0,0 +1,226 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+from logging_config import logger
+
+# Página que contém o link da planilha
+URL_PAGINA = "https://www.epa.gov/water-research/uev-library#access"
+
+# Link resolvido e validadores HTTP (ETag/Last-Modified) do último download
+ARQUIVO_ESTADO = os.path.join("cache", "download_http.json")
+
+# Cabeçalho de navegador, alguns servidores recusam o User-Agent padrão do urllib
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+TIMEOUT_HTTP = 30
+
+# Intervalo mínimo (segundos) entre requisições ao mesmo host, somando todas as threads
+INTERVALO_POR_HOST = float(os.getenv("DOWNLOAD_INTERVALO_POR_HOST", "0"))
+
+class LimitadorHosts:
+    """Espaça as requisições a um mesmo host, mesmo vindas de fontes baixadas em paralelo."""
+
+    def __init__(self, intervalo=INTERVALO_POR_HOST):
+        self.intervalo = intervalo
+        self._proxima = {}
+        self._lock = threading.Lock()
+
+    def aguardar(self, url):
+        if self.intervalo <= 0:
+            return
+        host = urlsplit(url).hostname
+        with self._lock:
+            agora = time.monotonic()
+            # Reserva o próximo horário livre do host antes de dormir, para as threads não colidirem
+            horario = max(agora, self._proxima.get(host, 0.0))
+            self._proxima[host] = horario + self.intervalo
+        if horario > agora:
+            logger.debug("Aguardando %.2fs para acessar %s de novo...", horario - agora, host)
+            time.sleep(horario - agora)
+
+limitador_hosts = LimitadorHosts()
+
+class _LinksPlanilha(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href") or ""
+            if href.lower().split("?")[0].endswith((".xlsx", ".xls")):
+                self.links.append(href)
+
+def _requisicao(url, cabecalhos=None):
+    cabecalhos = dict(cabecalhos or {})
+    cabecalhos.setdefault("User-Agent", USER_AGENT)
+    return urllib.request.Request(url, headers=cabecalhos)
+
+def carregar_estado(arquivo_estado=ARQUIVO_ESTADO):
+    try:
+        with open(arquivo_estado, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def salvar_estado(estado, arquivo_estado=ARQUIVO_ESTADO):
+    os.makedirs(os.path.dirname(arquivo_estado) or ".", exist_ok=True)
+    with open(arquivo_estado, "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=2)
+
+def guardar_link(url_pagina, link, arquivo_estado=ARQUIVO_ESTADO):
+    """Guarda o link da planilha (por exemplo, o encontrado pelo Selenium) para os próximos downloads."""
+    estado = carregar_estado(arquivo_estado)
+    if estado.get("link") != link:
+        estado = {"url_pagina": url_pagina, "link": link}
+        salvar_estado(estado, arquivo_estado)
+
+def resolver_link(url_pagina=URL_PAGINA):
+    """Baixa o HTML da página e retorna o primeiro link para uma planilha .xlsx/.xls."""
+    logger.info(f"🔗 Procurando o link da planilha no HTML de {url_pagina}...")
+    limitador_hosts.aguardar(url_pagina)
+    with urllib.request.urlopen(_requisicao(url_pagina), timeout=TIMEOUT_HTTP) as resposta:
+        charset = resposta.headers.get_content_charset() or "utf-8"
+        html = resposta.read().decode(charset, errors="replace")
+    parser = _LinksPlanilha()
+    parser.feed(html)
+    if not parser.links:
+        raise Exception(f"Nenhum link de planilha encontrado em {url_pagina}.")
+    link = urljoin(url_pagina, parser.links[0])
+    logger.debug(f"Links de planilha encontrados: {parser.links}")
+    return link
+
+def baixar_via_http(url_pagina=URL_PAGINA, condicional=True, arquivo_estado=ARQUIVO_ESTADO):
+    """Baixa a planilha por HTTP, sem navegador.
+
+    Usa o link guardado do último download (ou o resolve pelo HTML da página) e
+    envia If-None-Match/If-Modified-Since quando condicional=True. Retorna o
+    caminho de um arquivo temporário com a planilha nova, ou None se o servidor
+    respondeu 304 (arquivo não mudou). Erros são propagados para o chamador
+    poder recorrer ao Selenium.
+    """
+    estado = carregar_estado(arquivo_estado)
+    if estado.get("url_pagina") != url_pagina:
+        estado = {"url_pagina": url_pagina}
+
+    for tentativa in range(2):
+        link = estado.get("link") or resolver_link(url_pagina)
+        cabecalhos = {}
+        if condicional and estado.get("link") == link:
+            if estado.get("etag"):
+                cabecalhos["If-None-Match"] = estado["etag"]
+            if estado.get("last_modified"):
+                cabecalhos["If-Modified-Since"] = estado["last_modified"]
+        logger.info(f"🌐 Baixando planilha via HTTP: {link}")
+        limitador_hosts.aguardar(link)
+        try:
+            resposta = urllib.request.urlopen(_requisicao(link, cabecalhos), timeout=TIMEOUT_HTTP)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                logger.info("📦 A planilha não mudou desde o último download (HTTP 304).")
+                return None
+            if e.code in (404, 410) and tentativa == 0 and estado.get("link"):
+                # O link guardado pode ter mudado no site: resolve de novo pela página
+                logger.warning(f"⚠️ Link guardado respondeu {e.code}, procurando o link novamente...")
+                estado = {"url_pagina": url_pagina}
+                continue
+            raise
+        break
+
+    with resposta:
+        fd, caminho_temporario = tempfile.mkstemp(prefix="download_", suffix=".xlsx")
+        tamanho = 0
+        with os.fdopen(fd, "wb") as destino:
+            # Grava em blocos, sem manter o arquivo inteiro na memória
+            while True:
+                bloco = resposta.read(1024 * 1024)
+                if not bloco:
+                    break
+                destino.write(bloco)
+                tamanho += len(bloco)
+        estado.update({
+            "link": link,
+            "etag": resposta.headers.get("ETag"),
+            "last_modified": resposta.headers.get("Last-Modified"),
+        })
+
+    with open(caminho_temporario, "rb") as f:
+        # .xlsx é um ZIP (PK) e .xls é um documento OLE2
+        if f.read(4) not in (b"PK\x03\x04", b"\xd0\xcf\x11\xe0"):
+            os.remove(caminho_temporario)
+            raise Exception(f"O conteúdo baixado de {link} não é uma planilha.")
+    salvar_estado(estado, arquivo_estado)
+    logger.info(f"📥 Planilha baixada via HTTP ({tamanho} bytes).")
+    return caminho_temporario
+
+def servir_localmente(diretorio, nome_planilha):
+    """Sobe um servidor HTTP local com uma página de teste que aponta para a planilha.
+
+    O servidor responde ETag/If-None-Match e If-Modified-Since, como um servidor real.
+    Retorna (servidor, url_pagina); encerre com servidor.shutdown().
+    """
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manipulador(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.startswith("/pagina.html"):
+                corpo = f'<html><body><main><a href="/{nome_planilha}">UEV Library</a></main></body></html>'.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+                return
+            caminho = self.translate_path(self.path)
+            if os.path.isfile(caminho):
+                etag = f'"{os.stat(caminho).st_mtime_ns:x}-{os.path.getsize(caminho):x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._etag = etag
+            super().do_GET()
+
+        def end_headers(self):
+            if getattr(self, "_etag", None):
+                self.send_header("ETag", self._etag)
+            super().end_headers()
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), partial(Manipulador, directory=diretorio))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/pagina.html"
+
+
+if __name__ == "__main__":
+    # Teste contra um servidor local que serve a planilha da pasta download:
+    #   python downloader.py
+    planilhas = [f for f in os.listdir("download") if f.endswith(".xlsx")] if os.path.isdir("download") else []
+    if not planilhas:
+        print("Nenhuma planilha em download/ para servir.")
+        sys.exit(1)
+    servidor, url = servir_localmente(os.path.abspath("download"), planilhas[0])
+    estado_teste = os.path.join(tempfile.mkdtemp(), "estado.json")
+    try:
+        primeiro = baixar_via_http(url, arquivo_estado=estado_teste)
+        segundo = baixar_via_http(url, arquivo_estado=estado_teste)
+        iguais = primeiro and open(primeiro, "rb").read() == open(os.path.join("download", planilhas[0]), "rb").read()
+        print(f"Primeiro download: {'ok' if iguais else 'FALHOU'}; segundo download: {'304 ok' if segundo is None else 'FALHOU'}")
+        if primeiro:
+            os.remove(primeiro)
+        sys.exit(0 if iguais and segundo is None else 1)
+    finally:
+        servidor.shutdown()
+        shutil.rmtree(os.path.dirname(estado_teste), ignore_errors=True)
@@ -0,0 +1,63 @@
+import os
+import re
+from logging_config import logger
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11
+    import tomli as tomllib
+
+# Cadastro das fontes de planilhas usadas pelo agendador
+ARQUIVO_FONTES = os.getenv("FONTES_ARQUIVO", "fontes.toml")
+
+# Cada fonte baixa a planilha na própria pasta, dentro desta
+DIRETORIO_FONTES = os.getenv("FONTES_DIRETORIO", "downloads")
+
+# Link de planilha (.xlsx/.xls) usado quando a fonte não informa o XPath
+XPATH_PADRAO = '//a[contains(@href, ".xlsx") or contains(@href, ".xls")]'
+
+class Fonte:
+    """Uma página com o link de uma planilha e as tabelas em que ela é gravada."""
+
+    def __init__(self, nome, url, xpath=None, prefixo_tabela="", intervalo_minutos=1440, diretorio=None,
+                 arquivo_estado=None):
+        self.nome = nome
+        self.url = url
+        self.xpath = xpath or XPATH_PADRAO
+        self.prefixo_tabela = prefixo_tabela
+        self.intervalo_minutos = intervalo_minutos
+        self.diretorio = diretorio or os.path.join(DIRETORIO_FONTES, nome)
+        # Link e validadores HTTP do último download, separados por fonte
+        self.arquivo_estado = arquivo_estado or os.path.join("cache", f"download_http_{nome}.json")
+
+    def __repr__(self):
+        return f"Fonte({self.nome!r}, {self.url!r})"
+
+def carregar_fontes(caminho=ARQUIVO_FONTES):
+    """Lê o arquivo TOML de fontes.
+
+    Retorna (configuração do [agendador], lista de Fonte). Erros de cadastro
+    (nome repetido ou inválido, fonte sem URL) geram ValueError.
+    """
+    with open(caminho, "rb") as arquivo:
+        dados = tomllib.load(arquivo)
+    fontes, nomes = [], set()
+    for indice, item in enumerate(dados.get("fonte", []), start=1):
+        nome, url = item.get("nome"), item.get("url")
+        if not nome or not re.fullmatch(r"[0-9a-zA-Z_-]+", nome):
+            raise ValueError(f"Fonte {indice} de {caminho}: nome ausente ou inválido ({nome!r}).")
+        if nome in nomes:
+            raise ValueError(f"Fonte {nome} cadastrada mais de uma vez em {caminho}.")
+        if not url:
+            raise ValueError(f"Fonte {nome} de {caminho} sem url.")
+        nomes.add(nome)
+        fontes.append(Fonte(
+            nome, url,
+            xpath=item.get("xpath"),
+            prefixo_tabela=item.get("prefixo_tabela", ""),
+            intervalo_minutos=float(item.get("intervalo_minutos", 1440)),
+            diretorio=item.get("diretorio"),
+        ))
+    logger.info(f"📚 {len(fontes)} fontes carregadas de {caminho}.")
+    return dados.get("agendador", {}), fontes
@@ -1,34 +1,24 @@
+import atexit
+import copy
 import logging
 import os
-import tkinter as tk
-from colorama import init
+import queue
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Inicializar colorama para cores no console
-init()
+if os.name == "nt":
+    # Cores ANSI no console do Windows (nos outros sistemas o terminal já as interpreta)
+    from colorama import init
+    init()
 
 # Configurar diretórios e arquivos de log
 LOG_DIR = "logs"
 LOG_FILE = os.path.join(LOG_DIR, "automation_log.log")
 os.makedirs(LOG_DIR, exist_ok=True)
 
-# Verificar e corrigir permissões do diretório e arquivo
-if not os.access(LOG_DIR, os.W_OK):
-    print(f"Erro: Sem permissão de escrita no diretório {LOG_DIR}. Tentando ajustar...")
-    try:
-        os.chmod(LOG_DIR, 0o775)  # Tenta ajustar permissões
-        print(f"Permissões ajustadas para {LOG_DIR}.")
-    except PermissionError:
-        print(f"Erro: Não foi possível ajustar as permissões de {LOG_DIR}. Execute como administrador ou ajuste manualmente.")
-else:
-    print(f"Permissões de escrita confirmadas para {LOG_DIR}.")
-
-# Testar escrita no arquivo manualmente
-try:
-    with open(LOG_FILE, 'w', encoding='utf-8') as f:
-        f.write("Teste inicial de escrita no arquivo de log.\n")
-    print(f"Teste de escrita bem-sucedido: {LOG_FILE} foi criado ou sobrescrito.")
-except Exception as e:
-    print(f"Erro ao testar escrita no arquivo {LOG_FILE}: {e}")
+# O arquivo de log é rotacionado ao passar deste tamanho, mantendo LOG_BACKUPS arquivos anteriores
+LOG_TAMANHO_MAXIMO = int(float(os.getenv("LOG_TAMANHO_MAXIMO_MB", "5")) * 1024 * 1024)
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "3"))
 
 # Criar um logger personalizado
 logger = logging.getLogger(__name__)
@@ -37,15 +27,19 @@ logger.setLevel(logging.DEBUG)  # Garante que o logger aceite logs de nível DEB
 # Evitar propagação para o logger raiz
 logger.propagate = False
 
-# Configurar o FileHandler
-file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8', mode='w')
+# Intervalo (ms) entre as atualizações da área de logs da interface e máximo de linhas mantidas nela
+INTERVALO_INTERFACE_MS = int(os.getenv("LOG_INTERVALO_INTERFACE_MS", "100"))
+MAX_LINHAS_INTERFACE = int(os.getenv("LOG_MAX_LINHAS_INTERFACE", "5000"))
+
+# Configurar o FileHandler (acrescenta ao arquivo, que só é aberto no primeiro registro)
+file_handler = RotatingFileHandler(LOG_FILE, encoding='utf-8', maxBytes=LOG_TAMANHO_MAXIMO,
+                                   backupCount=LOG_BACKUPS, delay=True)
 file_handler.setLevel(logging.DEBUG)
 file_formatter = logging.Formatter(
     fmt='%(asctime)s | %(levelname)s | %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
 
 # Adicionar emojis e cores ao console
 class ColoredFormatter(logging.Formatter):
@@ -76,13 +70,42 @@ class ColoredFormatter(logging.Formatter):
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.DEBUG)  # Console mostra DEBUG e acima
 console_handler.setFormatter(ColoredFormatter())
-logger.addHandler(console_handler)
+
+class FilaHandler(QueueHandler):
+    """Enfileira uma cópia do registro com a mensagem já resolvida (msg % args).
+
+    Como no QueueHandler.prepare, os args e o traceback são convertidos em texto agora: um
+    dict ou lista alterado depois da chamada ao logger não muda a mensagem registrada. Só a
+    formatação de cada handler (data, nível, cores) fica para a thread do QueueListener.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # O traceback precisa ser gerado agora, enquanto ainda existe
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+# Quem chama o logger apenas enfileira; arquivo, console e interface são escritos pela thread do listener
+fila_logs = queue.SimpleQueue()
+logger.addHandler(FilaHandler(fila_logs))
+listener = QueueListener(fila_logs, file_handler, console_handler, respect_handler_level=True)
+listener.start()
+# Garante que os registros pendentes cheguem ao arquivo ao encerrar o programa
+atexit.register(listener.stop)
 
 # Handler personalizado para a interface
 class InterfaceHandler(logging.Handler):
+    """Guarda as mensagens para a interface; elas são inseridas em lote pela thread do Tk (ver drenar)."""
+
     def __init__(self, log_text):
         super().__init__()
         self.log_text = log_text
+        self.pendentes = deque()
         self.setLevel(logging.INFO)  # Interface mostra apenas INFO e acima
         self.formatter = logging.Formatter(
             fmt='%(asctime)s | %(levelname)s | %(message)s',
@@ -99,19 +122,45 @@ class InterfaceHandler(logging.Handler):
                 'ERROR': 'error',
                 'SUCCESS': 'success'
             }.get(record.levelname, 'info')
-            # Exibir diretamente na interface
-            if self.log_text is not None:
+            # O Tk só pode ser usado na thread principal: aqui apenas guarda a mensagem
+            self.pendentes.append((msg + "\n", tag))
+        except Exception as e:
+            print(f"Erro no InterfaceHandler: {e}")
+
+    def drenar(self):
+        """Insere as mensagens pendentes de uma vez e se reagenda com Tk.after (thread principal)."""
+        if self.log_text is None:
+            return
+        import tkinter as tk
+        try:
+            if self.pendentes:
+                trechos = []
+                while self.pendentes:
+                    trechos.extend(self.pendentes.popleft())
                 self.log_text.config(state=tk.NORMAL)
-                self.log_text.insert(tk.END, msg + "\n", tag)
+                # Um único insert com pares (texto, tag) para o lote inteiro
+                self.log_text.insert(tk.END, *trechos)
+                excedentes = int(self.log_text.index("end-1c").split(".")[0]) - MAX_LINHAS_INTERFACE
+                if excedentes > 0:
+                    self.log_text.delete("1.0", f"{excedentes + 1}.0")
                 self.log_text.config(state=tk.DISABLED)
                 self.log_text.yview(tk.END)
         except Exception as e:
             print(f"Erro no InterfaceHandler: {e}")
+        self.log_text.after(INTERVALO_INTERFACE_MS, self.drenar)
 
-# Função para configurar o logger com o handler da interface
+# Função para configurar o logger com o handler da interface (chamar na thread do Tk)
 def setup_logger(log_text):
+    # A interface mostra só a sessão atual no "Gerar Logs": o log anterior vai para automation_log.log.1
+    file_handler.acquire()
+    try:
+        if os.path.exists(LOG_FILE) and os.path.getsize(LOG_FILE) > 0:
+            file_handler.doRollover()
+    finally:
+        file_handler.release()
     interface_handler = InterfaceHandler(log_text)
-    logger.addHandler(interface_handler)
+    listener.handlers = listener.handlers + (interface_handler,)
+    interface_handler.drenar()
     return logger
 
 # Função para exibir logs na interface (usada diretamente em alguns casos)
@@ -125,13 +174,8 @@ def log_to_interface(message, tag="info", log_text=None):
     }
     level = level_map.get(tag, logging.INFO)
     
-    # Registra a mensagem usando o logger
+    # Registra a mensagem usando o logger (o arquivo é escrito pela thread do listener)
     logger.log(level, message)
-    
-    # Forçar o flush do FileHandler
-    for handler in logger.handlers:
-        if isinstance(handler, logging.FileHandler):
-            handler.flush()
 
 # Adicionar log para confirmar que o FileHandler foi configurado
 logger.info(f"FileHandler configurado para escrever em {LOG_FILE}.")
@@ -1,43 +1,55 @@
+import argparse
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from logging_config import logger
-from database.consultas.insert import inserir_dados
+# O cancel_event é compartilhado com a inserção no banco para interromper também essa etapa
+from cancelamento import cancel_event
+from database.consultas import manifesto
+from downloader import ARQUIVO_ESTADO, URL_PAGINA, baixar_via_http, guardar_link, limitador_hosts
+from fontes import Fonte
+from monitor_download import esperar_planilha
+import metricas
+import snapshots
 import os
 import time
 import shutil
-from threading import Event
 
-# Variável de cancelamento
-cancel_event = Event()
+# Tenta primeiro o download direto por HTTP; o Chrome só é aberto se ele falhar
+DOWNLOAD_VIA_HTTP = os.getenv("DOWNLOAD_VIA_HTTP", "1") == "1"
+
+# Fonte da execução pela interface: a planilha do EPA na pasta download
+FONTE_PADRAO = Fonte(
+    "uev_library", URL_PAGINA,
+    xpath='//*[@id="main"]/div/div[1]/div[2]/div[1]/article/div[2]/div/p[11]/span[2]/a',
+    diretorio="download", arquivo_estado=ARQUIVO_ESTADO,
+)
 
 def is_file_in_use(file_path):
     """Verifica se o arquivo está em uso por outro processo."""
-    logger.debug(f"Verificando se o arquivo {file_path} está em uso...")
+    logger.debug("Verificando se o arquivo %s está em uso...", file_path)
     try:
         # Tenta renomear o arquivo para si mesmo como uma verificação mais robusta
         os.rename(file_path, file_path)
-        logger.debug(f"Arquivo {file_path} está livre para uso.")
+        logger.debug("Arquivo %s está livre para uso.", file_path)
         return False
     except (IOError, OSError):
-        logger.debug(f"Arquivo {file_path} está em uso por outro processo.")
+        logger.debug("Arquivo %s está em uso por outro processo.", file_path)
         return True
 
 def wait_until_file_is_free(file_path, max_attempts=60, wait_interval=5):
     """Aguarda até que o arquivo não esteja mais em uso."""
+    # Verifica de novo logo em seguida e espaça as tentativas aos poucos (até wait_interval),
+    # sem passar do tempo total de max_attempts * wait_interval
+    limite = time.monotonic() + max_attempts * wait_interval
+    intervalo = 0.01
     attempts = 0
-    while is_file_in_use(file_path) and attempts < max_attempts:
-        logger.info(f"Aguardando o arquivo {file_path} ser liberado... (Tentativa {attempts + 1}/{max_attempts})")
-        time.sleep(wait_interval)
+    while is_file_in_use(file_path):
+        if time.monotonic() >= limite:
+            logger.error(f"❌ Não foi possível liberar o arquivo {file_path} após {attempts} tentativas.")
+            raise Exception(f"Arquivo {file_path} ainda está em uso após {attempts} tentativas.")
         attempts += 1
-    if attempts >= max_attempts:
-        logger.error(f"❌ Não foi possível liberar o arquivo {file_path} após {max_attempts} tentativas.")
-        raise Exception(f"Arquivo {file_path} ainda está em uso após {max_attempts} tentativas.")
+        logger.info("Aguardando o arquivo %s ser liberado... (Tentativa %d)", file_path, attempts)
+        time.sleep(min(intervalo, max(limite - time.monotonic(), 0)))
+        intervalo = min(intervalo * 2, wait_interval)
 
 def clean_download_directory(download_dir):
     """Remove todos os arquivos no diretório de download."""
@@ -46,10 +58,14 @@ def clean_download_directory(download_dir):
     for file in os.listdir(download_dir):
         file_path = os.path.join(download_dir, file)
         try:
-            logger.debug(f"Tentando remover arquivo: {file_path}")
-            wait_until_file_is_free(file_path)
-            os.remove(file_path)
-            logger.info(f"🗑️ Arquivo {file_path} removido.")
+            logger.debug("Tentando remover arquivo: %s", file_path)
+            try:
+                os.remove(file_path)
+            except PermissionError:
+                # Arquivo ainda aberto por outro processo (no Windows): espera liberar e tenta de novo
+                wait_until_file_is_free(file_path)
+                os.remove(file_path)
+            logger.info("🗑️ Arquivo %s removido.", file_path)
         except Exception as e:
             logger.error(f"❌ Erro ao remover arquivo {file_path}: {e}")
             raise
@@ -57,124 +73,166 @@ def clean_download_directory(download_dir):
 
 def wait_for_download(download_dir, initial_files, timeout=60):
     """Aguarda até que o download seja concluído e o arquivo .xlsx ou .xls esteja presente."""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        current_files = set(os.listdir(download_dir))
-        new_files = current_files - initial_files
-        for file in new_files:
-            if file.endswith((".xlsx", ".xls")) and not file.endswith(".crdownload"):
-                return os.path.join(download_dir, file)
-        # Verifica se há arquivos temporários (.crdownload) e aguarda
-        if any(file.endswith(".crdownload") for file in current_files):
-            logger.debug("Arquivo temporário (.crdownload) detectado, aguardando conclusão do download...")
-        time.sleep(1)
-    raise Exception(f"Timeout: Nenhum arquivo .xlsx ou .xls foi baixado após {timeout} segundos.")
-
-def main():
+    # Eventos do sistema de arquivos (inotify) em vez de listar o diretório a cada segundo
+    downloaded_file = esperar_planilha(download_dir, initial_files, timeout=timeout)
+    if downloaded_file is None:
+        raise Exception(f"Timeout: Nenhum arquivo .xlsx ou .xls foi baixado após {timeout} segundos.")
+    return downloaded_file
+
+def renomear_arquivo_baixado(downloaded_file, download_dir):
+    """Move o arquivo baixado para o diretório de download como dados_emergy_<data e hora>.xlsx."""
+    # Gera o nome do arquivo com a data e hora atual
+    timestamp = datetime.now().strftime('%d-%m-%Y_%H-%M-%S')
+    new_filename = f"dados_emergy_{timestamp}.xlsx"
+    new_path = os.path.join(download_dir, new_filename)
+
+    # Log para confirmar o nome gerado
+    logger.debug(f"Nome do arquivo gerado: {new_filename}")
+
+    # Renomeia o arquivo baixado
     try:
-        logger.info("=== Início da Automação ===")
-        logger.info("--- Início do Web Scraping ---")
-        logger.info("Configurando opções do Chrome...")
-        options = Options()
-        options.add_argument("--ignore-certificate-errors")
-        options.add_argument("--disable-popup-blocking")
-        options.add_argument("--start-maximized")
-        options.add_argument('--disable-extensions')
-        options.add_argument("--headless")  # Modo headless para não abrir janela
-        logger.debug("Opções do Chrome configuradas: ignore-certificate-errors, disable-popup-blocking, start-maximized, disable-extensions, headless.")
-
-        # Configura o diretório de download
-        download_dir = r"download"
-        if not os.path.exists(download_dir):
-            os.makedirs(download_dir)
-            logger.info(f"📁 Diretório '{download_dir}' criado.")
-        else:
-            logger.info(f"📁 Diretório '{download_dir}' já existe.")
-
-        # Limpa o diretório de download antes de iniciar o download
-        clean_download_directory(download_dir)
+        logger.debug(f"Renomeando {downloaded_file} para {new_path}")
+        shutil.move(downloaded_file, new_path)
+        logger.info(f"📥 Arquivo baixado e renomeado para: {new_path}")
+    except Exception as e:
+        logger.error(f"❌ Erro ao renomear o arquivo {downloaded_file} para {new_path}: {e}")
+        raise
+    return new_path
 
-        prefs = {
-            "download.default_directory": os.path.abspath(download_dir),
-            "download.prompt_for_download": False,
-            "directory_upgrade": True,
-            "safebrowsing.enabled": True
-        }
-        options.add_experimental_option("prefs", prefs)
-        logger.debug(f"Configurações de download definidas: {prefs}")
+def baixar_via_selenium(download_dir, url, link_xpath=FONTE_PADRAO.xpath, arquivo_estado=ARQUIVO_ESTADO):
+    """Baixa a planilha clicando no link da página com o Chrome. Retorna None se cancelado."""
+    # O Selenium só é carregado quando o navegador é realmente necessário
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    import navegador
 
-        # Configura o driver do navegador
-        logger.info("Inicializando o ChromeDriver...")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        logger.debug("ChromeDriver inicializado com sucesso.")
+    # Limpa o diretório de download antes de iniciar o download
+    clean_download_directory(download_dir)
 
+    # O navegador vem do pool: fica aberto entre downloads e só é reciclado após vários usos
+    with navegador.sessao(download_dir) as driver:
         # Acessa a página
-        url = "https://www.epa.gov/water-research/uev-library#access"
         logger.info(f"🌐 Acessando site: {url}")
-        driver.get(url)
+        limitador_hosts.aguardar(url)
+        with metricas.etapa("carregamento_pagina"):
+            driver.get(url)
 
         # Verifica se o cancelamento foi solicitado
         if cancel_event.is_set():
             logger.warning("⚠️ Cancelamento solicitado durante o acesso ao site.")
-            driver.quit()
-            return
+            return None
 
         # Espera até que o link de download esteja visível e clica nele
-        link_xpath = '//*[@id="main"]/div/div[1]/div[2]/div[1]/article/div[2]/div/p[11]/span[2]/a'
         logger.info("🔗 Aguardando link de download...")
-        link = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, link_xpath)))
+        with metricas.etapa("espera_link"):
+            link = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, link_xpath)))
+        # Guarda o link para que os próximos downloads sejam feitos via HTTP, sem navegador
+        href = link.get_attribute("href")
+        if href:
+            guardar_link(url, href, arquivo_estado)
         logger.info("🔗 Link de download encontrado, clicando...")
+        initial_files = set(os.listdir(download_dir))
         link.click()
 
         # Aguarda o download ser concluído
         logger.info("⏳ Aguardando conclusão do download...")
-        initial_files = set(os.listdir(download_dir))
-        downloaded_file = wait_for_download(download_dir, initial_files, timeout=60)
+        with metricas.etapa("espera_download") as medicao:
+            downloaded_file = wait_for_download(download_dir, initial_files, timeout=60)
+            # Sem arquivo (download falhou), o erro é tratado logo abaixo
+            if downloaded_file:
+                medicao.adicionar(bytes_=os.path.getsize(downloaded_file))
 
         # Renomeia o arquivo baixado
         logger.info("📂 Verificando arquivos baixados...")
-        if downloaded_file:
-            # Aguarda até que o arquivo baixado não esteja em uso
-            logger.debug(f"Aguardando liberação do arquivo baixado: {downloaded_file}")
+        if not downloaded_file:
+            logger.error("❌ Nenhum arquivo .xlsx ou .xls foi encontrado para renomear.")
+            raise Exception("Nenhum arquivo .xlsx ou .xls foi encontrado para renomear.")
+        # Aguarda até que o arquivo baixado não esteja em uso
+        logger.debug(f"Aguardando liberação do arquivo baixado: {downloaded_file}")
+        with metricas.etapa("liberacao_arquivo"):
             wait_until_file_is_free(downloaded_file)
+        new_path = renomear_arquivo_baixado(downloaded_file, download_dir)
+        return new_path
 
-            # Gera o nome do arquivo com a data e hora atual
-            timestamp = datetime.now().strftime('%d-%m-%Y_%H-%M-%S')
-            new_filename = f"dados_emergy_{timestamp}.xlsx"
-            new_path = os.path.join(download_dir, new_filename)
+def planilha_ja_ingerida(caminho, prefixo_tabela=""):
+    """Confere no manifesto se a planilha já foi gravada por inteiro, sem carregar o pandas."""
+    if not manifesto.PULAR_INALTERADOS:
+        return False
+    from database.conexao.MySqlConnection import MySqlConnection
+    with MySqlConnection() as conn:
+        return manifesto.arquivo_ingerido(conn, manifesto.hash_arquivo(caminho), prefixo_tabela)
 
-            # Log para confirmar o nome gerado
-            logger.debug(f"Nome do arquivo gerado: {new_filename}")
+def main(fonte=FONTE_PADRAO, retomar=None):
+    # Tempo de cada etapa (download, leitura, limpeza, gravação...) vai para o relatório em metricas/
+    with metricas.execucao("automacao"):
+        executar_automacao(fonte, retomar)
 
-            # Renomeia o arquivo baixado
-            try:
-                logger.debug(f"Renomeando {downloaded_file} para {new_path}")
-                os.rename(downloaded_file, new_path)
-                logger.info(f"📥 Arquivo baixado e renomeado para: {new_path}")
-            except Exception as e:
-                logger.error(f"❌ Erro ao renomear o arquivo {downloaded_file} para {new_path}: {e}")
-                raise
+def executar_automacao(fonte=FONTE_PADRAO, retomar=None):
+    try:
+        logger.info("=== Início da Automação ===")
+        logger.info(f"--- Início do Web Scraping ({fonte.nome}) ---")
+
+        # Configura o diretório de download
+        download_dir = fonte.diretorio
+        if not os.path.exists(download_dir):
+            os.makedirs(download_dir, exist_ok=True)
+            logger.info(f"📁 Diretório '{download_dir}' criado.")
         else:
-            logger.error("❌ Nenhum arquivo .xlsx ou .xls foi encontrado para renomear.")
-            raise Exception("Nenhum arquivo .xlsx ou .xls foi encontrado para renomear.")
+            logger.info(f"📁 Diretório '{download_dir}' já existe.")
+        # A planilha anterior vai para o acervo antes que a limpeza do diretório a apague
+        snapshots.arquivar_diretorio(download_dir, fonte.nome)
 
-        # Fechar o navegador
-        logger.info("🌐 Fechando navegador...")
-        time.sleep(2)  # Aguarda 2 segundos para garantir que o download esteja concluído
-        driver.quit()
+        url = fonte.url
+        usar_selenium = not DOWNLOAD_VIA_HTTP
+        sem_alteracoes = None
+        if DOWNLOAD_VIA_HTTP:
+            try:
+                # Só pede "se mudou" ao servidor quando ainda há uma planilha local para reaproveitar
+                arquivos_existentes = [f for f in os.listdir(download_dir) if f.endswith((".xlsx", ".xls"))]
+                with metricas.etapa("download_http") as medicao:
+                    baixado = baixar_via_http(url, condicional=bool(arquivos_existentes),
+                                              arquivo_estado=fonte.arquivo_estado)
+                    medicao.adicionar(bytes_=os.path.getsize(baixado) if baixado else 0)
+                if baixado:
+                    clean_download_directory(download_dir)
+                    renomear_arquivo_baixado(baixado, download_dir)
+                else:
+                    logger.info(f"📂 Reaproveitando a planilha já baixada: {arquivos_existentes[0]}")
+                    sem_alteracoes = os.path.join(download_dir, arquivos_existentes[0])
+            except Exception as e:
+                logger.warning(f"⚠️ Download via HTTP falhou ({e}), usando o navegador...")
+                usar_selenium = True
+            # Nada mudou no site: se a planilha local também já está no banco, não há o que fazer
+            if sem_alteracoes and planilha_ja_ingerida(sem_alteracoes, fonte.prefixo_tabela):
+                logger.info("⏭️ Planilha sem alterações e já gravada no banco, nada a fazer.")
+                return
+
+        if usar_selenium and baixar_via_selenium(download_dir, url, fonte.xpath, fonte.arquivo_estado) is None:
+            return
 
         # Verifica se o cancelamento foi solicitado antes de prosseguir
         if cancel_event.is_set():
             logger.warning("⚠️ Cancelamento solicitado após download.")
             return
+        snapshots.arquivar_diretorio(download_dir, fonte.nome)
 
         # Inserir dados no banco
         logger.info("--- Início da Inserção no MySQL ---")
-        inserir_dados(download_dir)
+        # Importado só aqui: a inserção carrega o pandas, desnecessário quando não há o que gravar
+        from database.consultas.insert import inserir_dados
+        inserir_dados(download_dir, prefixo_tabela=fonte.prefixo_tabela, retomar=retomar)
 
     except Exception as e:
         logger.error(f"❌ Erro no main(): {str(e)}")
         raise
     finally:
-        logger.info("=== Fim da Automação ===")
\ No newline at end of file
+        logger.info("=== Fim da Automação ===")
+
+
+if __name__ == "__main__":
+    # Execução sem a interface: python main.py [--retomar]
+    parser = argparse.ArgumentParser(description="Baixa a planilha do EPA e grava as abas no MySQL.")
+    parser.add_argument("--retomar", "--resume", action="store_true", default=None,
+                        help="confirma a ingestão por lotes e continua do último checkpoint de uma execução interrompida")
+    main(retomar=parser.parse_args().retomar)
\ No newline at end of file
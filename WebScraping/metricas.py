@@ -0,0 +1,229 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from logging_config import logger
+
+# Pasta dos relatórios JSON de cada execução e arquivo no formato textfile do Prometheus
+METRICAS_DIR = os.getenv("METRICAS_DIR", "metricas")
+METRICAS_PROM = os.getenv("METRICAS_PROM", os.path.join(METRICAS_DIR, "webscraping.prom"))
+# Quantidade de relatórios JSON mantidos na pasta (os mais antigos são apagados)
+METRICAS_MAX_RELATORIOS = int(os.getenv("METRICAS_MAX_RELATORIOS", "100"))
+
+class Etapa:
+    """Uma medição em andamento; quem a abriu informa quantas linhas e bytes passaram por ela."""
+
+    def __init__(self, nome, rotulos):
+        self.nome = nome
+        self.rotulos = rotulos
+        self.linhas = 0
+        self.bytes = 0
+
+    def adicionar(self, linhas=0, bytes_=0):
+        self.linhas += linhas or 0
+        self.bytes += bytes_ or 0
+        return self
+
+class Execucao:
+    """Acumula o tempo, as linhas e os bytes de cada etapa (e tabela) de uma execução."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.id = uuid.uuid4().hex[:12]
+        self.inicio = datetime.now()
+        self._inicio_relogio = time.perf_counter()
+        self.duracao = None
+        self.status = None
+        self.etapas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, etapa, segundos, erro):
+        chave = (etapa.nome, tuple(sorted(etapa.rotulos.items())))
+        with self._lock:
+            total = self.etapas.setdefault(chave, {
+                "etapa": etapa.nome, "rotulos": dict(etapa.rotulos), "execucoes": 0,
+                "segundos": 0.0, "max_segundos": 0.0, "linhas": 0, "bytes": 0, "erros": 0,
+            })
+            total["execucoes"] += 1
+            total["segundos"] += segundos
+            total["max_segundos"] = max(total["max_segundos"], segundos)
+            total["linhas"] += etapa.linhas
+            total["bytes"] += etapa.bytes
+            total["erros"] += int(erro)
+
+    def finalizar(self, status):
+        self.duracao = time.perf_counter() - self._inicio_relogio
+        self.status = status
+
+    def relatorio(self):
+        with self._lock:
+            etapas = [dict(total) for total in self.etapas.values()]
+        # Totais de cada etapa somando todas as tabelas, para comparar execuções
+        totais = {}
+        for total in etapas:
+            soma = totais.setdefault(total["etapa"], {"etapa": total["etapa"], "segundos": 0.0, "linhas": 0, "bytes": 0})
+            for campo in ("segundos", "linhas", "bytes"):
+                soma[campo] += total[campo]
+        for total in etapas + list(totais.values()):
+            total["linhas_por_segundo"] = round(total["linhas"] / total["segundos"], 1) if total["linhas"] and total["segundos"] else None
+            total["segundos"] = round(total["segundos"], 6)
+            if "max_segundos" in total:
+                total["max_segundos"] = round(total["max_segundos"], 6)
+        return {
+            "execucao": self.id,
+            "nome": self.nome,
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "duracao_segundos": round(self.duracao, 6) if self.duracao is not None else None,
+            "status": self.status,
+            "totais_por_etapa": list(totais.values()),
+            "etapas": etapas,
+        }
+
+# Execução em andamento no contexto atual: execuções simultâneas em threads diferentes (a
+# interface e o agendador, duas chamadas de inserir_dados) geram cada uma o próprio relatório.
+# Threads novas começam sem execução; quem repassa trabalho a elas usa na_execucao
+_execucao = contextvars.ContextVar("metricas_execucao", default=None)
+# Relatório da última execução concluída (usado pelo benchmark)
+ultimo_relatorio = None
+
+def na_execucao(funcao):
+    """Envolve funcao para que, chamada em outra thread, meça as etapas na execução atual de quem a envolveu.
+
+    Ex.: executor.submit(metricas.na_execucao(gravar), aba).
+    """
+    atual = _execucao.get()
+
+    def executar(*args, **kwargs):
+        token = _execucao.set(atual)
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            _execucao.reset(token)
+    return executar
+
+@contextmanager
+def etapa(nome, **rotulos):
+    """Mede uma etapa da execução atual: with etapa("insercao", tabela=t) as e: ...; e.adicionar(linhas=n).
+
+    Fora de uma execução (ver execucao), apenas executa o bloco.
+    """
+    medicao = Etapa(nome, rotulos)
+    atual = _execucao.get()
+    inicio = time.perf_counter()
+    erro = True
+    try:
+        yield medicao
+        erro = False
+    finally:
+        if atual is not None:
+            atual.registrar(medicao, time.perf_counter() - inicio, erro)
+
+def medir_iteracao(iteravel, nome, **rotulos):
+    """Repassa os itens (DataFrames) do iterável, medindo o tempo gasto para produzir cada um."""
+    iterador = iter(iteravel)
+    while True:
+        with etapa(nome, **rotulos) as medicao:
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+            medicao.adicionar(linhas=len(item))
+        yield item
+
+@contextmanager
+def execucao(nome):
+    """Abre uma execução e, ao final, grava o relatório JSON e o textfile do Prometheus.
+
+    Se já houver uma execução em andamento (inserir_dados chamado por main), o
+    bloco é medido como uma etapa dela.
+    """
+    global ultimo_relatorio
+    if _execucao.get() is not None:
+        with etapa(nome) as medicao:
+            yield medicao
+        return
+
+    atual = Execucao(nome)
+    token = _execucao.set(atual)
+    status = "erro"
+    try:
+        yield atual
+        status = "sucesso"
+    finally:
+        _execucao.reset(token)
+        atual.finalizar(status)
+        ultimo_relatorio = atual.relatorio()
+        try:
+            exportar(atual)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível gravar as métricas da execução: {e}")
+
+def _escrever_atomicamente(caminho, conteudo):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+    # O coletor do Prometheus nunca vê um arquivo pela metade
+    os.replace(temporario, caminho)
+
+def _rotulos_prometheus(rotulos):
+    def escapar(valor):
+        return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return ",".join(f'{chave}="{escapar(valor)}"' for chave, valor in rotulos.items())
+
+def formato_prometheus(relatorio):
+    """Converte o relatório no formato de texto do Prometheus (para o textfile collector)."""
+    base = {"execucao": relatorio["nome"]}
+    linhas = [
+        "# HELP webscraping_execucao_duracao_segundos Duração total da última execução.",
+        "# TYPE webscraping_execucao_duracao_segundos gauge",
+        f"webscraping_execucao_duracao_segundos{{{_rotulos_prometheus(base)}}} {relatorio['duracao_segundos']}",
+        "# HELP webscraping_execucao_sucesso 1 se a última execução terminou sem erro.",
+        "# TYPE webscraping_execucao_sucesso gauge",
+        f"webscraping_execucao_sucesso{{{_rotulos_prometheus(base)}}} {int(relatorio['status'] == 'sucesso')}",
+        "# HELP webscraping_execucao_timestamp_segundos Início da última execução (epoch).",
+        "# TYPE webscraping_execucao_timestamp_segundos gauge",
+        f"webscraping_execucao_timestamp_segundos{{{_rotulos_prometheus(base)}}} "
+        f"{datetime.fromisoformat(relatorio['inicio']).timestamp():.0f}",
+    ]
+    metricas = [
+        ("segundos", "Tempo total gasto na etapa."),
+        ("max_segundos", "Maior duração de uma única medição da etapa."),
+        ("execucoes", "Vezes que a etapa foi medida."),
+        ("linhas", "Linhas processadas na etapa."),
+        ("bytes", "Bytes processados na etapa."),
+        ("erros", "Medições da etapa que terminaram com erro."),
+        ("linhas_por_segundo", "Vazão da etapa em linhas por segundo."),
+    ]
+    for campo, ajuda in metricas:
+        nome = f"webscraping_etapa_{campo}"
+        linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} gauge"]
+        for total in relatorio["etapas"]:
+            if total[campo] is None:
+                continue
+            rotulos = _rotulos_prometheus({**base, "etapa": total["etapa"], **total["rotulos"]})
+            linhas.append(f"{nome}{{{rotulos}}} {total[campo]}")
+    return "\n".join(linhas) + "\n"
+
+def _apagar_relatorios_antigos():
+    relatorios = sorted(f for f in os.listdir(METRICAS_DIR) if f.startswith("execucao_") and f.endswith(".json"))
+    for nome in relatorios[:-METRICAS_MAX_RELATORIOS] if METRICAS_MAX_RELATORIOS > 0 else []:
+        os.remove(os.path.join(METRICAS_DIR, nome))
+
+def exportar(atual):
+    """Grava o relatório JSON da execução e atualiza o textfile do Prometheus."""
+    relatorio = atual.relatorio()
+    caminho = os.path.join(METRICAS_DIR, f"execucao_{atual.inicio:%Y%m%d_%H%M%S}_{atual.id}.json")
+    _escrever_atomicamente(caminho, json.dumps(relatorio, indent=2, ensure_ascii=False))
+    _escrever_atomicamente(METRICAS_PROM, formato_prometheus(relatorio))
+    _apagar_relatorios_antigos()
+
+    logger.info(f"⏱️ Execução {atual.nome} ({relatorio['status']}) em {relatorio['duracao_segundos']:.2f}s; relatório: {caminho}")
+    for total in sorted(relatorio["totais_por_etapa"], key=lambda total: -total["segundos"]):
+        detalhe = f", {total['linhas']} linhas ({total['linhas_por_segundo']} linhas/s)" if total["linhas"] else ""
+        logger.info("⏱️ %s: %.3fs%s", total["etapa"], total["segundos"], detalhe)
+    return caminho
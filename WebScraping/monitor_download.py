@@ -0,0 +1,133 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from logging_config import logger
+
+# Eventos do inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENTO = struct.Struct("iIII")
+
+# Intervalo da verificação por listagem quando o inotify não está disponível
+INTERVALO_POLLING = float(os.getenv("DOWNLOAD_INTERVALO_POLLING", "0.1"))
+
+EXTENSOES_PLANILHA = (".xlsx", ".xls")
+
+def _carregar_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+_libc = _carregar_libc()
+
+def _planilha_final(nome):
+    return nome.endswith(EXTENSOES_PLANILHA) and not nome.endswith(".crdownload")
+
+class MonitorDiretorio:
+    """Observa um diretório e avisa quando um arquivo termina de ser gravado nele.
+
+    No Linux usa inotify: um arquivo está completo quando o processo que o
+    gravava o fecha (IN_CLOSE_WRITE) ou quando é renomeado para o nome final
+    (IN_MOVED_TO, como o Chrome faz com o .crdownload). Nos demais sistemas,
+    ou se o inotify falhar, compara listagens do diretório a cada
+    INTERVALO_POLLING segundos e considera completo o arquivo cujo tamanho
+    parou de mudar.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self._fd = None
+        self._tamanhos = {}
+
+    def __enter__(self):
+        if _libc is not None:
+            fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0 and _libc.inotify_add_watch(
+                    fd, os.fsencode(os.path.abspath(self.diretorio)), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) >= 0:
+                self._fd = fd
+            else:
+                erro = ctypes.get_errno()
+                if fd >= 0:
+                    os.close(fd)
+                logger.debug(f"inotify indisponível ({os.strerror(erro)}), usando verificação por listagem.")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    @property
+    def usa_inotify(self):
+        return self._fd is not None
+
+    def _ler_eventos(self, timeout):
+        prontos, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not prontos:
+            return []
+        dados = os.read(self._fd, 64 * 1024)
+        eventos, posicao = [], 0
+        while posicao < len(dados):
+            _, mascara, _, tamanho = _EVENTO.unpack_from(dados, posicao)
+            inicio = posicao + _EVENTO.size
+            nome = dados[inicio:inicio + tamanho].rstrip(b"\0")
+            eventos.append((os.fsdecode(nome), mascara))
+            posicao = inicio + tamanho
+        return eventos
+
+    def _arquivos_estaveis(self):
+        # Sem inotify: um arquivo está completo quando o tamanho se repete entre duas listagens
+        estaveis, tamanhos = [], {}
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if entrada.is_file():
+                    tamanhos[entrada.name] = entrada.stat().st_size
+                    if self._tamanhos.get(entrada.name) == tamanhos[entrada.name]:
+                        estaveis.append(entrada.name)
+        self._tamanhos = tamanhos
+        return estaveis
+
+    def esperar_arquivo(self, aceitar, ignorar=(), timeout=60):
+        """Espera um arquivo completo cujo nome satisfaz aceitar(nome); retorna o caminho dele."""
+        ignorar = set(ignorar)
+        limite = time.monotonic() + timeout
+        if self.usa_inotify:
+            # Arquivos que surgiram antes do monitor começar (o inotify não os reporta);
+            # o Chrome só dá o nome final ao arquivo depois de terminar de gravá-lo
+            for nome in os.listdir(self.diretorio):
+                if nome not in ignorar and aceitar(nome):
+                    return os.path.join(self.diretorio, nome)
+        while True:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return None
+            if self.usa_inotify:
+                for nome, mascara in self._ler_eventos(restante):
+                    if nome in ignorar or not aceitar(nome):
+                        continue
+                    if mascara & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        return os.path.join(self.diretorio, nome)
+                    logger.debug("Arquivo %s criado, aguardando o fim da gravação...", nome)
+            else:
+                for nome in self._arquivos_estaveis():
+                    if nome not in ignorar and aceitar(nome):
+                        return os.path.join(self.diretorio, nome)
+                time.sleep(min(INTERVALO_POLLING, restante))
+
+def esperar_planilha(diretorio, arquivos_iniciais, timeout=60):
+    """Espera uma planilha .xlsx/.xls nova e completa no diretório; retorna o caminho ou None."""
+    with MonitorDiretorio(diretorio) as monitor:
+        return monitor.esperar_arquivo(_planilha_final, ignorar=arquivos_iniciais, timeout=timeout)
@@ -0,0 +1,277 @@
+import atexit
+import json
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from logging_config import logger
+import metricas
+
+# Caminho do chromedriver resolvido pelo webdriver-manager, reaproveitado entre execuções
+ARQUIVO_DRIVER = os.path.join("cache", "chromedriver.json")
+
+# Caminho fixo do chromedriver (dispensa o webdriver-manager)
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "")
+
+# Navegadores mantidos abertos ao mesmo tempo e usos de cada um antes de ser reciclado
+NAVEGADOR_POOL = int(os.getenv("NAVEGADOR_POOL", "1"))
+NAVEGADOR_MAX_USOS = int(os.getenv("NAVEGADOR_MAX_USOS", "20"))
+
+# "enxuto": não espera imagens, fontes, mídia e scripts de análise para liberar a página
+# (page load "eager" e bloqueio dessas requisições), com cache em disco reaproveitado;
+# "completo": carrega a página inteira, como um navegador comum
+NAVEGADOR_PERFIL = os.getenv("NAVEGADOR_PERFIL", "enxuto")
+DIRETORIO_CACHE_NAVEGADOR = os.getenv("NAVEGADOR_CACHE_DIR", os.path.join("cache", "chrome"))
+NAVEGADOR_CACHE_MB = int(os.getenv("NAVEGADOR_CACHE_MB", "200"))
+
+# Requisições recusadas no perfil enxuto (padrões do Network.setBlockedURLs, com * como curinga)
+BLOQUEIOS_PADRAO = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*dap.digitalgov.gov*", "*siteimproveanalytics*", "*facebook.net*", "*hotjar.com*",
+]
+# Padrões extras separados por vírgula (ex.: *.css,*cdn.exemplo.com/videos*)
+BLOQUEIOS = BLOQUEIOS_PADRAO + [p.strip() for p in os.getenv("NAVEGADOR_BLOQUEAR", "").split(",") if p.strip()]
+
+_driver_lock = threading.Lock()
+_caminho_driver = None
+
+# Cada navegador aberto ao mesmo tempo usa a própria pasta de cache (o Chrome não a compartilha)
+_caches_lock = threading.Lock()
+_caches_em_uso = set()
+
+def _carregar_caminho_guardado():
+    try:
+        with open(ARQUIVO_DRIVER, "r", encoding="utf-8") as f:
+            caminho = json.load(f).get("caminho")
+    except (OSError, ValueError):
+        return None
+    return caminho if caminho and os.path.isfile(caminho) else None
+
+def resolver_chromedriver(forcar=False):
+    """Retorna o caminho do chromedriver, chamando o webdriver-manager só quando necessário.
+
+    A ordem é: CHROMEDRIVER_PATH, o caminho guardado em cache/chromedriver.json e,
+    por último (ou com forcar=True), ChromeDriverManager().install().
+    """
+    global _caminho_driver
+    with _driver_lock:
+        if CHROMEDRIVER_PATH:
+            return CHROMEDRIVER_PATH
+        if not forcar:
+            _caminho_driver = _caminho_driver or _carregar_caminho_guardado()
+            if _caminho_driver:
+                return _caminho_driver
+        from webdriver_manager.chrome import ChromeDriverManager
+        logger.info("Resolvendo o ChromeDriver pelo webdriver-manager...")
+        _caminho_driver = ChromeDriverManager().install()
+        os.makedirs(os.path.dirname(ARQUIVO_DRIVER), exist_ok=True)
+        with open(ARQUIVO_DRIVER, "w", encoding="utf-8") as f:
+            json.dump({"caminho": _caminho_driver}, f)
+        logger.debug(f"ChromeDriver guardado em {ARQUIVO_DRIVER}: {_caminho_driver}")
+        return _caminho_driver
+
+def reservar_diretorio_cache():
+    """Primeira pasta de cache (cache/chrome/0, 1, ...) que nenhum navegador aberto está usando."""
+    with _caches_lock:
+        indice = 0
+        while os.path.join(DIRETORIO_CACHE_NAVEGADOR, str(indice)) in _caches_em_uso:
+            indice += 1
+        diretorio = os.path.join(DIRETORIO_CACHE_NAVEGADOR, str(indice))
+        _caches_em_uso.add(diretorio)
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+def liberar_diretorio_cache(diretorio):
+    with _caches_lock:
+        _caches_em_uso.discard(diretorio)
+
+def opcoes_chrome(perfil=None, diretorio_cache=None):
+    """Opções do Chrome usadas pela automação (ver NAVEGADOR_PERFIL)."""
+    perfil = perfil or NAVEGADOR_PERFIL
+    options = Options()
+    options.add_argument("--ignore-certificate-errors")
+    options.add_argument("--disable-popup-blocking")
+    options.add_argument("--start-maximized")
+    options.add_argument('--disable-extensions')
+    options.add_argument("--headless")  # Modo headless para não abrir janela
+    preferencias = {
+        "download.prompt_for_download": False,
+        "directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+    if perfil == "enxuto":
+        # Libera o driver no DOMContentLoaded: o link já está no HTML, sem esperar o resto da página
+        options.page_load_strategy = "eager"
+        preferencias["profile.managed_default_content_settings.images"] = 2
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--mute-audio")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+        if diretorio_cache:
+            options.add_argument(f"--disk-cache-dir={os.path.abspath(diretorio_cache)}")
+            options.add_argument(f"--disk-cache-size={NAVEGADOR_CACHE_MB * 1024 * 1024}")
+    options.add_experimental_option("prefs", preferencias)
+    return options
+
+def bloquear_requisicoes(driver, padroes=None):
+    """Recusa no próprio navegador as requisições de imagens, fontes, mídia e análise (perfil enxuto)."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOQUEIOS if padroes is None else padroes})
+
+def criar_driver(perfil=None):
+    """Abre um Chrome novo. Se o driver guardado não servir mais (Chrome atualizado), resolve de novo."""
+    perfil = perfil or NAVEGADOR_PERFIL
+    logger.info(f"Inicializando o ChromeDriver (perfil {perfil})...")
+    diretorio_cache = reservar_diretorio_cache() if perfil == "enxuto" else None
+    driver = None
+    try:
+        try:
+            driver = webdriver.Chrome(service=Service(resolver_chromedriver()),
+                                      options=opcoes_chrome(perfil, diretorio_cache))
+        except SessionNotCreatedException as e:
+            if CHROMEDRIVER_PATH:
+                raise
+            logger.warning(f"⚠️ ChromeDriver guardado incompatível ({e.msg}), resolvendo novamente...")
+            driver = webdriver.Chrome(service=Service(resolver_chromedriver(forcar=True)),
+                                      options=opcoes_chrome(perfil, diretorio_cache))
+        if perfil == "enxuto":
+            bloquear_requisicoes(driver)
+    except BaseException:
+        if driver is not None:
+            driver.quit()
+        if diretorio_cache:
+            liberar_diretorio_cache(diretorio_cache)
+        raise
+    # Devolvida por SessaoNavegador.encerrar quando o navegador é fechado
+    driver.diretorio_cache = diretorio_cache
+    return driver
+
+class SessaoNavegador:
+    """Um Chrome aberto e quantas vezes ele já foi usado."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.usos = 0
+
+    def ativa(self):
+        try:
+            self.driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def encerrar(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar o navegador: {e}")
+        finally:
+            diretorio_cache = getattr(self.driver, "diretorio_cache", None)
+            if diretorio_cache:
+                liberar_diretorio_cache(diretorio_cache)
+
+class PoolNavegadores:
+    """Mantém até `tamanho` navegadores abertos entre downloads consecutivos ou simultâneos.
+
+    Cada sessão é reciclada (fechada e aberta de novo no próximo uso) depois de
+    `max_usos` usos ou quando o navegador cai.
+    """
+
+    def __init__(self, tamanho=None, max_usos=None, fabrica=criar_driver):
+        self.tamanho = tamanho or NAVEGADOR_POOL
+        self.max_usos = max_usos or NAVEGADOR_MAX_USOS
+        self.fabrica = fabrica
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.Semaphore(self.tamanho)
+        self._lock = threading.Lock()
+        self._abertas = set()
+
+    def _retirar(self):
+        self._vagas.acquire()
+        try:
+            while True:
+                try:
+                    sessao = self._livres.get_nowait()
+                except queue.Empty:
+                    with metricas.etapa("inicio_navegador"):
+                        sessao = SessaoNavegador(self.fabrica())
+                    with self._lock:
+                        self._abertas.add(sessao)
+                    return sessao
+                if sessao.ativa():
+                    logger.debug(f"Reaproveitando navegador aberto ({sessao.usos} usos).")
+                    return sessao
+                logger.warning("⚠️ Navegador do pool não responde mais, abrindo outro...")
+                self._descartar(sessao)
+        except BaseException:
+            self._vagas.release()
+            raise
+
+    def _descartar(self, sessao):
+        with self._lock:
+            self._abertas.discard(sessao)
+        sessao.encerrar()
+
+    @contextmanager
+    def sessao(self, download_dir=None):
+        """Empresta um navegador do pool; os downloads dele vão para download_dir."""
+        sessao = self._retirar()
+        saudavel = False
+        try:
+            if download_dir:
+                # Pasta de download por sessão, definida a cada uso (as preferências só valem na abertura)
+                sessao.driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+                    "behavior": "allow",
+                    "downloadPath": os.path.abspath(download_dir),
+                })
+            yield sessao.driver
+            saudavel = True
+        except WebDriverException:
+            saudavel = sessao.ativa()
+            raise
+        finally:
+            sessao.usos += 1
+            try:
+                if saudavel and sessao.usos < self.max_usos:
+                    sessao.driver.get("about:blank")
+                    self._livres.put(sessao)
+                else:
+                    logger.debug(f"Reciclando navegador após {sessao.usos} usos.")
+                    self._descartar(sessao)
+            except WebDriverException:
+                self._descartar(sessao)
+            finally:
+                self._vagas.release()
+
+    def encerrar(self):
+        """Fecha todos os navegadores abertos pelo pool."""
+        with self._lock:
+            abertas, self._abertas = list(self._abertas), set()
+        for sessao in abertas:
+            sessao.encerrar()
+        while not self._livres.empty():
+            self._livres.get_nowait()
+        if abertas:
+            logger.info(f"🌐 {len(abertas)} navegador(es) fechado(s).")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def obter_pool():
+    """Pool de navegadores do processo, criado no primeiro uso e fechado na saída."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PoolNavegadores()
+            atexit.register(_pool.encerrar)
+        return _pool
+
+def sessao(download_dir=None):
+    """Atalho para obter_pool().sessao(download_dir)."""
+    return obter_pool().sessao(download_dir)
@@ -0,0 +1,120 @@
+import gzip
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from logging_config import logger
+from database.consultas import manifesto
+
+# Cópia comprimida de cada planilha baixada, guardada pelo hash do conteúdo (a mesma
+# planilha baixada várias vezes ocupa espaço uma vez só), para reconstruir o banco sem o site
+SNAPSHOTS = os.getenv("SNAPSHOTS_ATIVO", "1") == "1"
+DIRETORIO_SNAPSHOTS = os.getenv("SNAPSHOTS_DIR", "snapshots")
+
+# Retenção por fonte: versões mantidas e idade máxima em dias (0 = sem limite). A mais recente sempre fica
+SNAPSHOTS_MANTER = int(os.getenv("SNAPSHOTS_MANTER", "60"))
+SNAPSHOTS_MAX_DIAS = int(os.getenv("SNAPSHOTS_MAX_DIAS", "0"))
+
+ARQUIVO_INDICE = "indice.json"
+
+_indice_lock = threading.Lock()
+
+def _caminho_objeto(arquivo_hash, diretorio=None):
+    return os.path.join(diretorio or DIRETORIO_SNAPSHOTS, "objetos", arquivo_hash[:2], f"{arquivo_hash}.xlsx.gz")
+
+def carregar_indice(diretorio=None):
+    """Versões guardadas de cada fonte: {fonte: [{hash, arquivo, baixado_em, ...}]}, da mais antiga à mais recente."""
+    try:
+        with open(os.path.join(diretorio or DIRETORIO_SNAPSHOTS, ARQUIVO_INDICE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _salvar_indice(indice, diretorio=None):
+    caminho = os.path.join(diretorio or DIRETORIO_SNAPSHOTS, ARQUIVO_INDICE)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(indice, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+def arquivar(caminho, fonte, diretorio=None):
+    """Guarda a planilha no acervo da fonte (se o conteúdo ainda não estiver lá) e aplica a retenção.
+
+    Retorna o hash do arquivo.
+    """
+    diretorio = diretorio or DIRETORIO_SNAPSHOTS
+    arquivo_hash = manifesto.hash_arquivo(caminho)
+    objeto = _caminho_objeto(arquivo_hash, diretorio)
+    if not os.path.exists(objeto):
+        os.makedirs(os.path.dirname(objeto), exist_ok=True)
+        temporario = f"{objeto}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(caminho, "rb") as origem, gzip.open(temporario, "wb") as destino:
+            shutil.copyfileobj(origem, destino, 1024 * 1024)
+        os.replace(temporario, objeto)
+    agora = datetime.now().isoformat(timespec="seconds")
+    with _indice_lock:
+        indice = carregar_indice(diretorio)
+        versoes = indice.setdefault(fonte, [])
+        existente = next((v for v in versoes if v["hash"] == arquivo_hash), None)
+        if existente:
+            existente["visto_em"] = agora
+        else:
+            versoes.append({
+                "hash": arquivo_hash,
+                "arquivo": os.path.basename(caminho),
+                "baixado_em": agora,
+                "visto_em": agora,
+                "bytes": os.path.getsize(caminho),
+                "bytes_comprimidos": os.path.getsize(objeto),
+            })
+            logger.info(f"🗄️ Planilha {os.path.basename(caminho)} guardada no acervo da fonte {fonte} ({arquivo_hash[:12]}).")
+        _aplicar_retencao(indice, fonte, diretorio)
+        _salvar_indice(indice, diretorio)
+    return arquivo_hash
+
+def arquivar_diretorio(diretorio_download, fonte, diretorio=None):
+    """Guarda as planilhas (.xlsx/.xls) da pasta de download; erros não interrompem a automação."""
+    if not SNAPSHOTS or not os.path.isdir(diretorio_download):
+        return
+    for nome in os.listdir(diretorio_download):
+        caminho = os.path.join(diretorio_download, nome)
+        if not (os.path.isfile(caminho) and nome.endswith((".xlsx", ".xls"))):
+            continue
+        try:
+            arquivar(caminho, fonte, diretorio)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível guardar {caminho} no acervo: {e}")
+
+def _aplicar_retencao(indice, fonte, diretorio):
+    versoes = indice.get(fonte, [])
+    manter = versoes[-SNAPSHOTS_MANTER:] if SNAPSHOTS_MANTER > 0 else list(versoes)
+    if SNAPSHOTS_MAX_DIAS > 0:
+        limite = (datetime.now() - timedelta(days=SNAPSHOTS_MAX_DIAS)).isoformat(timespec="seconds")
+        manter = [v for v in manter[:-1] if v["baixado_em"] >= limite] + manter[-1:]
+    removidas = [v for v in versoes if v not in manter]
+    if not removidas:
+        return
+    indice[fonte] = manter
+    em_uso = {v["hash"] for lista in indice.values() for v in lista}
+    for versao in removidas:
+        if versao["hash"] not in em_uso:
+            try:
+                os.remove(_caminho_objeto(versao["hash"], diretorio))
+            except FileNotFoundError:
+                pass
+        logger.info(f"🧹 Versão {versao['hash'][:12]} ({versao['baixado_em']}) da fonte {fonte} removida do acervo.")
+
+def listar(fonte=None, diretorio=None):
+    """Versões guardadas (de uma fonte ou de todas), como (fonte, versão), em ordem de download."""
+    indice = carregar_indice(diretorio)
+    versoes = [(nome, v) for nome, lista in indice.items() if fonte is None or nome == fonte for v in lista]
+    return sorted(versoes, key=lambda item: item[1]["baixado_em"])
+
+def extrair(versao, destino, diretorio=None):
+    """Descomprime a versão na pasta destino, com o nome original da planilha. Retorna o caminho."""
+    os.makedirs(destino, exist_ok=True)
+    caminho = os.path.join(destino, versao["arquivo"])
+    with gzip.open(_caminho_objeto(versao["hash"], diretorio), "rb") as origem, open(caminho, "wb") as saida:
+        shutil.copyfileobj(origem, saida, 1024 * 1024)
+    return caminho
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos são importados como nos scripts, a partir da pasta WebScraping
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
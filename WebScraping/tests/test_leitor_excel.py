@@ -0,0 +1,67 @@
+import glob
+import os
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+from database.consultas.leitor_excel import abrir_planilha, ler_aba, ler_aba_em_blocos
+
+def _gravar_planilha(caminho):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "dados"
+    ws.append(["nome", "valor", None, "nome"])
+    ws.append(["a", 1, None, "x"])
+    ws.append([None, 1.5, None, "NA"])
+    # Linhas vazias no meio continuam; as do final são descartadas
+    ws.append([])
+    ws.append(["b", "N/A", None, None])
+    # Linha mais larga que o cabeçalho, só depois do primeiro bloco
+    ws.append(["c", 2, None, None, "extra"])
+    ws.append(["d"])
+    ws.append([])
+    ws.append([])
+    # Célula vazia mas formatada: dimensão da aba maior que os dados
+    ws.cell(row=12, column=8).number_format = "0.00"
+    vazia = wb.create_sheet("vazia")
+    vazia.append(["so_cabecalho"])
+    wb.create_sheet("sem_nada")
+    wb.save(caminho)
+
+def _normalizar(df):
+    # pd.read_excel marca as ausentes com NaN; a leitura em blocos, com None
+    return df.astype(object).where(df.notna(), None)
+
+@pytest.mark.parametrize("tamanho_bloco", [2, 1000])
+def test_blocos_iguais_ao_read_excel(tmp_path, tamanho_bloco):
+    caminho = tmp_path / "planilha.xlsx"
+    _gravar_planilha(caminho)
+    with pd.ExcelFile(caminho) as xls:
+        esperadas = {aba: ler_aba(xls, aba) for aba in xls.sheet_names}
+    # Uma única abertura da planilha para todas as abas
+    with abrir_planilha(caminho) as wb:
+        lidas = {aba: list(ler_aba_em_blocos(wb, aba, tamanho_bloco)) for aba in wb.sheetnames}
+
+    assert lidas["vazia"] == [] and lidas["sem_nada"] == []
+    esperado = esperadas["dados"]
+    blocos = lidas["dados"]
+    assert all(len(bloco) <= tamanho_bloco for bloco in blocos)
+    # Os blocos anteriores à linha mais larga não têm a coluna extra
+    obtido = pd.concat(blocos).reindex(columns=esperado.columns)
+    assert list(blocos[-1].columns) == list(esperado.columns)
+    pd.testing.assert_frame_equal(_normalizar(obtido), _normalizar(esperado), check_index_type=False)
+
+def test_planilha_do_download():
+    # Mesma comparação com a planilha real, quando ela está na pasta download
+    pasta = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "download")
+    planilhas = sorted(glob.glob(os.path.join(pasta, "dados_emergy_*.xlsx")))
+    if not planilhas:
+        pytest.skip("nenhuma planilha dados_emergy_*.xlsx na pasta download")
+    with pd.ExcelFile(planilhas[-1]) as xls, abrir_planilha(planilhas[-1]) as wb:
+        for aba in xls.sheet_names:
+            esperado = ler_aba(xls, aba)
+            blocos = list(ler_aba_em_blocos(wb, aba, 50))
+            if esperado.empty:
+                assert not blocos
+                continue
+            obtido = pd.concat(blocos).reindex(columns=esperado.columns)
+            pd.testing.assert_frame_equal(_normalizar(obtido), _normalizar(esperado), check_index_type=False)
@@ -0,0 +1,68 @@
+import glob
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from database.consultas.leitor_excel import ler_aba
+from database.consultas.limpeza import limpar_coluna, limpar_dataframe, limpar_texto
+
+# Planilhas reais da pasta download (a mesma conferência de python -m database.consultas.limpeza)
+PLANILHAS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                          "download", "dados_emergy_*.xlsx")))
+
+def _planilha():
+    """Aba com os casos que a limpeza precisa tratar igual à versão célula a célula."""
+    return pd.DataFrame({
+        "texto": ["  Água  ", "①", "x\U0001F600y", " \U0001F600 ", "\ud800", "➪ seta", "café", "café", "", "ASCII"],
+        "ausentes": [None, np.nan, pd.NA, pd.NaT, "a", None, "a", np.nan, "  ", "b"],
+        "misto": [1, 1.5, 3, True, pd.Timestamp("2024-01-02"), "1", 1, "1.5", 0.1 + 0.2, -0.0],
+        "repetidos": ["mesmo"] * 5 + ["Mêsmo"] * 5,
+    # object, como as abas limpas: com o pyarrow, o pandas guardaria o texto em colunas Arrow,
+    # que não aceitam o surrogate isolado
+    }, dtype=object)
+
+def _limpar_celula_a_celula(df):
+    # Resultado em object: o apply inferiria colunas de texto Arrow quando o pyarrow está instalado
+    return df.apply(lambda col: pd.Series([limpar_texto(v) for v in col], index=col.index, dtype=object))
+
+def _bytes(df):
+    return [[v.encode("utf-8", "surrogatepass") for v in df[col]] for col in df.columns]
+
+def test_limpar_dataframe_igual_a_limpar_texto():
+    df = _planilha()
+    esperado = _limpar_celula_a_celula(df)
+    obtido = limpar_dataframe(df)
+    assert list(obtido.columns) == list(df.columns)
+    assert list(obtido.index) == list(df.index)
+    assert _bytes(obtido) == _bytes(esperado)
+
+@pytest.mark.parametrize("coluna", ["texto", "ausentes", "misto", "repetidos"])
+def test_limpar_coluna_igual_a_limpar_texto(coluna):
+    serie = _planilha()[coluna]
+    obtido = limpar_coluna(serie)
+    assert obtido.name == serie.name
+    assert [v.encode("utf-8", "surrogatepass") for v in obtido] == \
+           [limpar_texto(v).encode("utf-8", "surrogatepass") for v in serie]
+
+def test_limpar_dataframe_lido_de_planilha(tmp_path):
+    # Como em inserir_dados: a aba gravada em xlsx e lida de volta com dtype=str (vazias viram NaN)
+    caminho = tmp_path / "planilha.xlsx"
+    _planilha().replace("\ud800", "").to_excel(caminho, index=False)
+    df = pd.read_excel(caminho, dtype=str)
+    assert df.isna().any().any()
+    assert _bytes(limpar_dataframe(df)) == _bytes(_limpar_celula_a_celula(df))
+
+def test_limpar_dataframe_vazio():
+    df = pd.DataFrame({"a": pd.Series([], dtype=object)})
+    assert limpar_dataframe(df).shape == (0, 1)
+
+@pytest.mark.skipif(not PLANILHAS, reason="nenhuma planilha dados_emergy_*.xlsx na pasta download")
+@pytest.mark.parametrize("caminho", PLANILHAS, ids=os.path.basename)
+def test_limpar_dataframe_nas_planilhas_do_download(caminho):
+    with pd.ExcelFile(caminho) as xls:
+        for aba in xls.sheet_names:
+            # Lida como em inserir_dados
+            df = ler_aba(xls, aba)
+            obtido = limpar_dataframe(df)
+            assert list(obtido.columns) == list(df.columns), aba
+            assert _bytes(obtido) == _bytes(_limpar_celula_a_celula(df)), aba
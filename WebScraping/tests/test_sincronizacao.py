@@ -0,0 +1,48 @@
+import pandas as pd
+from database.consultas import esquema
+from database.consultas.sincronizacao import SincronizacaoTabela
+
+class CursorFalso:
+    def __init__(self, enviados):
+        self.enviados = enviados
+
+    def execute(self, query, params=None):
+        pass
+
+    def executemany(self, query, linhas):
+        self.enviados.extend(linhas)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+class ConexaoFalsa:
+    def __init__(self):
+        self.enviados = []
+
+    def cursor(self):
+        return CursorFalso(self.enviados)
+
+def _aba_tipada():
+    df = pd.DataFrame({"nome": ["a", "b"], "valor": ["1", ""], "data": ["2024-01-02 00:00:00", None]})
+    return esquema.converter_valores(df, {"nome": "text", "valor": "int", "data": "date"})
+
+def test_sincronizacao_envia_null_nas_colunas_tipadas():
+    conn = ConexaoFalsa()
+    SincronizacaoTabela(conn, "t", []).aplicar(_aba_tipada())
+    assert [linha[:3] for linha in conn.enviados] == [("a", "1", "2024-01-02"), ("b", None, None)]
+
+def test_sincronizacao_envia_o_mesmo_que_o_insert():
+    conn = ConexaoFalsa()
+    df = _aba_tipada()
+    SincronizacaoTabela(conn, "t", []).aplicar(df)
+    assert [linha[:-2] for linha in conn.enviados] == list(esquema.linhas_para_gravar(df))
+
+def test_hash_diferencia_null_de_texto_vazio():
+    nulo, vazio = ConexaoFalsa(), ConexaoFalsa()
+    SincronizacaoTabela(nulo, "t", []).aplicar(esquema.converter_valores(pd.DataFrame({"v": [""]}), {"v": "int"}))
+    SincronizacaoTabela(vazio, "t", []).aplicar(pd.DataFrame({"v": [""]}))
+    assert nulo.enviados[0][0] is None and vazio.enviados[0][0] == ""
+    assert nulo.enviados[0][-1] != vazio.enviados[0][-1]